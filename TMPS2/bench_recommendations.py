@@ -0,0 +1,40 @@
+"""Скорость выборки рекомендаций MLRecommendation
+
+Запуск: python bench_recommendations.py [поездок] [дней]
+Сравнивает прежний цикл с random.sample на каждый день и пакетную
+выборку с seed (один вызов random.Random.choices на все поездки и дни).
+"""
+import sys
+import time
+
+from travel_planner import MLRecommendation
+
+
+def main(trips=10000, days=30):
+    ml = MLRecommendation()
+    print(f"{trips} поездок x {days} дней")
+
+    start = time.perf_counter()
+    for _ in range(trips):
+        ml.generate_recommendations("Париж", days)
+    loop = time.perf_counter() - start
+    print(f"random.sample по дням:   {loop:.2f} с")
+
+    start = time.perf_counter()
+    for trip in range(trips):
+        ml.generate_recommendations("Париж", days, seed=trip)
+    seeded = time.perf_counter() - start
+    print(f"seed на каждую поездку:  {seeded:.2f} с")
+
+    start = time.perf_counter()
+    batch = ml.generate_batch("Париж", days, trips, seed=42)
+    batched = time.perf_counter() - start
+    print(f"пакетная выборка:        {batched:.2f} с")
+
+    assert batch == ml.generate_batch("Париж", days, trips, seed=42)
+    assert ml.generate_recommendations("Рим", days, seed=7) == \
+        ml.generate_recommendations("Рим", days, seed=7)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,73 @@
+"""Сравнение форматов сохранения плана поездки
+
+Запуск: python bench_trip_storage.py [дней] [активностей_в_день]
+Базовая линия - прежний способ: json.dump(trip.to_dict(), indent=2).
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from travel_planner import TripPlan, DayPlan, Activity
+import trip_storage
+
+
+def make_trip(days, per_day):
+    trip = TripPlan("Париж")
+    trip.set_flight({"airline": "AirFrance", "price": 250, "time": "10:00-12:30", "class": "Economy"})
+    trip.set_hotel({"name": "Comfort Hotel", "price": 120, "rating": 4.2, "address": "City center"})
+    for d in range(days):
+        day = DayPlan(f"День {d + 1}", f"{d % 28 + 1:02d}.05.2026")
+        for a in range(per_day):
+            day.add(Activity(f"Экскурсия {a}", a * 5, "10:00-13:00", "Рейтинг: 4.5"))
+        trip.add_day(day)
+    return trip
+
+
+def _timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(days=365, per_day=20):
+    trip = make_trip(days, per_day)
+    with tempfile.TemporaryDirectory() as tmp:
+        _run(trip, tmp, days, per_day)
+
+
+def _run(trip, tmp, days, per_day):
+    def indented_save(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trip.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def indented_load(path):
+        with open(path, encoding="utf-8") as f:
+            return trip_storage.trip_from_dict(json.load(f))
+
+    cases = [("json indent=2 (было)", "trip_indent.json", indented_save, indented_load)]
+    for name, ext in (("json потоковый", "json"), ("json.gz", "json.gz"), ("msgpack", "msgpack")):
+        if ext == "msgpack" and trip_storage.msgpack is None:
+            print("msgpack не установлен, формат пропущен")
+            continue
+        cases.append((name, f"trip.{ext}",
+                      lambda path: trip_storage.save_trip(trip, path),
+                      trip_storage.load_trip))
+
+    print(f"План: {days} дней x {per_day} активностей")
+    print(f"{'формат':<22}{'размер, КБ':>12}{'запись, мс':>12}{'чтение, мс':>12}")
+    for name, filename, save, load in cases:
+        path = os.path.join(tmp, filename)
+        save_time = _timed(lambda: save(path))
+        load_time = _timed(lambda: load(path))
+        assert load(path).get_cost() == trip.get_cost()
+        size = os.path.getsize(path) / 1024
+        print(f"{name:<22}{size:>12.1f}{save_time * 1000:>12.1f}{load_time * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,164 @@
+"""Календарь цен для поездок с гибкими датами
+
+Для города вылета и списка направлений на horizon дней вперед хранятся
+три матрицы (дата × направление): самый дешевый перелет туда, самый
+дешевый перелет обратно и самая дешевая ночь в отеле. Поездка на n ночей
+с началом в день s стоит так: перелет туда в день s, ночи с s по
+s + n - 1 и перелет обратно в день s + n. С NumPy стоимости всех окон
+считаются сразу по префиксным суммам матрицы отелей, а лучшие окна
+выбираются через argpartition. Без NumPy работает тот же алгоритм на
+списках. Если у провайдера нет предложения, в ячейке стоит inf.
+
+Матрицы обновляются по частям. refresh() перезапрашивает только
+указанные даты и направления, update() записывает цену из уведомления
+провайдера, а roll() сдвигает календарь на новую дату начала и
+запрашивает только добавившиеся дни.
+"""
+import math
+from datetime import timedelta
+
+from travel_planner import load_numpy
+
+INF = math.inf
+
+
+def cheapest_price(offers):
+    """Наименьшая цена среди предложений адаптера или inf"""
+    return min((offer["price"] for offer in offers), default=INF)
+
+
+class FareCalendar:
+    def __init__(self, flight_adapter, booking_adapter, origin, destinations, start_date, horizon=90):
+        self.flight_adapter = flight_adapter
+        self.booking_adapter = booking_adapter
+        self.origin = origin
+        self.destinations = list(destinations)
+        self.start_date = start_date
+        self.horizon = horizon
+        self._columns = {destination: i for i, destination in enumerate(self.destinations)}
+        self._np = load_numpy()
+        self.outbound = self._matrix()
+        self.inbound = self._matrix()
+        self.hotels = self._matrix()
+        self._prefix = None  # префиксные суммы отелей, сбрасываются при любом изменении
+        self.refresh()
+
+    def date_at(self, row):
+        return self.start_date + timedelta(days=row)
+
+    def row_of(self, date):
+        return (date - self.start_date).days
+
+    def refresh(self, dates=None, destinations=None):
+        """Перезапрашивает у адаптеров ячейки указанных дат и направлений (по умолчанию все)"""
+        rows = range(self.horizon) if dates is None else [self.row_of(date) for date in dates]
+        columns = (range(len(self.destinations)) if destinations is None
+                   else [self._columns[destination] for destination in destinations])
+        for row in rows:
+            if 0 <= row < self.horizon:
+                for column in columns:
+                    self._fetch(row, column)
+        self._prefix = None
+
+    def update(self, date, destination, outbound=None, inbound=None, hotel=None):
+        """Записывает новую цену из уведомления провайдера без запроса к адаптеру"""
+        row, column = self.row_of(date), self._columns[destination]
+        if not 0 <= row < self.horizon:
+            return
+        for matrix, price in ((self.outbound, outbound), (self.inbound, inbound), (self.hotels, hotel)):
+            if price is not None:
+                matrix[row][column] = price
+        self._prefix = None
+
+    def roll(self, start_date):
+        """Сдвигает календарь на новую дату начала; запрашиваются только новые дни"""
+        shift = (start_date - self.start_date).days
+        self.start_date = start_date
+        if shift == 0:
+            return
+        if not 0 < shift < self.horizon:
+            self.refresh()
+            return
+        keep = self.horizon - shift
+        for matrix in (self.outbound, self.inbound, self.hotels):
+            if self._np is not None:
+                matrix[:keep] = matrix[shift:]
+            else:
+                del matrix[:shift]
+                matrix.extend([INF] * len(self.destinations) for _ in range(shift))
+        for row in range(keep, self.horizon):
+            for column in range(len(self.destinations)):
+                self._fetch(row, column)
+        self._prefix = None
+
+    def window_costs(self, nights):
+        """Стоимость поездки на nights ночей для каждой даты начала и направления:
+        матрица (horizon - nights) × направления"""
+        if not 0 < nights < self.horizon:
+            raise ValueError(f"Trip length must be between 1 and {self.horizon - 1} nights")
+        starts = self.horizon - nights
+        np = self._np
+        if np is not None:
+            sums, gaps = self._prefix_sums()
+            window = sums[nights:self.horizon] - sums[:starts]
+            # Окно, в которое попала ночь без предложений, недоступно целиком
+            window[gaps[nights:self.horizon] - gaps[:starts] > 0] = INF
+            return self.outbound[:starts] + window + self.inbound[nights:self.horizon]
+        sums, gaps = self._prefix_sums()
+        return [[self.outbound[s][c] + self.inbound[s + nights][c]
+                 + (sums[s + nights][c] - sums[s][c] if gaps[s + nights][c] == gaps[s][c] else INF)
+                 for c in range(len(self.destinations))]
+                for s in range(starts)]
+
+    def cheapest(self, nights, limit=1):
+        """Лучшие окна: [(дата начала, направление, стоимость)] по возрастанию цены"""
+        costs = self.window_costs(nights)
+        columns = len(self.destinations)
+        np = self._np
+        if np is not None:
+            flat = costs.ravel()
+            limit = min(limit, flat.size)
+            if limit <= 0:
+                return []
+            best = np.argpartition(flat, limit - 1)[:limit]
+            best = best[np.argsort(flat[best], kind="stable")]
+            cells = [(int(i), float(flat[i])) for i in best]
+        else:
+            flat = [cost for row in costs for cost in row]
+            cells = sorted(enumerate(flat), key=lambda cell: cell[1])[:limit]
+        return [(self.date_at(i // columns), self.destinations[i % columns], cost)
+                for i, cost in cells if cost < INF]
+
+    def _matrix(self):
+        np = self._np
+        if np is not None:
+            return np.full((self.horizon, len(self.destinations)), INF)
+        return [[INF] * len(self.destinations) for _ in range(self.horizon)]
+
+    def _fetch(self, row, column):
+        date, destination = self.date_at(row), self.destinations[column]
+        self.outbound[row][column] = cheapest_price(
+            self.flight_adapter.search_flights(self.origin, destination, date))
+        self.inbound[row][column] = cheapest_price(
+            self.flight_adapter.search_flights(destination, self.origin, date))
+        self.hotels[row][column] = cheapest_price(self.booking_adapter.search_hotels(destination, [date]))
+
+    def _prefix_sums(self):
+        # (суммы цен ночей, число ночей без предложений) с нулевой первой строкой
+        if self._prefix is None:
+            np = self._np
+            if np is not None:
+                missing = np.isinf(self.hotels)
+                sums = np.zeros((self.horizon + 1, len(self.destinations)))
+                gaps = np.zeros((self.horizon + 1, len(self.destinations)), dtype=np.int64)
+                np.cumsum(np.where(missing, 0.0, self.hotels), axis=0, out=sums[1:])
+                np.cumsum(missing, axis=0, out=gaps[1:])
+            else:
+                sums = [[0.0] * len(self.destinations)]
+                gaps = [[0] * len(self.destinations)]
+                for row in self.hotels:
+                    sums.append([total + (0.0 if price == INF else price)
+                                 for total, price in zip(sums[-1], row)])
+                    gaps.append([count + (price == INF) for count, price in zip(gaps[-1], row)])
+            self._prefix = sums, gaps
+        return self._prefix
@@ -0,0 +1,315 @@
+"""Граф авиаперелетов для маршрутов через несколько городов
+
+Перелеты (legs) загружаются из локального набора данных: flights.csv с
+колонками FLIGHT_FIELDS и, по желанию, airports.csv с координатами городов.
+Города получают целые номера, и для каждого критерия ("price" или
+"duration") строится список смежности. В нем между парой городов остается
+только лучший перелет, поэтому сотни тысяч рейсов на одних направлениях не
+удлиняют поиск. Маршрут ищется алгоритмом A*. Эвристика - расстояние по
+большому кругу, умноженное на наименьшую по набору стоимость (или время)
+километра, и поэтому никогда не переоценивает остаток пути. Если координат
+нет хотя бы у одного города, такой оценки нет (через город без координат
+может идти сколь угодно дешевый перелет), и поиск сводится к Дейкстре. Каждая пересадка добавляет transfer_minutes ко
+времени в пути. Найденные маршруты кэшируются (до cache_size запросов).
+
+Набор данных для проверки: python flight_graph.py generate data [аэропортов] [перелетов]
+Запрос маршрута:          python flight_graph.py route data Москва Рим [price|duration]
+"""
+import csv
+import heapq
+import math
+import os
+import random
+import sys
+import time
+
+FLIGHT_FIELDS = ("origin", "destination", "airline", "price", "departure", "duration", "class")
+AIRPORT_FIELDS = ("city", "lat", "lon")
+METRICS = ("price", "duration")
+AIRLINES = ("Aeroflot", "AirFrance", "Lufthansa", "Emirates", "Turkish Airlines",
+            "KLM", "Alitalia", "Iberia", "Finnair", "LOT")
+CLASSES = ("Economy", "Economy", "Economy", "Premium", "Business")
+ROUTE_CACHE_SIZE = 10000
+
+# Города с настоящими координатами - чтобы сгенерированный набор подходил к интерфейсу
+KNOWN_CITIES = {
+    "Москва": (55.75, 37.62), "Париж": (48.86, 2.35), "Рим": (41.90, 12.50),
+    "Лондон": (51.51, -0.13), "Берлин": (52.52, 13.40), "Мадрид": (40.42, -3.70),
+    "Барселона": (41.39, 2.17), "Прага": (50.08, 14.44), "Вена": (48.21, 16.37),
+    "Амстердам": (52.37, 4.90), "Стамбул": (41.01, 28.98), "Дубай": (25.20, 55.27),
+    "Варшава": (52.23, 21.01), "Хельсинки": (60.17, 24.94), "Лиссабон": (38.72, -9.14),
+    "Афины": (37.98, 23.73), "Милан": (45.46, 9.19), "Санкт-Петербург": (59.94, 30.31),
+}
+
+
+def haversine_km(a, b):
+    """Расстояние по большому кругу между точками (широта, долгота)"""
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 12742.0 * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _unit_vector(coords):
+    lat, lon = math.radians(coords[0]), math.radians(coords[1])
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def load_legs(path):
+    """Перелеты из flights.csv по одному; цена и длительность приводятся к числам"""
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            row["price"] = float(row["price"])
+            row["duration"] = int(row["duration"])
+            yield row
+
+
+def load_airports(path):
+    """{город: (широта, долгота)} из airports.csv"""
+    with open(path, encoding="utf-8", newline="") as f:
+        return {row["city"]: (float(row["lat"]), float(row["lon"])) for row in csv.DictReader(f)}
+
+
+def format_duration(minutes):
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours} ч {minutes:02d} мин"
+
+
+class Route:
+    """Найденный маршрут: перелеты по порядку, цена и время в пути с пересадками"""
+    __slots__ = ("legs", "price", "duration")
+
+    def __init__(self, legs, transfer_minutes):
+        self.legs = legs
+        self.price = sum(leg["price"] for leg in legs)
+        self.duration = sum(leg["duration"] for leg in legs) + transfer_minutes * (len(legs) - 1)
+
+    @property
+    def stops(self):
+        return [leg["destination"] for leg in self.legs[:-1]]
+
+    @property
+    def cities(self):
+        return [self.legs[0]["origin"]] + [leg["destination"] for leg in self.legs]
+
+    def to_offer(self):
+        """Предложение в формате FlightAdapter.search_flights для TripPlan.set_flight"""
+        airlines = list(dict.fromkeys(leg["airline"] for leg in self.legs))
+        return {
+            "airline": " + ".join(airlines),
+            "price": round(self.price),
+            "time": f"{self.legs[0]['departure']}, в пути {format_duration(self.duration)}",
+            "class": self.legs[0]["class"],
+            "route": " → ".join(self.cities),
+        }
+
+
+class FlightGraph:
+    def __init__(self, legs, airports=None, transfer_minutes=60, cache_size=ROUTE_CACHE_SIZE):
+        self.transfer_minutes = transfer_minutes
+        self.cache_size = cache_size
+        self._ids = {}
+        self._names = []
+        self._adj = {metric: [] for metric in METRICS}
+        self._cache = {}
+        best = {metric: {} for metric in METRICS}  # (u, v) -> (вес, перелет)
+        count = 0
+        for leg in legs:
+            u, v = self._intern(leg["origin"]), self._intern(leg["destination"])
+            if u == v:
+                continue
+            count += 1
+            for metric, weight in (("price", leg["price"]),
+                                   ("duration", leg["duration"] + transfer_minutes)):
+                current = best[metric].get((u, v))
+                if current is None or weight < current[0]:
+                    best[metric][(u, v)] = (weight, leg)
+        self.leg_count = count
+        self._coords = [None] * len(self._names)
+        for city, coords in (airports or {}).items():
+            node = self._ids.get(city)
+            if node is not None:
+                self._coords[node] = coords
+        # Единичные векторы городов: эвристика считает расстояние по хорде без
+        # тригонометрии; None - координаты есть не у всех городов
+        self._points = None
+        if self._coords and None not in self._coords:
+            self._points = [_unit_vector(coords) for coords in self._coords]
+        # Наименьшая цена и время на километр по всем перелетам - множители эвристики
+        self._per_km = {}
+        for metric in METRICS:
+            adj = self._adj[metric] = [[] for _ in self._names]
+            ratio = math.inf
+            for (u, v), (weight, leg) in best[metric].items():
+                adj[u].append((v, weight, leg))
+                if self._points is not None:
+                    distance = haversine_km(self._coords[u], self._coords[v])
+                    if distance > 0:
+                        ratio = min(ratio, weight / distance)
+            self._per_km[metric] = ratio if ratio < math.inf else 0.0
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, city):
+        return city in self._ids
+
+    @property
+    def cities(self):
+        return list(self._names)
+
+    @classmethod
+    def from_dataset(cls, directory, **kwargs):
+        airports_path = os.path.join(directory, "airports.csv")
+        airports = load_airports(airports_path) if os.path.exists(airports_path) else None
+        return cls(load_legs(os.path.join(directory, "flights.csv")), airports, **kwargs)
+
+    def route(self, origin, destination, by="price"):
+        """Лучший маршрут по критерию by или None, если город недостижим"""
+        if by not in METRICS:
+            raise ValueError(f"Unknown metric: {by}")
+        if self.cache_size <= 0:
+            return self._search(origin, destination, by)
+        key = (origin, destination, by)
+        if key not in self._cache:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = self._search(origin, destination, by)
+        return self._cache[key]
+
+    def itinerary(self, cities, by="price"):
+        """Маршруты между соседними городами списка; ValueError, если участок недостижим"""
+        routes = []
+        for origin, destination in zip(cities, cities[1:]):
+            route = self.route(origin, destination, by)
+            if route is None:
+                raise ValueError(f"No route from {origin} to {destination}")
+            routes.append(route)
+        return routes
+
+    def _intern(self, city):
+        node = self._ids.get(city)
+        if node is None:
+            node = self._ids[city] = len(self._names)
+            self._names.append(city)
+        return node
+
+    def _search(self, origin, destination, by):
+        source, target = self._ids.get(origin), self._ids.get(destination)
+        if source is None or target is None or source == target:
+            return None
+        adj = self._adj[by]
+        size = len(self._names)
+        points = self._points
+        # Нижняя оценка остатка пути считается один раз на вершину (-1 - еще не считали)
+        heuristic = [-1.0] * size
+        scale = self._per_km[by] * 12742.0
+        if points is None or scale <= 0:
+            heuristic = [0.0] * size
+            gx = gy = gz = 0.0
+        else:
+            gx, gy, gz = points[target]
+
+        dist = [math.inf] * size
+        dist[source] = 0.0
+        came_from = {}
+        done = bytearray(size)
+        heap = [(0.0, 0.0, source)]
+        pop, push, asin, sqrt = heapq.heappop, heapq.heappush, math.asin, math.sqrt
+        while heap:
+            _, cost, node = pop(heap)
+            if node == target:
+                break
+            if done[node]:
+                continue
+            done[node] = 1
+            for neighbor, weight, leg in adj[node]:
+                new_cost = cost + weight
+                if new_cost < dist[neighbor]:
+                    dist[neighbor] = new_cost
+                    came_from[neighbor] = (node, leg)
+                    h = heuristic[neighbor]
+                    if h < 0:
+                        point = points[neighbor]
+                        chord = sqrt((point[0] - gx) ** 2 + (point[1] - gy) ** 2 + (point[2] - gz) ** 2)
+                        h = scale * asin(min(1.0, chord / 2))
+                        heuristic[neighbor] = h
+                    push(heap, (new_cost + h, new_cost, neighbor))
+        else:
+            return None
+
+        legs = []
+        node = target
+        while node != source:
+            node, leg = came_from[node]
+            legs.append(leg)
+        legs.reverse()
+        return Route(legs, self.transfer_minutes)
+
+
+def generate_dataset(directory, airports=2000, legs=200000, seed=1):
+    """Синтетический набор: города-хабы и местные рейсы к ближайшим городам.
+    Цена и время растут с расстоянием, у одной пары бывает несколько рейсов."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    cities = dict(KNOWN_CITIES)
+    for i in range(max(0, airports - len(cities))):
+        cities[f"Город {i + 1}"] = (rng.uniform(25.0, 65.0), rng.uniform(-10.0, 60.0))
+    names = list(cities)
+    hubs = names[:max(len(KNOWN_CITIES), len(names) // 40)]
+    local = {}
+    for name in names:
+        sample = rng.sample(names, min(len(names), 200))
+        sample.sort(key=lambda other: haversine_km(cities[name], cities[other]))
+        local[name] = [other for other in sample[:21] if other != name][:20]
+
+    with open(os.path.join(directory, "airports.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(AIRPORT_FIELDS)
+        for name, (lat, lon) in cities.items():
+            writer.writerow((name, f"{lat:.4f}", f"{lon:.4f}"))
+
+    with open(os.path.join(directory, "flights.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FLIGHT_FIELDS)
+        for _ in range(legs):
+            origin = rng.choice(names)
+            destination = rng.choice(hubs) if rng.random() < 0.4 else rng.choice(local[origin])
+            if origin == destination:
+                continue
+            distance = haversine_km(cities[origin], cities[destination])
+            price = 30 + distance * 0.08 * rng.uniform(0.8, 1.6)
+            duration = 40 + distance / 800 * 60 * rng.uniform(1.0, 1.2)
+            departure = f"{rng.randrange(5, 23):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+            writer.writerow((origin, destination, rng.choice(AIRLINES), round(price), departure,
+                             round(duration), rng.choice(CLASSES)))
+    return directory
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 2 and argv[0] == "generate":
+        sizes = [int(value) for value in argv[2:4]]
+        generate_dataset(argv[1], *sizes)
+        print(f"Набор записан в {argv[1]}")
+    elif len(argv) >= 4 and argv[0] == "route":
+        start = time.perf_counter()
+        graph = FlightGraph.from_dataset(argv[1])
+        print(f"Граф: {len(graph)} городов, {graph.leg_count} перелетов, "
+              f"{time.perf_counter() - start:.2f} с")
+        by = argv[4] if len(argv) > 4 else "price"
+        start = time.perf_counter()
+        route = graph.route(argv[2], argv[3], by)
+        elapsed = (time.perf_counter() - start) * 1000
+        if route is None:
+            print(f"Маршрут не найден ({elapsed:.1f} мс)")
+        else:
+            offer = route.to_offer()
+            print(f"{offer['route']}: €{offer['price']}, {format_duration(route.duration)} ({elapsed:.1f} мс)")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,330 +1,173 @@
+import os
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import json
-from datetime import datetime, timedelta
-import random
+from tkinter import ttk, messagebox, scrolledtext, filedialog
+from datetime import datetime
 
-class RecommendationSystem:
-    """Система рекомендаций (Мост)"""
-    def __init__(self, implementation):
-        self.impl = implementation
-    
-    def get_recommendations(self, destination, days):
-        return self.impl.generate_recommendations(destination, days)
+from travel_planner import TravelComponent, DayPlan, TravelPlannerFacade
 
-class BasicRecommendation:
-    """Базовая реализация рекомендаций"""
-    def generate_recommendations(self, destination, days):
-        base_recs = [
-            "Обзорная экскурсия по городу (10:00-13:00, €25)",
-            "Посещение главного музея (14:00-17:00, €15)",
-            "Ужин в традиционном ресторане (19:00-21:00, €40)"
-        ]
-        return [f"{rec} (День {i+1})" for i in range(days) for rec in base_recs]
+try:
+    import instrumentation
+except ImportError:
+    # Общий модуль инструментирования лежит в корне репозитория
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import instrumentation
+from instrumentation import timed
 
-class MLRecommendation:
-    """Улучшенные рекомендации с ИИ"""
-    def generate_recommendations(self, destination, days):
-        city_data = {
-            "Париж": [
-                "Экскурсия в Лувр с гидом (09:00-12:00, €25)",
-                "Обед в ресторане Le Procope (13:00-15:00, €50)",
-                "Вечерний круиз по Сене (19:30-22:00, €85)",
-                "Прогулка по Монмартру (10:00-13:00, бесплатно)",
-                "Посещение музея Орсе (14:00-17:00, €14)"
-            ],
-            "Рим": [
-                "Тур по Колизею и Форуму (10:00-13:00, €35)",
-                "Дегустация джелато в Giolitti (14:00-15:00, €10)",
-                "Экскурсия по Ватикану (16:00-18:00, €45)",
-                "Прогулка по Трастевере (19:00-21:00, бесплатно)"
-            ]
-        }
-        
-        recommendations = city_data.get(destination, [
-            "Пешеходная экскурсия по центру (10:00-13:00, €20)",
-            "Посещение местного рынка (14:00-16:00, бесплатно)",
-            "Ужин с местной кухней (19:00-21:00, €30-50)"
-        ])
-        
-        # Выбираем случайные рекомендации для каждого дня
-        result = []
-        for day in range(1, days+1):
-            daily_recs = random.sample(recommendations, min(3, len(recommendations)))
-            result.extend([f"{rec} (День {day})" for rec in daily_recs])
-        
-        return result
+# Критерий выбора маршрута через несколько городов
+ROUTE_CRITERIA = {"Дешевле": "price", "Быстрее": "duration"}
 
-class RestaurantRecommendation:
-    """Рекомендации ресторанов"""
-    def get_restaurants(self, destination):
-        restaurants = {
-            "Париж": [
-                {"name": "Le Jules Verne", "type": "Французская", "price": "€120-250", "rating": "4.8"},
-                {"name": "Bistrot Paul Bert", "type": "Бистро", "price": "€30-60", "rating": "4.6"},
-                {"name": "L'Ambroisie", "type": "Мишлен", "price": "€300+", "rating": "4.9"}
-            ],
-            "Рим": [
-                {"name": "Roscioli", "type": "Итальянская", "price": "€40-80", "rating": "4.7"},
-                {"name": "La Pergola", "type": "Мишлен", "price": "€200+", "rating": "4.9"}
-            ]
-        }
-        return restaurants.get(destination, [
-            {"name": "Местный ресторан", "type": "Региональная", "price": "€20-50", "rating": "4.0+"}
-        ])
+class TripTreeRenderer:
+    """Инкрементальная отрисовка плана поездки в Treeview
 
-class TravelComponent:
-    """Базовый компонент (Компоновщик)"""
-    def __init__(self, name):
-        self.name = name
-    
-    def display(self, tree, parent=""):
-        pass
+    Помнит, какой строке дерева соответствует каждый узел плана, и при
+    повторной отрисовке обращается к Tk только для строк, чья ревизия
+    изменилась. Активности дня вставляются лишь при его раскрытии.
+    """
+    def __init__(self, tree):
+        self.tree = tree
+        self.trip = None
+        self.trip_item = None
+        self._items = {}         # узел плана или ключ строки -> id строки
+        self._rows = {}          # ключ -> (text, values), уже показанные в дереве
+        self._revs = {}          # узел плана -> отрисованная ревизия
+        self._layout = {}        # id строки -> порядок ключей ее детей
+        self._days = {}          # id строки дня -> DayPlan
+        self._placeholders = {}  # DayPlan -> id строки-заглушки
+        tree.tag_configure("total", background="#f0f0f0", font=("Arial", 9, "bold"))
+        tree.bind("<<TreeviewOpen>>", timed("travel.tree_open", self._on_open), add="+")
     
-    def get_cost(self):
-        return 0
+    def render(self, trip):
+        if trip is not self.trip:
+            self._reset(trip)
+        elif self._revs.get(trip) == trip._rev:
+            return
+        self._sync_trip()
     
-    def to_dict(self):
-        return {"name": self.name}
-
-class Activity(TravelComponent):
-    """Активность"""
-    def __init__(self, name, cost=0, time="", notes=""):
-        super().__init__(name)
-        self.cost = cost
-        self.time = time
-        self.notes = notes
+    def _reset(self, trip):
+        self.tree.delete(*self.tree.get_children())
+        for store in (self._items, self._rows, self._revs, self._layout,
+                      self._days, self._placeholders):
+            store.clear()
+        self.trip = trip
+        self.trip_item = self.tree.insert("", "end", text=f"✈️ Поездка в {trip.name}",
+                                          values=("", ""), open=True)
     
-    def display(self, tree, parent=""):
-        tree.insert(parent, "end", text=f"⏰ {self.name}", 
-                   values=(f"€{self.cost}", f"{self.time} | {self.notes}"))
+    def _sync_trip(self):
+        trip = self.trip
+        self.tree.item(self.trip_item, text=f"✈️ Поездка в {trip.name}")
+        keys = []
+        if trip.flight:
+            keys.append("flight")
+        if trip.hotel:
+            keys.append("hotel")
+        keys.extend(trip.days)
+        keys.append("total")
+        self._sync(self.trip_item, keys)
+        self._revs[trip] = trip._rev
     
-    def get_cost(self):
-        return self.cost
+    def _sync(self, parent, keys):
+        """Приводит детей строки parent к списку keys"""
+        alive = set(keys)
+        for key in self._layout.get(parent, ()):
+            if key not in alive:
+                self._forget(key)
+        
+        for key in keys:
+            if isinstance(key, TravelComponent) and self._revs.get(key) == key._rev:
+                continue
+            text, values = self._row(key)
+            item = self._items.get(key)
+            if item is None:
+                item = self.tree.insert(parent, "end", text=text, values=values,
+                                        tags=("total",) if key == "total" else ())
+                self._items[key] = item
+            elif self._rows[key] != (text, values):
+                self.tree.item(item, text=text, values=values)
+            self._rows[key] = (text, values)
+            if isinstance(key, DayPlan):
+                self._days[item] = key
+                self._sync_day(key, item)
+            if isinstance(key, TravelComponent):
+                self._revs[key] = key._rev
+        
+        if self._layout.get(parent) != keys:
+            self.tree.set_children(parent, *(self._items[key] for key in keys))
+            self._layout[parent] = list(keys)
     
-    def to_dict(self):
-        data = super().to_dict()
-        data.update({
-            "type": "activity",
-            "cost": self.cost,
-            "time": self.time,
-            "notes": self.notes
-        })
-        return data
-
-class DayPlan(TravelComponent):
-    """План на день"""
-    def __init__(self, name, date):
-        super().__init__(name)
-        self.date = date
-        self.activities = []
-    
-    def add(self, component):
-        self.activities.append(component)
+    def _sync_day(self, day, item):
+        if item in self._layout:
+            self._sync(item, day.activities)
+            return
+        # День еще не раскрывался: поддерживаем только заглушку
+        placeholder = self._placeholders.get(day)
+        if day.activities and placeholder is None:
+            self._placeholders[day] = self.tree.insert(item, "end", text="…")
+        elif not day.activities and placeholder is not None:
+            self.tree.delete(self._placeholders.pop(day))
     
-    def display(self, tree, parent=""):
-        day_node = tree.insert(parent, "end", text=f"📅 {self.name} ({self.date})", 
-                             values=("", ""), open=True)
-        total = 0
-        for activity in self.activities:
-            activity.display(tree, day_node)
-            total += activity.get_cost()
-        tree.item(day_node, values=(f"€{total}", ""))
+    def _on_open(self, event):
+        item = self.tree.focus()
+        day = self._days.get(item)
+        if day is None or item in self._layout:
+            return
+        placeholder = self._placeholders.pop(day, None)
+        if placeholder is not None:
+            self.tree.delete(placeholder)
+        self._sync(item, day.activities)
     
-    def get_cost(self):
-        return sum(activity.get_cost() for activity in self.activities)
+    def _row(self, key):
+        trip = self.trip
+        if key == "flight":
+            return (f"✈️ Перелет: {trip.flight['airline']} ({trip.flight['time']})",
+                    (f"€{trip.flight['price']}", trip.flight.get('route', "")))
+        if key == "hotel":
+            return (f"🏨 Отель: {trip.hotel['name']} ★{trip.hotel['rating']}",
+                    (f"€{trip.hotel['price']}", trip.hotel['address']))
+        if key == "total":
+            return "💰 Итого:", (f"€{trip.get_cost()}", "")
+        if isinstance(key, DayPlan):
+            return f"📅 {key.name} ({key.date})", (f"€{key.get_cost()}", "")
+        return f"⏰ {key.name}", (f"€{key.cost}", f"{key.time} | {key.notes}")
     
-    def to_dict(self):
-        data = super().to_dict()
-        data.update({
-            "type": "day",
-            "date": self.date,
-            "activities": [act.to_dict() for act in self.activities]
-        })
-        return data
+    def _forget(self, key):
+        item = self._items.pop(key)
+        self._rows.pop(key, None)
+        self._revs.pop(key, None)
+        if isinstance(key, DayPlan):
+            self._days.pop(item, None)
+            self._placeholders.pop(key, None)
+            for activity in self._layout.pop(item, ()):
+                self._items.pop(activity, None)
+                self._rows.pop(activity, None)
+                self._revs.pop(activity, None)
+        self.tree.delete(item)
 
-class TripPlan(TravelComponent):
-    """План поездки"""
-    def __init__(self, destination):
-        super().__init__(destination)
-        self.days = []
-        self.hotel = None
-        self.flight = None
-    
-    def add_day(self, day):
-        self.days.append(day)
-    
-    def set_hotel(self, hotel):
-        self.hotel = hotel
+def format_trip_details(trip):
+    """Собирает текстовое описание поездки (через join, без конкатенации)"""
+    parts = [f"✈️ Поездка в {trip.name}\n\n"]
+    append = parts.append
     
-    def set_flight(self, flight):
-        self.flight = flight
+    if trip.flight:
+        append(f"Перелет: {trip.flight['airline']} ({trip.flight['time']})\n")
+        if trip.flight.get('route'):
+            append(f"Маршрут перелета: {trip.flight['route']}\n")
+        append(f"Стоимость: €{trip.flight['price']}\n\n")
     
-    def display(self, tree):
-        tree.delete(*tree.get_children())
-        trip_node = tree.insert("", "end", text=f"✈️ Поездка в {self.name}", 
-                              values=("", ""), open=True)
-        
-        if self.flight:
-            flight_text = f"{self.flight['airline']} ({self.flight['time']})"
-            tree.insert(trip_node, "end", text=f"✈️ Перелет: {flight_text}",
-                        values=(f"€{self.flight['price']}", ""))
-        
-        if self.hotel:
-            hotel_text = f"{self.hotel['name']} ★{self.hotel['rating']}"
-            tree.insert(trip_node, "end", text=f"🏨 Отель: {hotel_text}",
-                        values=(f"€{self.hotel['price']}", self.hotel['address']))
-        
-        total = (self.flight['price'] if self.flight else 0) + \
-               (self.hotel['price'] if self.hotel else 0)
-        
-        for day in self.days:
-            day.display(tree, trip_node)
-            total += day.get_cost()
-        
-        tree.insert(trip_node, "end", text="💰 Итого:", 
-                   values=(f"€{total}", ""), tags=("total",))
-        tree.tag_configure("total", background="#f0f0f0", font=("Arial", 9, "bold"))
-    
-    def get_cost(self):
-        return sum(day.get_cost() for day in self.days) + \
-              (self.flight['price'] if self.flight else 0) + \
-              (self.hotel['price'] if self.hotel else 0)
-    
-    def to_dict(self):
-        return {
-            "destination": self.name,
-            "flight": self.flight,
-            "hotel": self.hotel,
-            "days": [day.to_dict() for day in self.days],
-            "total_cost": self.get_cost()
-        }
-
-class TravelPlannerFacade:
-    """Фасад для планирования поездки"""
-    def __init__(self):
-        self.booking_adapter = BookingAdapter()
-        self.flight_adapter = FlightAdapter()
-        self.recommendation_system = RecommendationSystem(MLRecommendation())
-        self.restaurant_recommendation = RestaurantRecommendation()
+    if trip.hotel:
+        append(f"Отель: {trip.hotel['name']}\n")
+        append(f"Рейтинг: ★{trip.hotel['rating']}\n")
+        append(f"Адрес: {trip.hotel['address']}\n")
+        append(f"Стоимость: €{trip.hotel['price']}\n\n")
     
-    def plan_trip(self, destination, start_date, days, origin_city="Москва"):
-        # Получаем данные от внешних сервисов
-        dates = [start_date + timedelta(days=i) for i in range(days)]
-        hotels = self.booking_adapter.search_hotels(destination, dates)
-        flights = self.flight_adapter.search_flights(origin_city, destination, start_date)
-        attractions = self.recommendation_system.get_recommendations(destination, days)
-        restaurants = self.restaurant_recommendation.get_restaurants(destination)
-        
-        # Создаем базовый план
-        trip = TripPlan(destination)
-        trip.set_flight(flights[0])
-        trip.set_hotel(hotels[1])
-        
-        # Создаем план для каждого дня
-        for i in range(days):
-            day = DayPlan(f"День {i+1}", dates[i].strftime("%d.%m.%Y"))
-            
-            # Добавляем активности
-            if i*3 < len(attractions):
-                act = self._parse_activity(attractions[i*3])
-                if act: day.add(act)
-            
-            # Добавляем обед
-            if restaurants and i < len(restaurants):
-                rest = restaurants[i]
-                day.add(Activity(
-                    f"Обед в {rest['name']} ({rest['type']})",
-                    self._parse_price(rest['price']),
-                    "13:00-15:00",
-                    f"Рейтинг: {rest['rating']}"
-                ))
-            
-            # Добавляем ужин
-            if i*3+2 < len(attractions):
-                act = self._parse_activity(attractions[i*3+2])
-                if act: day.add(act)
-            
-            trip.add_day(day)
-        
-        return trip
-    
-    def _parse_activity(self, activity_str):
-        """Парсит строку активности в объект Activity"""
-        try:
-            parts = activity_str.split("(")
-            name = parts[0].strip()
-            details = parts[1].split(")")[0]
-            
-            time, *cost_parts = details.split(",")
-            time = time.strip()
-            cost = 0
-            
-            if cost_parts:
-                cost_str = cost_parts[0].strip()
-                if "€" in cost_str:
-                    cost = int(cost_str.replace("€", "").strip())
-            
-            return Activity(name, cost, time)
-        except:
-            return None
+    append("Маршрут:\n")
+    for day in trip.days:
+        append(f"\n{day.name} ({day.date}):\n")
+        for activity in day.activities:
+            append(f"- {activity.name} ({activity.time}), стоимость: €{activity.cost}\n")
     
-    def _parse_price(self, price_str):
-        """Парсит строку цены в число"""
-        try:
-            return int(price_str.replace("€", "").replace("+", "").strip())
-        except:
-            return 0
-
-class BookingAdapter:
-    """Адаптер для Booking.com"""
-    def search_hotels(self, destination, dates):
-        hotels = [
-            {
-                "name": "Budget Hotel",
-                "price": 50,
-                "rating": 3.5,
-                "address": "Near city center"
-            },
-            {
-                "name": "Comfort Hotel",
-                "price": 120,
-                "rating": 4.2,
-                "address": "City center"
-            },
-            {
-                "name": "Luxury Resort",
-                "price": 300,
-                "rating": 4.8,
-                "address": "Waterfront"
-            }
-        ]
-        return hotels
-
-class FlightAdapter:
-    """Адаптер для поиска авиабилетов"""
-    def search_flights(self, origin, destination, date):
-        flights = [
-            {
-                "airline": "AirFrance",
-                "price": 250,
-                "time": "10:00-12:30",
-                "class": "Economy"
-            },
-            {
-                "airline": "Lufthansa",
-                "price": 400,
-                "time": "15:00-17:45",
-                "class": "Premium"
-            },
-            {
-                "airline": "Emirates",
-                "price": 800,
-                "time": "08:00-10:15",
-                "class": "Business"
-            }
-        ]
-        return flights
+    append(f"\n💰 Общая стоимость поездки: €{trip.get_cost()}")
+    return "".join(parts)
 
 class TravelPlannerApp(tk.Tk):
     """Графический интерфейс приложения"""
@@ -336,9 +179,14 @@ class TravelPlannerApp(tk.Tk):
         # Инициализация фасада
         self.planner = TravelPlannerFacade()
         self.current_trip = None
+        self._details_state = None
+        self._fare_calendar = None
         
         # Создание виджетов
         self.create_widgets()
+        
+        # F12 - запуск и остановка семплирующего профилировщика
+        self.bind_all("<F12>", lambda event: instrumentation.toggle_sampling())
     
     def create_widgets(self):
         # Стиль
@@ -355,7 +203,7 @@ class TravelPlannerApp(tk.Tk):
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, pady=(0, 10))
         
-        ttk.Label(control_frame, text="Город назначения:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(control_frame, text="Города (через запятую):").grid(row=0, column=0, sticky=tk.W)
         self.destination_entry = ttk.Entry(control_frame, width=20)
         self.destination_entry.grid(row=0, column=1, padx=5)
         
@@ -369,8 +217,14 @@ class TravelPlannerApp(tk.Tk):
         self.days_spinbox.grid(row=0, column=5, padx=5)
         self.days_spinbox.set(3)
         
+        self.route_by = ttk.Combobox(control_frame, values=list(ROUTE_CRITERIA), state="readonly", width=9)
+        self.route_by.grid(row=0, column=6, padx=5)
+        self.route_by.set(next(iter(ROUTE_CRITERIA)))
+        
         ttk.Button(control_frame, text="Создать план", 
-                  command=self.create_plan).grid(row=0, column=6, padx=10)
+                  command=timed("travel.create_plan", self.create_plan)).grid(row=0, column=7, padx=10)
+        ttk.Button(control_frame, text="Лучшие даты", 
+                  command=timed("travel.find_cheapest_dates", self.find_cheapest_dates)).grid(row=0, column=8)
         
         # Дерево маршрута
         tree_frame = ttk.Frame(main_frame)
@@ -388,6 +242,8 @@ class TravelPlannerApp(tk.Tk):
         hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
         self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
         
+        self.renderer = TripTreeRenderer(self.tree)
+        
         self.tree.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
@@ -406,11 +262,15 @@ class TravelPlannerApp(tk.Tk):
         button_frame.pack(fill=tk.X, pady=(10, 0))
         
         ttk.Button(button_frame, text="Сохранить в JSON", 
-                  command=self.save_to_json).pack(side=tk.LEFT, padx=5)
+                  command=timed("travel.save_to_json", self.save_to_json)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Сохранить в архив", 
+                  command=timed("travel.save_to_archive", self.save_to_archive)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Загрузить план", 
+                  command=timed("travel.load_from_file", self.load_from_file)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Показать детали", 
-                  command=self.show_trip_details).pack(side=tk.LEFT, padx=5)
+                  command=timed("travel.show_trip_details", self.show_trip_details)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Советы по поездке", 
-                  command=self.show_travel_tips).pack(side=tk.LEFT, padx=5)
+                  command=timed("travel.show_travel_tips", self.show_travel_tips)).pack(side=tk.LEFT, padx=5)
     
     def create_plan(self):
         try:
@@ -422,8 +282,13 @@ class TravelPlannerApp(tk.Tk):
             start_date = datetime.strptime(self.start_date_entry.get(), "%d.%m.%Y")
             days = int(self.days_spinbox.get())
             
-            # Создаем план через фасад
-            self.current_trip = self.planner.plan_trip(destination, start_date, days)
+            # Создаем план через фасад; несколько городов - маршрут по графу перелетов
+            cities = [city.strip() for city in destination.split(",") if city.strip()]
+            if len(cities) > 1:
+                self.current_trip = self.planner.plan_multi_city_trip(
+                    cities, start_date, days, by=ROUTE_CRITERIA[self.route_by.get()])
+            else:
+                self.current_trip = self.planner.plan_trip(destination, start_date, days)
             
             # Отображаем план
             self.display_trip()
@@ -431,44 +296,60 @@ class TravelPlannerApp(tk.Tk):
         except ValueError as e:
             messagebox.showerror("Ошибка", f"Некорректные данные: {str(e)}")
     
+    def find_cheapest_dates(self):
+        """Подставляет самую дешевую дату начала в ближайшие 90 дней; несколько
+        городов сравниваются между собой как варианты направления"""
+        try:
+            cities = [city.strip() for city in self.destination_entry.get().split(",") if city.strip()]
+            if not cities:
+                messagebox.showerror("Ошибка", "Введите город назначения")
+                return
+            start_date = datetime.strptime(self.start_date_entry.get(), "%d.%m.%Y")
+            nights = int(self.days_spinbox.get())
+            
+            # Для тех же городов календарь только сдвигается на новую дату
+            calendar = self._fare_calendar
+            if calendar is None or calendar.destinations != cities:
+                calendar = self._fare_calendar = self.planner.fare_calendar(cities, start_date)
+            else:
+                calendar.roll(start_date)
+            best = calendar.cheapest(nights)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"Некорректные данные: {str(e)}")
+            return
+        
+        if not best:
+            messagebox.showinfo("Лучшие даты", "Нет предложений на ближайшие 90 дней")
+            return
+        date, city, cost = best[0]
+        self.start_date_entry.delete(0, tk.END)
+        self.start_date_entry.insert(0, date.strftime("%d.%m.%Y"))
+        messagebox.showinfo("Лучшие даты", f"{city}: с {date:%d.%m.%Y} на {nights} ноч. - "
+                                           f"€{cost:.0f} за перелеты и отель")
+    
     def display_trip(self):
         """Отображает план поездки в интерфейсе"""
         if not self.current_trip:
             return
         
-        self.tree.delete(*self.tree.get_children())
-        self.current_trip.display(self.tree)
+        self.renderer.render(self.current_trip)
         
         # Обновляем детали
         self.update_trip_details()
     
     def update_trip_details(self):
         """Обновляет текстовое описание поездки"""
-        if not self.current_trip:
+        trip = self.current_trip
+        if not trip:
             return
         
-        details = f"✈️ Поездка в {self.current_trip.name}\n\n"
-        
-        if self.current_trip.flight:
-            details += f"Перелет: {self.current_trip.flight['airline']} ({self.current_trip.flight['time']})\n"
-            details += f"Стоимость: €{self.current_trip.flight['price']}\n\n"
-        
-        if self.current_trip.hotel:
-            details += f"Отель: {self.current_trip.hotel['name']}\n"
-            details += f"Рейтинг: ★{self.current_trip.hotel['rating']}\n"
-            details += f"Адрес: {self.current_trip.hotel['address']}\n"
-            details += f"Стоимость: €{self.current_trip.hotel['price']}\n\n"
-        
-        details += "Маршрут:\n"
-        for day in self.current_trip.days:
-            details += f"\n{day.name} ({day.date}):\n"
-            for activity in day.activities:
-                details += f"- {activity.name} ({activity.time}), стоимость: €{activity.cost}\n"
-        
-        details += f"\n💰 Общая стоимость поездки: €{self.current_trip.get_cost()}"
+        # Текст пересобирается, только если план изменился с прошлого раза
+        if self._details_state == (trip, trip._rev):
+            return
+        self._details_state = (trip, trip._rev)
         
         self.details_text.delete(1.0, tk.END)
-        self.details_text.insert(tk.END, details)
+        self.details_text.insert(tk.END, format_trip_details(trip))
     
     def save_to_json(self):
         """Сохраняет план поездки в JSON-файл"""
@@ -476,16 +357,47 @@ class TravelPlannerApp(tk.Tk):
             messagebox.showerror("Ошибка", "Сначала создайте план поездки")
             return
         
-        trip_data = self.current_trip.to_dict()
-        filename = f"trip_to_{trip_data['destination']}.json"
+        from trip_storage import save_trip
+        filename = f"trip_to_{self.current_trip.name}.json"
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(trip_data, f, ensure_ascii=False, indent=2)
+            save_trip(self.current_trip, filename)
             messagebox.showinfo("Сохранено", f"План поездки сохранен в файл {filename}")
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {str(e)}")
     
+    def save_to_archive(self):
+        """Сохраняет план поездки в архив trips.db"""
+        if not self.current_trip:
+            messagebox.showerror("Ошибка", "Сначала создайте план поездки")
+            return
+        
+        from trip_archive import TripArchive
+        try:
+            with TripArchive() as archive:
+                trip_id = archive.save(self.current_trip)
+            messagebox.showinfo("Сохранено", f"План поездки сохранен в архив под номером {trip_id}")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить в архив: {str(e)}")
+    
+    def load_from_file(self):
+        """Загружает сохраненный план поездки"""
+        from trip_storage import load_trip
+        filename = filedialog.askopenfilename(
+            filetypes=[("План поездки", "*.json *.json.gz *.msgpack"), ("Все файлы", "*.*")])
+        if not filename:
+            return
+        
+        try:
+            self.current_trip = load_trip(filename)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить файл: {str(e)}")
+            return
+        
+        self.destination_entry.delete(0, tk.END)
+        self.destination_entry.insert(0, self.current_trip.name)
+        self.display_trip()
+    
     def show_trip_details(self):
         """Показывает детали поездки в отдельном окне"""
         if not self.current_trip:
@@ -523,5 +435,6 @@ class TravelPlannerApp(tk.Tk):
         messagebox.showinfo("Советы по поездке", message)
 
 if __name__ == "__main__":
+    instrumentation.configure_from_env()
     app = TravelPlannerApp()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,516 @@
+from datetime import timedelta
+from functools import lru_cache
+from itertools import permutations
+import math
+import os
+import random
+
+from flight_graph import FlightGraph
+
+# Предметная область планировщика путешествий: рекомендации, компоновщик
+# плана поездки, фасад и адаптеры внешних сервисов. Модуль не зависит от
+# tkinter, поэтому его могут загружать хранилище, архив, бенчмарки и
+# обработчики без графического интерфейса.
+
+# Локальный набор перелетов (flights.csv, airports.csv) для маршрутов через
+# несколько городов; создается командой python flight_graph.py generate data
+FLIGHT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+_numpy = False  # False - импорт еще не пробовали, None - NumPy не установлен
+
+
+def load_numpy():
+    """NumPy загружается при первом обращении, а не при импорте модуля"""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def split_days(days, parts):
+    """Делит дни поездки между городами поровну, остаток - первым городам"""
+    if parts < 1 or days < parts:
+        raise ValueError("Not enough days for all cities")
+    base, extra = divmod(days, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+class RecommendationSystem:
+    """Система рекомендаций (Мост)"""
+    def __init__(self, implementation):
+        self.impl = implementation
+    
+    def get_recommendations(self, destination, days, seed=None):
+        return self.impl.generate_recommendations(destination, days, seed)
+
+class BasicRecommendation:
+    """Базовая реализация рекомендаций"""
+    def generate_recommendations(self, destination, days, seed=None):
+        base_recs = [
+            "Обзорная экскурсия по городу (10:00-13:00, €25)",
+            "Посещение главного музея (14:00-17:00, €15)",
+            "Ужин в традиционном ресторане (19:00-21:00, €40)"
+        ]
+        return [f"{rec} (День {i+1})" for i in range(days) for rec in base_recs]
+
+class MLRecommendation:
+    """Улучшенные рекомендации с ИИ
+
+    Если задан seed, для каждого запроса создается собственный
+    random.Random, поэтому одинаковые seed дают одинаковые планы независимо
+    от того, установлен ли NumPy. Без seed используется глобальный random.
+    """
+    CITY_DATA = {
+        "Париж": [
+            "Экскурсия в Лувр с гидом (09:00-12:00, €25)",
+            "Обед в ресторане Le Procope (13:00-15:00, €50)",
+            "Вечерний круиз по Сене (19:30-22:00, €85)",
+            "Прогулка по Монмартру (10:00-13:00, бесплатно)",
+            "Посещение музея Орсе (14:00-17:00, €14)"
+        ],
+        "Рим": [
+            "Тур по Колизею и Форуму (10:00-13:00, €35)",
+            "Дегустация джелато в Giolitti (14:00-15:00, €10)",
+            "Экскурсия по Ватикану (16:00-18:00, €45)",
+            "Прогулка по Трастевере (19:00-21:00, бесплатно)"
+        ]
+    }
+    DEFAULT_RECOMMENDATIONS = [
+        "Пешеходная экскурсия по центру (10:00-13:00, €20)",
+        "Посещение местного рынка (14:00-16:00, бесплатно)",
+        "Ужин с местной кухней (19:00-21:00, €30-50)"
+    ]
+    PER_DAY = 3
+    MAX_VARIANTS = 10000
+
+    def __init__(self, seed=None):
+        self.seed = seed
+    
+    def generate_recommendations(self, destination, days, seed=None):
+        seed = self.seed if seed is None else seed
+        recommendations = self.CITY_DATA.get(destination, self.DEFAULT_RECOMMENDATIONS)
+        per_day = min(self.PER_DAY, len(recommendations))
+        
+        if seed is None:
+            # Выбираем случайные рекомендации для каждого дня
+            result = []
+            for day in range(1, days+1):
+                daily_recs = random.sample(recommendations, per_day)
+                result.extend([f"{rec} (День {day})" for rec in daily_recs])
+            return result
+        
+        picks = self.sample_days(seed, days, len(recommendations), per_day)
+        return [f"{recommendations[i]} (День {day})"
+                for day, row in enumerate(picks, 1) for i in row]
+    
+    def generate_batch(self, destination, days, trips, seed):
+        """Рекомендации сразу для нескольких поездок одной выборкой"""
+        recommendations = self.CITY_DATA.get(destination, self.DEFAULT_RECOMMENDATIONS)
+        per_day = min(self.PER_DAY, len(recommendations))
+        picks = self.sample_days(seed, trips * days, len(recommendations), per_day)
+        labels = [f" (День {day})" for day in range(1, days+1)]
+        return [[recommendations[i] + labels[day]
+                 for day in range(days) for i in picks[trip * days + day]]
+                for trip in range(trips)]
+    
+    @staticmethod
+    def sample_days(seed, rows, population, k):
+        """Для каждой из rows строк выбирает k разных индексов из population"""
+        rng = random.Random(seed)
+        if math.perm(population, k) <= MLRecommendation.MAX_VARIANTS:
+            # Вариантов дня немного: один вызов choices вместо sample на каждую строку
+            return rng.choices(MLRecommendation._variants(population, k), k=rows)
+        indices = range(population)
+        return [rng.sample(indices, k) for _ in range(rows)]
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _variants(population, k):
+        return tuple(permutations(range(population), k))
+
+class RestaurantRecommendation:
+    """Рекомендации ресторанов"""
+    def get_restaurants(self, destination):
+        restaurants = {
+            "Париж": [
+                {"name": "Le Jules Verne", "type": "Французская", "price": "€120-250", "rating": "4.8"},
+                {"name": "Bistrot Paul Bert", "type": "Бистро", "price": "€30-60", "rating": "4.6"},
+                {"name": "L'Ambroisie", "type": "Мишлен", "price": "€300+", "rating": "4.9"}
+            ],
+            "Рим": [
+                {"name": "Roscioli", "type": "Итальянская", "price": "€40-80", "rating": "4.7"},
+                {"name": "La Pergola", "type": "Мишлен", "price": "€200+", "rating": "4.9"}
+            ]
+        }
+        return restaurants.get(destination, [
+            {"name": "Местный ресторан", "type": "Региональная", "price": "€20-50", "rating": "4.0+"}
+        ])
+
+class TravelComponent:
+    """Базовый компонент (Компоновщик)
+
+    Каждый узел хранит ссылку на родителя и кэшированную сумму своего
+    поддерева. При изменении стоимости вверх по дереву передается только
+    разница, поэтому итоги не пересчитываются обходом всего плана.
+    Ревизия узла растет при любом изменении в его поддереве.
+    """
+    __slots__ = ("name", "parent", "_cost", "_rev")
+
+    def __init__(self, name):
+        self.name = name
+        self.parent = None
+        self._cost = 0
+        self._rev = 0
+    
+    def get_cost(self):
+        return self._cost
+    
+    def _propagate(self, delta=0):
+        """Передает изменение стоимости и ревизии всем предкам узла"""
+        node = self
+        while node is not None:
+            node._cost += delta
+            node._rev += 1
+            node = node.parent
+    
+    def _attach(self, component):
+        """Привязывает дочерний узел и учитывает его стоимость
+
+        Узел, уже входящий в другой план, сначала отвязывается там, иначе
+        его стоимость учитывалась бы в обоих деревьях.
+        """
+        if component.parent is not None:
+            component.parent._remove_child(component)
+        component.parent = self
+        self._propagate(component._cost)
+    
+    def _detach(self, component):
+        """Отвязывает дочерний узел и вычитает его стоимость"""
+        component.parent = None
+        self._propagate(-component._cost)
+    
+    def _remove_child(self, component):
+        raise TypeError(f"{type(self).__name__} has no child components")
+    
+    def to_dict(self):
+        return {"name": self.name}
+
+class Activity(TravelComponent):
+    """Активность"""
+    __slots__ = ("time", "notes")
+    FIELDS = ("name", "cost", "time", "notes")
+
+    def __init__(self, name, cost=0, time="", notes=""):
+        super().__init__(name)
+        self._cost = cost
+        self.time = time
+        self.notes = notes
+    
+    @property
+    def cost(self):
+        return self._cost
+    
+    @cost.setter
+    def cost(self, value):
+        # Изменение стоимости сразу отражается в итогах дня и поездки
+        self._propagate(value - self._cost)
+    
+    def update(self, **fields):
+        """Изменяет поля активности (name, cost, time, notes)"""
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown activity fields: {', '.join(sorted(unknown))}")
+        cost = fields.pop("cost", self._cost)
+        for field, value in fields.items():
+            setattr(self, field, value)
+        self._propagate(cost - self._cost)
+    
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            "type": "activity",
+            "cost": self.cost,
+            "time": self.time,
+            "notes": self.notes
+        })
+        return data
+
+class DayPlan(TravelComponent):
+    """План на день"""
+    __slots__ = ("date", "activities")
+
+    def __init__(self, name, date):
+        super().__init__(name)
+        self.date = date
+        self.activities = []
+    
+    def add(self, component):
+        self.activities.append(component)
+        self._attach(component)
+    
+    def remove(self, component):
+        self.activities.remove(component)
+        self._detach(component)
+    
+    def _remove_child(self, component):
+        self.remove(component)
+    
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            "type": "day",
+            "date": self.date,
+            "activities": [act.to_dict() for act in self.activities]
+        })
+        return data
+
+class TripPlan(TravelComponent):
+    """План поездки"""
+    __slots__ = ("days", "hotel", "flight")
+
+    def __init__(self, destination):
+        super().__init__(destination)
+        self.days = []
+        self.hotel = None
+        self.flight = None
+    
+    def add_day(self, day):
+        self.days.append(day)
+        self._attach(day)
+    
+    def remove_day(self, day):
+        self.days.remove(day)
+        self._detach(day)
+    
+    def _remove_child(self, component):
+        self.remove_day(component)
+    
+    def set_hotel(self, hotel):
+        self._propagate(self._price(hotel) - self._price(self.hotel))
+        self.hotel = hotel
+    
+    def set_flight(self, flight):
+        self._propagate(self._price(flight) - self._price(self.flight))
+        self.flight = flight
+    
+    @staticmethod
+    def _price(offer):
+        return offer['price'] if offer else 0
+    
+    def to_dict(self):
+        return {
+            "destination": self.name,
+            "flight": self.flight,
+            "hotel": self.hotel,
+            "days": [day.to_dict() for day in self.days],
+            "total_cost": self.get_cost()
+        }
+
+class TravelPlannerFacade:
+    """Фасад для планирования поездки"""
+    def __init__(self):
+        self.booking_adapter = BookingAdapter()
+        self.flight_adapter = FlightAdapter()
+        self.recommendation_system = RecommendationSystem(MLRecommendation())
+        self.restaurant_recommendation = RestaurantRecommendation()
+    
+    def plan_trip(self, destination, start_date, days, origin_city="Москва", seed=None):
+        # Получаем данные от внешних сервисов
+        dates = [start_date + timedelta(days=i) for i in range(days)]
+        hotels = self.booking_adapter.search_hotels(destination, dates)
+        flights = self.flight_adapter.search_flights(origin_city, destination, start_date)
+        attractions = self.recommendation_system.get_recommendations(destination, days, seed)
+        restaurants = self.restaurant_recommendation.get_restaurants(destination)
+        
+        # Создаем базовый план
+        trip = TripPlan(destination)
+        trip.set_flight(flights[0])
+        trip.set_hotel(hotels[1])
+        
+        # Создаем план для каждого дня
+        for i in range(days):
+            day = DayPlan(f"День {i+1}", dates[i].strftime("%d.%m.%Y"))
+            self._fill_day(day, i, attractions, restaurants)
+            trip.add_day(day)
+        
+        return trip
+    
+    def plan_multi_city_trip(self, cities, start_date, days, origin_city="Москва", by="price",
+                             days_per_city=None, seed=None):
+        """Поездка через несколько городов: перелеты между ними ищутся по графу
+        рейсов (by - "price" или "duration"), дни делятся между городами"""
+        cities = list(cities)
+        if not cities:
+            raise ValueError("No cities to visit")
+        if days_per_city is None:
+            days_per_city = split_days(days, len(cities))
+        elif len(days_per_city) != len(cities) or sum(days_per_city) != days or min(days_per_city) < 1:
+            raise ValueError("days_per_city must give every city at least one day and sum to days")
+        
+        # Дата каждого перелета - день прибытия в очередной город
+        arrivals = [0]
+        for city_days in days_per_city[:-1]:
+            arrivals.append(arrivals[-1] + city_days)
+        offers = self._route_offers([origin_city] + cities,
+                                    [start_date + timedelta(days=n) for n in arrivals], by)
+        
+        # Первый город занимает перелет и отель плана, для следующих они
+        # добавляются в первый день пребывания
+        trip = TripPlan(" → ".join(cities))
+        trip.set_flight(offers[0])
+        for index, (city, city_days) in enumerate(zip(cities, days_per_city)):
+            dates = [start_date + timedelta(days=arrivals[index] + i) for i in range(city_days)]
+            hotel = self.booking_adapter.search_hotels(city, dates)[1]
+            attractions = self.recommendation_system.get_recommendations(
+                city, city_days, None if seed is None else seed + index)
+            restaurants = self.restaurant_recommendation.get_restaurants(city)
+            if index == 0:
+                trip.set_hotel(hotel)
+            
+            for i in range(city_days):
+                day = DayPlan(f"День {arrivals[index] + i + 1} — {city}", dates[i].strftime("%d.%m.%Y"))
+                if i == 0 and index > 0:
+                    offer = offers[index]
+                    day.add(Activity(f"Перелет в {city}: {offer['airline']}", offer['price'],
+                                     offer['time'], offer.get('route', "")))
+                    day.add(Activity(f"Отель {hotel['name']} ★{hotel['rating']}", hotel['price'],
+                                     "", hotel['address']))
+                self._fill_day(day, i, attractions, restaurants)
+                trip.add_day(day)
+        
+        return trip
+    
+    def fare_calendar(self, destinations, start_date, horizon=90, origin_city="Москва"):
+        """Календарь цен (дата × направление) на horizon дней вперед для поиска
+        самых дешевых дат поездки"""
+        from fare_calendar import FareCalendar  # fare_calendar сам импортирует этот модуль
+        return FareCalendar(self.flight_adapter, self.booking_adapter, origin_city,
+                            destinations, start_date, horizon)
+    
+    def _route_offers(self, stops, dates, by):
+        """Предложения перелетов между соседними пунктами; без набора данных
+        или маршрута в графе берется первый рейс адаптера, как в plan_trip"""
+        graph = self.flight_adapter.flight_graph()
+        offers = []
+        for origin, destination, date in zip(stops, stops[1:], dates):
+            route = graph.route(origin, destination, by) if graph is not None else None
+            if route is not None:
+                offers.append(route.to_offer())
+            else:
+                offers.append(self.flight_adapter.search_flights(origin, destination, date)[0])
+        return offers
+    
+    def _fill_day(self, day, i, attractions, restaurants):
+        """Активности i-го дня в городе: достопримечательность, обед и ужин"""
+        # Добавляем активности
+        if i*3 < len(attractions):
+            act = self._parse_activity(attractions[i*3])
+            if act: day.add(act)
+        
+        # Добавляем обед
+        if restaurants and i < len(restaurants):
+            rest = restaurants[i]
+            day.add(Activity(
+                f"Обед в {rest['name']} ({rest['type']})",
+                self._parse_price(rest['price']),
+                "13:00-15:00",
+                f"Рейтинг: {rest['rating']}"
+            ))
+        
+        # Добавляем ужин
+        if i*3+2 < len(attractions):
+            act = self._parse_activity(attractions[i*3+2])
+            if act: day.add(act)
+    
+    def _parse_activity(self, activity_str):
+        """Парсит строку активности в объект Activity"""
+        try:
+            parts = activity_str.split("(")
+            name = parts[0].strip()
+            details = parts[1].split(")")[0]
+            
+            time, *cost_parts = details.split(",")
+            time = time.strip()
+            cost = 0
+            
+            if cost_parts:
+                cost_str = cost_parts[0].strip()
+                if "€" in cost_str:
+                    cost = int(cost_str.replace("€", "").strip())
+            
+            return Activity(name, cost, time)
+        except:
+            return None
+    
+    def _parse_price(self, price_str):
+        """Парсит строку цены в число"""
+        try:
+            return int(price_str.replace("€", "").replace("+", "").strip())
+        except:
+            return 0
+
+class BookingAdapter:
+    """Адаптер для Booking.com"""
+    def search_hotels(self, destination, dates):
+        hotels = [
+            {
+                "name": "Budget Hotel",
+                "price": 50,
+                "rating": 3.5,
+                "address": "Near city center"
+            },
+            {
+                "name": "Comfort Hotel",
+                "price": 120,
+                "rating": 4.2,
+                "address": "City center"
+            },
+            {
+                "name": "Luxury Resort",
+                "price": 300,
+                "rating": 4.8,
+                "address": "Waterfront"
+            }
+        ]
+        return hotels
+
+class FlightAdapter:
+    """Адаптер для поиска авиабилетов"""
+    def __init__(self, dataset=FLIGHT_DATA_DIR):
+        self.dataset = dataset
+        self._graph = None
+    
+    def has_dataset(self):
+        return bool(self.dataset) and os.path.exists(os.path.join(self.dataset, "flights.csv"))
+    
+    def flight_graph(self):
+        """Граф рейсов из набора данных; строится один раз, при первом маршруте"""
+        if self._graph is None and self.has_dataset():
+            self._graph = FlightGraph.from_dataset(self.dataset)
+        return self._graph
+    
+    def search_flights(self, origin, destination, date):
+        flights = [
+            {
+                "airline": "AirFrance",
+                "price": 250,
+                "time": "10:00-12:30",
+                "class": "Economy"
+            },
+            {
+                "airline": "Lufthansa",
+                "price": 400,
+                "time": "15:00-17:45",
+                "class": "Premium"
+            },
+            {
+                "airline": "Emirates",
+                "price": 800,
+                "time": "08:00-10:15",
+                "class": "Business"
+            }
+        ]
+        return flights
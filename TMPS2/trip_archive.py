@@ -0,0 +1,150 @@
+"""Архив планов поездок в SQLite
+
+Каждый план хранится одной строкой: сам план в компактном JSON плюс
+вынесенные в колонки город, даты начала и конца и итоговая стоимость.
+По этим колонкам построены индексы, поэтому запросы вида «все поездки
+в Париж дешевле €2000 с началом в мае» не читают сами планы. Индексы по
+городу и по дате начала включают все колонки, которые возвращает search(),
+так что поиск по ним вообще не обращается к строкам таблицы.
+"""
+import glob
+import json
+import sqlite3
+from datetime import datetime
+
+from trip_storage import iter_trip_json, trip_from_dict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    id INTEGER PRIMARY KEY,
+    destination TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    total_cost REAL NOT NULL,
+    saved_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_trips_destination;
+DROP INDEX IF EXISTS idx_trips_start;
+CREATE INDEX IF NOT EXISTS idx_trips_destination_cover
+    ON trips (destination, start_date, total_cost, end_date);
+CREATE INDEX IF NOT EXISTS idx_trips_start_cover
+    ON trips (start_date, total_cost, end_date, destination);
+CREATE INDEX IF NOT EXISTS idx_trips_cost ON trips (total_cost);
+"""
+
+
+def _iso(date_str):
+    """Переводит дату дня ("%d.%m.%Y") в ISO, чтобы строки сравнивались как даты"""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, "%d.%m.%Y").date().isoformat()
+    except ValueError:
+        return date_str
+
+
+def _to_iso(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()[:10]
+
+
+class TripArchive:
+    """Хранилище сохраненных поездок с поиском по индексам"""
+    def __init__(self, path="trips.db"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save(self, trip):
+        """Сохраняет план и возвращает его id в архиве"""
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO trips (destination, start_date, end_date, total_cost, saved_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._row(trip.name,
+                          trip.days[0].date if trip.days else None,
+                          trip.days[-1].date if trip.days else None,
+                          trip.get_cost(),
+                          "".join(iter_trip_json(trip))))
+        return cur.lastrowid
+
+    def get(self, trip_id):
+        row = self.conn.execute("SELECT payload FROM trips WHERE id = ?", (trip_id,)).fetchone()
+        if row is None:
+            raise KeyError(trip_id)
+        return trip_from_dict(json.loads(row[0]))
+
+    def delete(self, trip_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM trips WHERE id = ?", (trip_id,))
+
+    def search(self, destination=None, date_from=None, date_to=None,
+               min_cost=None, max_cost=None, limit=None):
+        """Ищет поездки по городу, дате начала (включительно) и стоимости
+
+        Возвращает кортежи (id, destination, start_date, end_date, total_cost);
+        даты принимаются как date/datetime или строки ISO.
+        """
+        clauses, params = [], []
+        for clause, value in (("destination = ?", destination),
+                              ("start_date >= ?", _to_iso(date_from)),
+                              ("start_date <= ?", _to_iso(date_to)),
+                              ("total_cost >= ?", min_cost),
+                              ("total_cost <= ?", max_cost)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        query = "SELECT id, destination, start_date, end_date, total_cost FROM trips"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY start_date"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(query, params).fetchall()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM trips").fetchone()[0]
+
+    def import_json_files(self, pattern="trip_to_*.json"):
+        """Импортирует сохраненные ранее JSON-файлы одной транзакцией
+
+        Планы не собираются в объекты: нужные для индексов поля берутся
+        прямо из словаря. Возвращает число импортированных файлов.
+        """
+        paths = sorted(glob.glob(pattern)) if isinstance(pattern, str) else pattern
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT INTO trips (destination, start_date, end_date, total_cost, saved_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._file_row(path) for path in paths))
+        return cur.rowcount
+
+    def _file_row(self, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        days = data.get("days") or [{}]
+        total = data.get("total_cost")
+        if total is None:
+            total = trip_from_dict(data).get_cost()
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return self._row(data["destination"], days[0].get("date"), days[-1].get("date"),
+                         total, payload)
+
+    @staticmethod
+    def _row(destination, first_date, last_date, total_cost, payload):
+        return (destination, _iso(first_date), _iso(last_date), total_cost,
+                datetime.now().isoformat(timespec="seconds"), payload)
@@ -0,0 +1,122 @@
+"""Сохранение и загрузка планов поездок
+
+Форматы выбираются по расширению файла:
+    .json     - компактный JSON в формате TripPlan.to_dict(), пишется потоково
+    .json.gz  - тот же JSON, сжатый gzip
+    .msgpack  - бинарный позиционный формат (нужен пакет msgpack)
+"""
+import gzip
+import json
+
+from travel_planner import TripPlan, DayPlan, Activity
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_VERSION = 1
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def detect_format(path):
+    """Определяет формат файла по расширению"""
+    if path.endswith(".json.gz"):
+        return "json.gz"
+    if path.endswith(".msgpack"):
+        return "msgpack"
+    return "json"
+
+
+def iter_trip_json(trip):
+    """Отдает JSON плана кусками, не собирая весь словарь в памяти"""
+    yield '{"destination":' + _dumps(trip.name)
+    yield ',"flight":' + _dumps(trip.flight)
+    yield ',"hotel":' + _dumps(trip.hotel)
+    yield ',"total_cost":' + _dumps(trip.get_cost())
+    yield ',"days":['
+    for i, day in enumerate(trip.days):
+        yield ("," if i else "") + _dumps(day.to_dict())
+    yield "]}"
+
+
+def save_trip(trip, path, fmt=None):
+    """Сохраняет план поездки в файл"""
+    fmt = fmt or detect_format(path)
+    if fmt == "msgpack":
+        _save_msgpack(trip, path)
+        return
+    opener = gzip.open if fmt == "json.gz" else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.writelines(iter_trip_json(trip))
+
+
+def load_trip(path, fmt=None):
+    """Загружает план поездки из файла"""
+    fmt = fmt or detect_format(path)
+    if fmt == "msgpack":
+        return _load_msgpack(path)
+    opener = gzip.open if fmt == "json.gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return trip_from_dict(json.load(f))
+
+
+def trip_from_dict(data):
+    """Восстанавливает TripPlan из словаря формата TripPlan.to_dict()"""
+    trip = TripPlan(data["destination"])
+    if data.get("flight"):
+        trip.set_flight(data["flight"])
+    if data.get("hotel"):
+        trip.set_hotel(data["hotel"])
+    for day_data in data.get("days", ()):
+        # День собирается отдельно и подключается к поездке одним вызовом,
+        # так что стоимость каждой активности поднимается только до дня
+        day = DayPlan(day_data["name"], day_data["date"])
+        for act in day_data.get("activities", ()):
+            day.add(Activity(act["name"], act.get("cost", 0),
+                             act.get("time", ""), act.get("notes", "")))
+        trip.add_day(day)
+    return trip
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise RuntimeError("Для формата msgpack установите пакет msgpack")
+
+
+def _save_msgpack(trip, path):
+    _require_msgpack()
+    packer = msgpack.Packer()
+    with open(path, "wb") as f:
+        # [версия, город, перелет, отель, [день, ...]], день = [имя, дата, [активность, ...]]
+        f.write(packer.pack_array_header(5))
+        f.write(packer.pack(MSGPACK_VERSION))
+        f.write(packer.pack(trip.name))
+        f.write(packer.pack(trip.flight))
+        f.write(packer.pack(trip.hotel))
+        f.write(packer.pack_array_header(len(trip.days)))
+        for day in trip.days:
+            f.write(packer.pack([
+                day.name, day.date,
+                [[a.name, a.cost, a.time, a.notes] for a in day.activities]
+            ]))
+
+
+def _load_msgpack(path):
+    _require_msgpack()
+    with open(path, "rb") as f:
+        version, name, flight, hotel, days = msgpack.unpack(f, raw=False)
+    if version != MSGPACK_VERSION:
+        raise ValueError(f"Неподдерживаемая версия файла: {version}")
+    trip = TripPlan(name)
+    if flight:
+        trip.set_flight(flight)
+    if hotel:
+        trip.set_hotel(hotel)
+    for day_name, date, activities in days:
+        day = DayPlan(day_name, date)
+        for act in activities:
+            day.add(Activity(*act))
+        trip.add_day(day)
+    return trip
@@ -0,0 +1,46 @@
+import random
+import sys
+import time
+
+from rule_engine import Condition, Rule, RuleEngine
+
+# Задержка обработки события движком правил
+# Запуск: python bench_rule_engine.py [правил] [устройств] [событий]
+
+
+def main(rules=10000, devices=1000, events=100000):
+    engine = RuleEngine()
+    fired = []
+    for i in range(rules):
+        device = f"thermostat{i % devices}"
+        engine.add_rule(Rule(f"rule{i}", [
+            Condition(f"{device}.temperature", "<", 16 + i % 6),
+            Condition("security.state", "==", "ArmedState" if i % 2 else "DisarmedState"),
+        ], lambda mediator, i=i: fired.append(i)))
+    engine.set_fact("security.state", "ArmedState")
+
+    rng = random.Random(1)
+    latencies = []
+    for _ in range(events):
+        fact = f"thermostat{rng.randrange(devices)}.temperature"
+        value = rng.randint(14, 24)
+        start = time.perf_counter()
+        engine.set_fact(fact, value)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    total = sum(latencies)
+    print(f"{rules} правил, {devices} устройств, {events} событий")
+    print(f"событий/с: {events / total:,.0f}, срабатываний: {len(fired)}, "
+          f"проверок условий: {engine.evaluations}")
+    for p in (50, 95, 99):
+        print(f"p{p}: {latencies[int(len(latencies) * p / 100) - 1] * 1e6:.1f} мкс")
+
+    # Смена общего факта затрагивает половину правил - худший случай
+    start = time.perf_counter()
+    engine.set_fact("security.state", "DisarmedState")
+    print(f"смена security.state: {(time.perf_counter() - start) * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
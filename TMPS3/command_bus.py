@@ -0,0 +1,136 @@
+import queue
+import threading
+
+# Асинхронная шина команд для SmartHomeMediator
+#
+# Команды раскладываются по воркерам по устройству: все команды одного
+# устройства попадают в одну очередь и выполняются строго по порядку,
+# а разные устройства обрабатываются параллельно. Очереди ограничены,
+# поэтому при перегрузке submit либо ждет, либо сразу отказывает.
+# Пакет команд (объект с атрибутом commands) делится на части по очередям
+# их устройств, а on_done вызывается один раз, когда выполнены все части.
+# Место под все части пакета резервируется сразу под одним условием
+# (_space): пакет либо целиком встает в очереди, либо не встает никуда.
+
+_STOP = object()
+
+
+class _BatchPart:
+    # Часть пакета команд, которая выполняется в очереди одного воркера
+    def __init__(self, batch, commands):
+        self.batch = batch
+        self.commands = commands
+
+
+class _BatchTracker:
+    def __init__(self, remaining):
+        self.remaining = remaining
+        self.error = None
+        self.lock = threading.Lock()
+
+    def part_done(self, error):
+        # Возвращает True для последней завершившейся части
+        with self.lock:
+            self.error = self.error or error
+            self.remaining -= 1
+            return self.remaining == 0
+
+
+class CommandBus:
+    def __init__(self, on_done, workers=4, max_pending=1024):
+        # on_done(command, action, error) вызывается из потока воркера;
+        # доставкой результата в UI-поток занимается вызывающая сторона
+        self.on_done = on_done
+        self.rejected = 0
+        self.max_pending = max_pending
+        # Сами очереди не ограничены: заполненность считается в _reserved
+        self._queues = [queue.Queue() for _ in range(workers)]
+        self._reserved = [0] * workers
+        self._space = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, args=(i, q), name=f"command-bus-{i}", daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, command, action="execute", block=True, timeout=None):
+        # Возвращает False, если очередь устройства переполнена (backpressure)
+        commands = getattr(command, "commands", None)
+        if commands is None:
+            items = [(self._shard(command), (command, action, None))]
+        else:
+            items = self._split(command, commands, action)
+        shards = [shard for shard, _ in items]
+
+        def has_space():
+            return all(self._reserved[shard] < self.max_pending for shard in shards)
+
+        with self._space:
+            if not (has_space() or block and self._space.wait_for(has_space, timeout)):
+                self.rejected += 1
+                return False
+            for shard, item in items:
+                self._reserved[shard] += 1
+                self._queues[shard].put_nowait(item)
+        return True
+
+    def _split(self, batch, commands, action):
+        # Отмена пакета идет в обратном порядке внутри каждого устройства
+        ordered = reversed(commands) if action == "undo" else commands
+        groups = {}
+        for command in ordered:
+            groups.setdefault(self._shard(command), []).append(command)
+        if len(groups) == 1:
+            shard, = groups
+            return [(shard, (batch, action, None))]
+        tracker = _BatchTracker(len(groups))
+        return [(shard, (_BatchPart(batch, part), action, tracker))
+                for shard, part in groups.items()]
+
+    def pending(self):
+        return sum(q.qsize() for q in self._queues)
+
+    def join(self):
+        # Ждет, пока все отправленные команды будут выполнены
+        for q in self._queues:
+            q.join()
+
+    def shutdown(self, wait=True):
+        for q in self._queues:
+            q.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _shard(self, command):
+        device = getattr(command, "device", None)
+        # Адреса объектов выровнены, младшие биты id нулевые: хэш кортежа их перемешивает
+        return hash((id(device),)) % len(self._queues) if device is not None else 0
+
+    def _run(self, shard, q):
+        while True:
+            item = q.get()
+            if item is _STOP:
+                q.task_done()
+                return
+            command, action, tracker = item
+            error = None
+            try:
+                if tracker is None:
+                    getattr(command, action)()
+                else:
+                    for part in command.commands:
+                        getattr(part, action)()
+            except Exception as e:
+                error = e
+            try:
+                if tracker is None:
+                    self.on_done(command, action, error)
+                elif tracker.part_done(error):
+                    self.on_done(command.batch, action, tracker.error)
+            finally:
+                with self._space:
+                    self._reserved[shard] -= 1
+                    self._space.notify_all()
+                q.task_done()
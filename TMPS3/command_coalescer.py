@@ -0,0 +1,74 @@
+import threading
+
+# Слияние частых команд перед отправкой в медиатор
+#
+# Команды копятся в течение окна window секунд. Для каждого устройства и
+# вида действия (coalesce_key команды) остается только последняя команда.
+# Она отбрасывается, если ничего не меняет: задает то же состояние
+# (target_state), что и последняя отправленная по этому ключу команда, и
+# устройство уже в нем (is_noop). Одного живого состояния устройства мало,
+# потому что предыдущие команды могут еще стоять в асинхронной очереди
+# CommandBus. Пока по ключу ничего не отправлялось, команда уходит всегда.
+# Так «вкл-выкл-вкл-выкл» после уже выполненного «выкл» не дает ни одной
+# команды. Оставшиеся команды уходят одним пакетом (make_batch), то есть
+# одной записью в истории отмены.
+
+_UNSENT = object()
+
+
+def _thread_timer(delay, callback):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+
+
+class CommandCoalescer:
+    def __init__(self, sink, make_batch, window=0.1, schedule=_thread_timer):
+        # sink(command) - куда отправлять результат (например, mediator.submit_command);
+        # schedule(delay, callback) - таймер; в Qt передается QTimer.singleShot,
+        # чтобы сброс выполнялся в UI-потоке
+        self.sink = sink
+        self.make_batch = make_batch
+        self.window = window
+        self.schedule = schedule
+        self.received = 0
+        self.sent = 0
+        self._pending = {}
+        self._sent_state = {}  # coalesce_key -> target_state последней отправленной команды
+        self._order = 0
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def submit(self, command):
+        key = command.coalesce_key()
+        with self._lock:
+            self.received += 1
+            self._order += 1
+            # Ключ None - команда не сливается, у нее свое место в очереди
+            self._pending[key if key is not None else ("seq", self._order)] = (self._order, command)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.schedule(self.window, self.flush)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+        commands = [command for _, command in sorted(pending.values(), key=lambda item: item[0])
+                    if not self._is_noop(command)]
+        if not commands:
+            return
+        for command in commands:
+            key = command.coalesce_key()
+            if key is not None:
+                self._sent_state[key] = command.target_state()
+        self.sent += 1
+        self.sink(commands[0] if len(commands) == 1 else self.make_batch(commands))
+
+    def _is_noop(self, command):
+        # Пока по ключу ничего не отправлялось, _UNSENT не равен никакому состоянию
+        key, target = command.coalesce_key(), command.target_state()
+        if key is None or target is None:
+            return False
+        return self._sent_state.get(key, _UNSENT) == target and command.is_noop()
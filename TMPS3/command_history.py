@@ -0,0 +1,236 @@
+import glob
+import json
+import os
+import time
+from collections import deque
+
+# История команд SmartHomeMediator
+#
+# В памяти хранятся только последние capacity команд для отмены и повтора
+# (кольцевые буферы deque), поэтому память не растет со временем работы.
+# Если задан каталог, каждая операция дописывается в журнал, а каждые
+# snapshot_every операций сохраняется снимок состояния устройств и стеков
+# отмены и начинается новый сегмент журнала. При запуске восстанавливается
+# последний снимок и проигрывается только его сегмент. Хранятся последние
+# keep_snapshots снимков (не меньше одного) - в их пределах работает replay_to.
+# Изменения устройств в обход команд (стратегия термостата, режим охраны)
+# пишутся в журнал как новое состояние устройства, в стеки отмены не попадают.
+
+SNAPSHOT_PATTERN = "snapshot-*.json"
+
+
+class CommandHistory:
+    def __init__(self, path=None, capacity=1000, snapshot_every=1000, keep_snapshots=50):
+        if keep_snapshots < 1:
+            raise ValueError("keep_snapshots: нужно хранить хотя бы последний снимок")
+        self.path = path
+        self.capacity = capacity
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self.seq = 0
+        self._undo = deque(maxlen=capacity)
+        self._redo = deque(maxlen=capacity)
+        self._devices = {}
+        self._command_types = {}
+        self._names = {}
+        self._log = None
+        self._since_snapshot = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    # Операции, которые вызывает медиатор
+
+    def record(self, command):
+        # Команда выполнена: старая ветка повтора больше не действительна
+        self._undo.append(command)
+        self._redo.clear()
+        self._write("execute", command)
+
+    def pop_undo(self):
+        return self._undo.pop() if self._undo else None
+
+    def unpop_undo(self, command):
+        # Отмена не состоялась (очередь отклонила команду или она упала): команда возвращается
+        # на место; pop_undo в журнал не пишет, поэтому и здесь писать нечего
+        self._undo.append(command)
+
+    def undone(self, command):
+        self._redo.append(command)
+        self._write("undo", command)
+
+    def pop_redo(self):
+        return self._redo.pop() if self._redo else None
+
+    def unpop_redo(self, command):
+        self._redo.append(command)
+
+    def redone(self, command):
+        self._undo.append(command)
+        self._write("redo", command)
+
+    def record_state(self, device_name, state):
+        # Устройство изменено не командой: в журнал пишется его новое состояние
+        self.seq += 1
+        self._append({"seq": self.seq, "ts": time.time(), "op": "state",
+                      "device": device_name, "state": state})
+
+    # Работа с диском
+
+    def recover(self, devices, command_types):
+        # devices - словарь устройств медиатора, command_types - {имя класса: класс}
+        self._devices = devices
+        self._command_types = command_types
+        if self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        snapshots = sorted(glob.glob(os.path.join(self.path, SNAPSHOT_PATTERN)))
+        if snapshots:
+            with open(snapshots[-1], encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._restore(snapshot)
+            self._replay(self._segment_path(snapshot["seq"]))
+        self.snapshot()
+
+    def snapshot(self):
+        # Сохраняет снимок и открывает новый сегмент журнала
+        if self.path is None:
+            return
+        snapshot = {
+            "seq": self.seq,
+            "ts": time.time(),
+            "devices": {name: device.get_state() for name, device in self._devices.items()
+                        if hasattr(device, "get_state")},
+            "undo": [self._encode(command) for command in self._undo],
+            "redo": [self._encode(command) for command in self._redo],
+        }
+        target = os.path.join(self.path, f"snapshot-{self.seq:012d}.json")
+        with open(target + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(target + ".tmp", target)
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self._segment_path(self.seq), "a", encoding="utf-8")
+        self._since_snapshot = 0
+        self._prune()
+
+    def replay_to(self, timestamp):
+        # Возвращает устройства и стеки отмены к состоянию на момент timestamp
+        if self.path is None:
+            raise ValueError("История без каталога: снимков для replay_to нет")
+        snapshots = sorted(glob.glob(os.path.join(self.path, SNAPSHOT_PATTERN)))
+        base = None
+        for path in snapshots:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot["ts"] > timestamp:
+                break
+            base = snapshot
+        if base is None:
+            raise ValueError("Нет снимка раньше указанного времени")
+        latest = self.seq
+        self._restore(base)
+        self._replay(self._segment_path(base["seq"]), until=timestamp)
+        # Новая ветка истории начинается со свежего снимка; номер операции
+        # не уменьшается, чтобы этот снимок остался последним
+        self.seq = max(self.seq, latest)
+        self.snapshot()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write(self, op, command):
+        self.seq += 1
+        if self._log is None:
+            return
+        name, cmd = self._encode(command)
+        self._append({"seq": self.seq, "ts": time.time(), "op": op, "device": name, "cmd": cmd})
+
+    def _append(self, entry):
+        if self._log is None:
+            return
+        self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._log.flush()
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _replay(self, segment, until=None):
+        if not os.path.exists(segment):
+            return
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Недописанная последняя строка после сбоя
+                if until is not None and entry["ts"] > until:
+                    break
+                op = entry["op"]
+                if op == "state":
+                    device = self._devices.get(entry["device"])
+                    if device is not None:
+                        device.set_state(entry["state"])
+                    self.seq = entry["seq"]
+                    continue
+                command = self._decode(entry["device"], entry["cmd"])
+                if op == "undo":
+                    command.undo()
+                    if self._undo:
+                        self._undo.pop()
+                    self._redo.append(command)
+                else:
+                    command.execute()
+                    if op == "redo" and self._redo:
+                        self._redo.pop()
+                    elif op == "execute":
+                        self._redo.clear()
+                    self._undo.append(command)
+                self.seq = entry["seq"]
+
+    def _restore(self, snapshot):
+        for name, state in snapshot["devices"].items():
+            device = self._devices.get(name)
+            if device is not None:
+                device.set_state(state)
+        self._undo.clear()
+        self._undo.extend(self._decode(*item) for item in snapshot["undo"])
+        self._redo.clear()
+        self._redo.extend(self._decode(*item) for item in snapshot["redo"])
+        self.seq = snapshot["seq"]
+
+    def _prune(self):
+        snapshots = sorted(glob.glob(os.path.join(self.path, SNAPSHOT_PATTERN)))
+        for path in snapshots[:-self.keep_snapshots]:
+            seq = int(os.path.basename(path)[len("snapshot-"):-len(".json")])
+            os.remove(path)
+            if os.path.exists(self._segment_path(seq)):
+                os.remove(self._segment_path(seq))
+
+    def _segment_path(self, seq):
+        return os.path.join(self.path, f"log-{seq:012d}.jsonl")
+
+    def _encode(self, command):
+        # Пакет команд кодируется списком своих команд без имени устройства
+        commands = getattr(command, "commands", None)
+        if commands is not None:
+            return None, [self._encode(part) for part in commands]
+        device = command.device
+        name = self._names.get(id(device))
+        if name is None:
+            self._names = {id(d): n for n, d in self._devices.items()}
+            name = self._names.get(id(device))
+        return name, command.__class__.__name__
+
+    def _decode(self, device_name, command_name):
+        if isinstance(command_name, list):
+            return self._command_types["MacroCommand"]([self._decode(*part) for part in command_name])
+        return self._command_types[command_name](self._devices[device_name])
@@ -0,0 +1,61 @@
+# Типизированные события и рассылка по темам для SmartHomeMediator
+#
+# Подписка задается видом события и/или устройством (None - любые).
+# Подписчики хранятся в индексе по паре (kind, device), поэтому публикация
+# делает четыре поиска в словаре и обходит только подходящих подписчиков,
+# а не всех наблюдателей.
+
+EXECUTED = "executed"
+UNDONE = "undone"
+REDONE = "redone"
+ERROR = "error"
+STATE = "state"
+INFO = "info"
+
+
+class Event:
+    __slots__ = ("kind", "device", "message", "data")
+
+    def __init__(self, kind, device, message, data=None):
+        self.kind = kind
+        self.device = device
+        self.message = message
+        self.data = data
+
+    def __str__(self):
+        # Наблюдатели, которые ждут строку, получают текст сообщения
+        return self.message
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, {self.device!r}, {self.message!r})"
+
+
+class EventDispatcher:
+    def __init__(self):
+        self._topics = {}
+
+    def subscribe(self, observer, kind=None, device=None):
+        subscribers = self._topics.setdefault((kind, device), [])
+        if observer not in subscribers:
+            subscribers.append(observer)
+
+    def unsubscribe(self, observer, kind=None, device=None):
+        subscribers = self._topics.get((kind, device))
+        if subscribers and observer in subscribers:
+            subscribers.remove(observer)
+            if not subscribers:
+                del self._topics[(kind, device)]
+
+    def publish(self, event):
+        topics = self._topics
+        keys = dict.fromkeys(((event.kind, event.device), (event.kind, None),
+                              (None, event.device), (None, None)))
+        for key in keys:
+            subscribers = topics.get(key)
+            if subscribers:
+                # Копия списка: подписчик может отписаться прямо в update
+                for observer in tuple(subscribers):
+                    observer.update(event)
+
+    def subscriber_count(self):
+        return sum(len(subscribers) for subscribers in self._topics.values())
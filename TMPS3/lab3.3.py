@@ -1,182 +1,56 @@
+import os
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel
-from PyQt5.QtCore import Qt
-
-# Паттерн Mediator: Центральный контроллер для координации устройств
-class SmartHomeMediator:
-    def __init__(self):
-        self.devices = {}
-        self.observers = []
-        self.command_history = []  # История для отмены команд
-
-    def register_device(self, device_name, device):
-        self.devices[device_name] = device
-
-    def add_observer(self, observer):
-        self.observers.append(observer)
-
-    def notify_observers(self, message):
-        for observer in self.observers:
-            observer.update(message)
-
-    def execute_command(self, command):
-        command.execute()
-        self.command_history.append(command)  # Сохраняем команду в историю
-        self.notify_observers(f"Команда выполнена: {command.__class__.__name__}")
-
-    def undo_last_command(self):
-        if self.command_history:
-            command = self.command_history.pop()  # Удаляем последнюю команду
-            command.undo()
-            self.notify_observers(f"Команда отменена: {command.__class__.__name__}")
-        else:
-            self.notify_observers("Нет команд для отмены")
-
-# Паттерн Observer: Интерфейс для наблюдения за изменениями
-class Observer:
-    def update(self, message):
-        pass
-
-# Паттерн Command: Абстрактный класс команды
-class Command:
-    def execute(self):
-        pass
-
-    def undo(self):
-        pass
-
-# Конкретные команды для устройств
-class LightOnCommand(Command):
-    def __init__(self, light):
-        self.light = light
-
-    def execute(self):
-        self.light.turn_on()
-
-    def undo(self):
-        self.light.turn_off()
-
-class LightOffCommand(Command):
-    def __init__(self, light):
-        self.light = light
-
-    def execute(self):
-        self.light.turn_off()
-
-    def undo(self):
-        self.light.turn_on()
-
-class MusicPlayCommand(Command):
-    def __init__(self, music_player):
-        self.music_player = music_player
-
-    def execute(self):
-        self.music_player.play()
-
-    def undo(self):
-        self.music_player.pause()
-
-class MusicPauseCommand(Command):
-    def __init__(self, music_player):
-        self.music_player = music_player
-
-    def execute(self):
-        self.music_player.pause()
-
-    def undo(self):
-        self.music_player.play()
-
-# Паттерн Strategy: Стратегии управления температурой
-class TemperatureStrategy:
-    def adjust_temperature(self, current_temp):
-        pass
-
-class EcoTemperatureStrategy(TemperatureStrategy):
-    def adjust_temperature(self, current_temp):
-        return max(18, current_temp - 1)  # Экономичный режим: минимальная температура 18°C
-
-class ComfortTemperatureStrategy(TemperatureStrategy):
-    def adjust_temperature(self, current_temp):
-        return 22  # Комфортный режим: всегда 22°C
-
-class NightTemperatureStrategy(TemperatureStrategy):
-    def adjust_temperature(self, current_temp):
-        return 16  # Ночной режим: температура 16°C для экономии энергии
-
-# Паттерн State: Состояния охранной системы
-class SecurityState:
-    def handle(self, security_system):
-        pass
-
-class ArmedState(SecurityState):
-    def handle(self, security_system):
-        return "Охранная система включена"
-
-class DisarmedState(SecurityState):
-    def handle(self, security_system):
-        return "Охранная система выключена"
-
-# Устройства умного дома
-class Light:
-    def __init__(self, name):
-        self.name = name
-        self.is_on = False
-
-    def turn_on(self):
-        self.is_on = True
-        return f"{self.name} включен"
-
-    def turn_off(self):
-        self.is_on = False
-        return f"{self.name} выключен"
-
-class Thermostat:
-    def __init__(self, name):
-        self.name = name
-        self.temperature = 20
-        self.strategy = EcoTemperatureStrategy()
-
-    def set_strategy(self, strategy):
-        self.strategy = strategy
-
-    def adjust_temperature(self):
-        self.temperature = self.strategy.adjust_temperature(self.temperature)
-        return f"{self.name}: Температура установлена на {self.temperature}°C"
-
-class SecuritySystem:
-    def __init__(self, name):
-        self.name = name
-        self.state = DisarmedState()
-
-    def change_state(self, state):
-        self.state = state
-        return self.state.handle(self)
-
-class MusicPlayer:
-    def __init__(self, name):
-        self.name = name
-        self.is_playing = False
-
-    def play(self):
-        self.is_playing = True
-        return f"{self.name} воспроизводит музыку"
-
-    def pause(self):
-        self.is_playing = False
-        return f"{self.name} на паузе"
+from datetime import datetime
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel, QShortcut
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QKeySequence
+
+from command_bus import CommandBus
+from command_coalescer import CommandCoalescer
+from command_history import CommandHistory
+from rule_engine import RuleEngine
+from smart_home import (
+    SmartHomeMediator, Observer, LightOnCommand, LightOffCommand,
+    MusicPlayCommand, MusicPauseCommand, MacroCommand, COMMAND_TYPES,
+    EcoTemperatureStrategy, ComfortTemperatureStrategy, NightTemperatureStrategy,
+    ArmedState, DisarmedState, Light, Thermostat, SecuritySystem, MusicPlayer, default_rules,
+)
+from telemetry import Telemetry
+
+try:
+    import instrumentation
+except ImportError:
+    # Общий модуль инструментирования лежит в корне репозитория
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import instrumentation
 
 # Графический интерфейс (PyQt5) и реализация Observer
 class SmartHomeUI(QMainWindow, Observer):
+    # Результаты из потоков CommandBus доставляются в UI-поток через сигнал
+    command_done = pyqtSignal(object, str, object)
+    FRAME_MS = 16
+
     def __init__(self, mediator):
         super().__init__()
+        self._last_event = None
+        self._render_scheduled = False
         self.mediator = mediator
         self.mediator.add_observer(self)
+        self.command_done.connect(instrumentation.timed("smart_home.command_finished",
+                                                        self.mediator.command_finished), Qt.QueuedConnection)
+        # Частые нажатия сливаются: сброс раз в окно и всегда в UI-потоке
+        self.coalescer = CommandCoalescer(
+            self.mediator.submit_command, MacroCommand, window=0.3,
+            schedule=lambda delay, callback: QTimer.singleShot(int(delay * 1000), callback))
         self.init_ui()
 
     def init_ui(self):
         self.setWindowTitle("Система умного дома")
         self.setGeometry(100, 100, 400, 600)
 
+        # F12 - запуск и остановка семплирующего профилировщика
+        QShortcut(QKeySequence("F12"), self, activated=instrumentation.toggle_sampling)
+
         # Создаем центральный виджет и компоновку
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -188,14 +62,19 @@ class SmartHomeUI(QMainWindow, Observer):
 
         # Кнопка для отмены последней команды
         undo_btn = QPushButton("Отменить последнюю команду")
-        undo_btn.clicked.connect(self.mediator.undo_last_command)
+        self._on_click(undo_btn, "smart_home.undo", lambda: self.mediator.undo_last_command())
         layout.addWidget(undo_btn)
 
+        # Кнопка для повтора отмененной команды
+        redo_btn = QPushButton("Повторить отмененную команду")
+        self._on_click(redo_btn, "smart_home.redo", lambda: self.mediator.redo_last_command())
+        layout.addWidget(redo_btn)
+
         # Кнопки для управления светом
         light_on_btn = QPushButton("Включить свет")
         light_off_btn = QPushButton("Выключить свет")
-        light_on_btn.clicked.connect(lambda: self.mediator.execute_command(LightOnCommand(self.mediator.devices["light"])))
-        light_off_btn.clicked.connect(lambda: self.mediator.execute_command(LightOffCommand(self.mediator.devices["light"])))
+        self._on_click(light_on_btn, "smart_home.light_on", lambda: self.coalescer.submit(LightOnCommand(self.mediator.devices["light"])))
+        self._on_click(light_off_btn, "smart_home.light_off", lambda: self.coalescer.submit(LightOffCommand(self.mediator.devices["light"])))
         layout.addWidget(light_on_btn)
         layout.addWidget(light_off_btn)
 
@@ -203,9 +82,9 @@ class SmartHomeUI(QMainWindow, Observer):
         eco_btn = QPushButton("Экономичный режим термостата")
         comfort_btn = QPushButton("Комфортный режим термостата")
         night_btn = QPushButton("Ночной режим термостата")
-        eco_btn.clicked.connect(lambda: self.mediator.devices["thermostat"].set_strategy(EcoTemperatureStrategy()) or self.mediator.notify_observers(self.mediator.devices["thermostat"].adjust_temperature()))
-        comfort_btn.clicked.connect(lambda: self.mediator.devices["thermostat"].set_strategy(ComfortTemperatureStrategy()) or self.mediator.notify_observers(self.mediator.devices["thermostat"].adjust_temperature()))
-        night_btn.clicked.connect(lambda: self.mediator.devices["thermostat"].set_strategy(NightTemperatureStrategy()) or self.mediator.notify_observers(self.mediator.devices["thermostat"].adjust_temperature()))
+        self._on_click(eco_btn, "smart_home.thermostat_eco", lambda: self.mediator.set_thermostat_strategy(EcoTemperatureStrategy()))
+        self._on_click(comfort_btn, "smart_home.thermostat_comfort", lambda: self.mediator.set_thermostat_strategy(ComfortTemperatureStrategy()))
+        self._on_click(night_btn, "smart_home.thermostat_night", lambda: self.mediator.set_thermostat_strategy(NightTemperatureStrategy()))
         layout.addWidget(eco_btn)
         layout.addWidget(comfort_btn)
         layout.addWidget(night_btn)
@@ -213,24 +92,46 @@ class SmartHomeUI(QMainWindow, Observer):
         # Кнопки для управления охранной системой
         arm_btn = QPushButton("Включить охрану")
         disarm_btn = QPushButton("Выключить охрану")
-        arm_btn.clicked.connect(lambda: self.mediator.notify_observers(self.mediator.devices["security"].change_state(ArmedState())))
-        disarm_btn.clicked.connect(lambda: self.mediator.notify_observers(self.mediator.devices["security"].change_state(DisarmedState())))
+        self._on_click(arm_btn, "smart_home.security_arm", lambda: self.mediator.set_security_state(ArmedState()))
+        self._on_click(disarm_btn, "smart_home.security_disarm", lambda: self.mediator.set_security_state(DisarmedState()))
         layout.addWidget(arm_btn)
         layout.addWidget(disarm_btn)
 
         # Кнопки для управления музыкой
         play_btn = QPushButton("Включить музыку")
         pause_btn = QPushButton("Пауза музыки")
-        play_btn.clicked.connect(lambda: self.mediator.execute_command(MusicPlayCommand(self.mediator.devices["music"])))
-        pause_btn.clicked.connect(lambda: self.mediator.execute_command(MusicPauseCommand(self.mediator.devices["music"])))
+        self._on_click(play_btn, "smart_home.music_play", lambda: self.coalescer.submit(MusicPlayCommand(self.mediator.devices["music"])))
+        self._on_click(pause_btn, "smart_home.music_pause", lambda: self.coalescer.submit(MusicPauseCommand(self.mediator.devices["music"])))
         layout.addWidget(play_btn)
         layout.addWidget(pause_btn)
 
-    def update(self, message):
-        self.status_label.setText(f"Статус: {message}")
+        # Сценарий: несколько команд одним пакетом, отменяется одним нажатием
+        all_off_btn = QPushButton("Выключить всё")
+        self._on_click(all_off_btn, "smart_home.all_off", lambda: self.mediator.submit_command(MacroCommand([
+            LightOffCommand(self.mediator.devices["light"]),
+            MusicPauseCommand(self.mediator.devices["music"])])))
+        layout.addWidget(all_off_btn)
+
+    def _on_click(self, button, name, slot):
+        # Слот с замером времени; лямбда-обертка, чтобы Qt не передавал checked
+        slot = instrumentation.timed(name, slot)
+        button.clicked.connect(lambda: slot())
+
+    def update(self, event):
+        # Метка обновляется не чаще раза за кадр: между кадрами
+        # запоминается только последнее событие
+        self._last_event = event
+        if not self._render_scheduled:
+            self._render_scheduled = True
+            QTimer.singleShot(self.FRAME_MS, self._render_status)
+
+    def _render_status(self):
+        self._render_scheduled = False
+        self.status_label.setText(f"Статус: {self._last_event}")
 
 # Основная функция для запуска приложения
 def main():
+    instrumentation.configure_from_env()
     app = QApplication(sys.argv)
     
     # Создаем устройства
@@ -240,17 +141,49 @@ def main():
     music_player = MusicPlayer("Музыкальный плеер")
 
     # Создаем медиатор и регистрируем устройства
-    mediator = SmartHomeMediator()
+    history = CommandHistory("history")
+    mediator = SmartHomeMediator(history)
     mediator.register_device("light", light)
     mediator.register_device("thermostat", thermostat)
     mediator.register_device("security", security)
     mediator.register_device("music", music_player)
 
+    # Восстанавливаем состояние устройств и историю с прошлого запуска
+    history.recover(mediator.devices, COMMAND_TYPES)
+
+    # Движок правил: начальные факты и проверка времени раз в минуту
+    rule_engine = RuleEngine(mediator)
+    for name in mediator.devices:
+        rule_engine.refresh_device(name)
+    rule_engine.tick(datetime.now())
+    for rule in default_rules():
+        rule_engine.add_rule(rule)
+    clock = QTimer()
+    clock.timeout.connect(lambda: rule_engine.tick(datetime.now()))
+    clock.start(60 * 1000)
+
+    # Телеметрия: начальное состояние устройств и сброс на диск раз в 10 секунд
+    telemetry = Telemetry("telemetry.db", mediator)
+    for name, device in mediator.devices.items():
+        telemetry.record_state(name, device.get_state())
+    telemetry_timer = QTimer()
+    telemetry_timer.timeout.connect(telemetry.flush)
+    telemetry_timer.start(10 * 1000)
+
     # Создаем и показываем интерфейс
     ui = SmartHomeUI(mediator)
     ui.show()
 
-    sys.exit(app.exec_())
+    # Подключаем асинхронную шину команд
+    command_bus = CommandBus(on_done=ui.command_done.emit)
+    mediator.set_command_bus(command_bus)
+
+    exit_code = app.exec_()
+    command_bus.shutdown()
+    history.snapshot()
+    history.close()
+    telemetry.close()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import operator
+from collections import deque
+
+from event_dispatcher import EXECUTED, UNDONE, REDONE, STATE
+
+# Движок правил автоматизации поверх SmartHomeMediator
+#
+# Факты - плоский словарь вида {"thermostat.temperature": 21,
+# "security.state": "ArmedState", "time.hour": 23}. Правило - набор условий
+# над фактами (все должны выполняться) и действие. Как в альфа-сети Rete,
+# условия проиндексированы по факту, который читают, а каждое правило
+# хранит число выполненных условий. При изменении факта пересчитываются
+# только условия над этим фактом, поэтому стоимость события не зависит от
+# общего числа правил. Правило срабатывает на переходе «ложь -> истина».
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, options: value in options,
+}
+
+
+class Condition:
+    __slots__ = ("fact", "op", "value", "rule", "satisfied", "_test")
+
+    def __init__(self, fact, op, value):
+        self.fact = fact
+        self.op = op
+        self.value = value
+        self.rule = None
+        self.satisfied = False
+        self._test = OPERATORS[op]
+
+    def evaluate(self, facts):
+        if self.fact not in facts:
+            return False
+        try:
+            return bool(self._test(facts[self.fact], self.value))
+        except TypeError:
+            return False
+
+
+class Rule:
+    def __init__(self, name, conditions, action):
+        # action(mediator) выполняется при срабатывании правила
+        self.name = name
+        self.conditions = list(conditions)
+        self.action = action
+        self.satisfied = 0
+        self.fired = 0
+
+    @property
+    def active(self):
+        return self.satisfied == len(self.conditions)
+
+
+class RuleEngine:
+    def __init__(self, mediator=None):
+        self.mediator = mediator
+        self.facts = {}
+        self.rules = {}
+        self.evaluations = 0
+        self._index = {}  # факт -> условия, которые его читают
+        self._changes = deque()
+        self._processing = False
+        if mediator is not None:
+            # Подписка только на события, после которых меняется состояние устройств
+            for kind in (EXECUTED, UNDONE, REDONE, STATE):
+                mediator.add_observer(self, kind)
+
+    def add_rule(self, rule):
+        if rule.name in self.rules:
+            self.remove_rule(rule.name)
+        self.rules[rule.name] = rule
+        rule.satisfied = 0
+        for condition in rule.conditions:
+            condition.rule = rule
+            condition.satisfied = condition.evaluate(self.facts)
+            rule.satisfied += condition.satisfied
+            self._index.setdefault(condition.fact, []).append(condition)
+        # Правило, уже истинное в момент добавления, не срабатывает сразу
+        return rule
+
+    def remove_rule(self, name):
+        rule = self.rules.pop(name)
+        for condition in rule.conditions:
+            conditions = self._index[condition.fact]
+            conditions.remove(condition)
+            if not conditions:
+                del self._index[condition.fact]
+
+    def set_fact(self, fact, value):
+        if fact in self.facts and self.facts[fact] == value:
+            return
+        self.facts[fact] = value
+        self._changes.append(fact)
+        # Действия правил меняют факты; изменения обрабатываются очередью,
+        # а не рекурсией
+        if self._processing:
+            return
+        self._processing = True
+        try:
+            while self._changes:
+                self._propagate(self._changes.popleft())
+        finally:
+            self._processing = False
+
+    def set_facts(self, facts):
+        for fact, value in facts.items():
+            self.set_fact(fact, value)
+
+    def tick(self, now):
+        # Обновляет факты времени (вызывается таймером)
+        self.set_facts({"time.hour": now.hour, "time.minute": now.minute,
+                        "time.weekday": now.weekday()})
+
+    def update(self, event):
+        # Наблюдатель медиатора: после события перечитывает состояние устройств
+        commands = getattr(event.data, "commands", None)
+        if commands is not None:
+            for command in commands:
+                self.refresh_device(self.mediator.device_name(command.device))
+        elif event.device is not None:
+            self.refresh_device(event.device)
+
+    def refresh_device(self, name):
+        device = self.mediator.devices.get(name)
+        if device is None or not hasattr(device, "get_state"):
+            return
+        for field, value in device.get_state().items():
+            self.set_fact(f"{name}.{field}", value)
+
+    def _propagate(self, fact):
+        # Копия списка: действие правила может добавлять и удалять правила
+        for condition in tuple(self._index.get(fact, ())):
+            self.evaluations += 1
+            satisfied = condition.evaluate(self.facts)
+            if satisfied == condition.satisfied:
+                continue
+            condition.satisfied = satisfied
+            rule = condition.rule
+            was_active = rule.active
+            rule.satisfied += 1 if satisfied else -1
+            if rule.active and not was_active:
+                rule.fired += 1
+                rule.action(self.mediator)
+
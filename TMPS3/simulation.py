@@ -0,0 +1,163 @@
+import argparse
+import queue
+import random
+import time
+import tracemalloc
+
+import smart_home as home
+from command_bus import CommandBus
+from rule_engine import Condition, Rule, RuleEngine
+
+# Симуляция парка устройств без графического интерфейса
+#
+# Регистрирует в SmartHomeMediator десятки тысяч устройств, прогоняет через
+# него синтетический поток команд (синхронно или через CommandBus) и поток
+# событий состояния, и печатает пропускную способность, перцентили задержки
+# и память на одно устройство.
+# Запуск: python simulation.py --devices 20000 --commands 200000 --bus
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    samples = sorted(samples)
+    if not samples:
+        return {p: 0.0 for p in points}
+    return {p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] for p in points}
+
+
+class SmartHomeSimulation:
+    def __init__(self, seed=1):
+        self.rng = random.Random(seed)
+        self.mediator = home.SmartHomeMediator()
+        self.lights = []
+        self.players = []
+        self.thermostats = []
+        self.security = []
+        self.bytes_per_device = 0.0
+
+    def populate(self, count):
+        # Устройства по кругу: свет, музыка, термостат, охрана
+        kinds = [("light", home.Light, self.lights), ("music", home.MusicPlayer, self.players),
+                 ("thermostat", home.Thermostat, self.thermostats),
+                 ("security", home.SecuritySystem, self.security)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(count):
+            prefix, cls, bucket = kinds[i % len(kinds)]
+            name = f"{prefix}-{i}"
+            device = cls(name)
+            self.mediator.register_device(name, device)
+            bucket.append(device)
+        self.bytes_per_device = (tracemalloc.get_traced_memory()[0] - before) / max(count, 1)
+        tracemalloc.stop()
+
+    def make_command(self):
+        if self.rng.random() < 0.5:
+            light = self.rng.choice(self.lights)
+            return home.LightOffCommand(light) if light.is_on else home.LightOnCommand(light)
+        player = self.rng.choice(self.players)
+        return home.MusicPauseCommand(player) if player.is_playing else home.MusicPlayCommand(player)
+
+    def run_commands(self, count):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(count):
+            command = self.make_command()
+            t0 = time.perf_counter()
+            self.mediator.execute_command(command)
+            latencies.append(time.perf_counter() - t0)
+        return count / (time.perf_counter() - start), latencies
+
+    def run_commands_on_bus(self, count, workers, max_pending):
+        # Результаты из воркеров собираются в очередь и разбираются в главном
+        # потоке - так же, как их доставляет в UI-поток сигнал Qt
+        done = queue.SimpleQueue()
+        bus = CommandBus(lambda *result: done.put((time.perf_counter(),) + result),
+                                  workers=workers, max_pending=max_pending)
+        self.mediator.set_command_bus(bus)
+        submitted = {}
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(count):
+            command = self.make_command()
+            submitted[id(command)] = time.perf_counter()
+            bus.submit(command)
+            self._drain(done, submitted, latencies)
+        bus.join()
+        self._drain(done, submitted, latencies)
+        elapsed = time.perf_counter() - start
+        bus.shutdown()
+        self.mediator.set_command_bus(None)
+        return count / elapsed, latencies
+
+    def _drain(self, done, submitted, latencies):
+        while True:
+            try:
+                finished_at, command, action, error = done.get_nowait()
+            except queue.Empty:
+                return
+            latencies.append(finished_at - submitted.pop(id(command)))
+            self.mediator.command_finished(command, action, error)
+
+    def run_events(self, count):
+        # Поток событий состояния: смены стратегий термостатов и режимов охраны
+        strategies = [home.EcoTemperatureStrategy(), home.ComfortTemperatureStrategy(),
+                      home.NightTemperatureStrategy()]
+        states = [home.ArmedState(), home.DisarmedState()]
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            if self.rng.random() < 0.7:
+                device = self.rng.choice(self.thermostats)
+                self.mediator.set_thermostat_strategy(self.rng.choice(strategies), device.name)
+            else:
+                device = self.rng.choice(self.security)
+                self.mediator.set_security_state(self.rng.choice(states), device.name)
+            latencies.append(time.perf_counter() - t0)
+        return count / (time.perf_counter() - start), latencies
+
+    def add_rules(self, count):
+        # Правила по одному на термостат: реагируют только на «свое» устройство
+        engine = RuleEngine(self.mediator)
+        eco = home.EcoTemperatureStrategy()
+        for i in range(count):
+            thermostat = self.thermostats[i % len(self.thermostats)]
+            engine.add_rule(Rule(f"rule-{i}", [
+                Condition(f"{thermostat.name}.temperature", ">", 21),
+            ], lambda mediator, name=thermostat.name: mediator.set_thermostat_strategy(eco, name)))
+        return engine
+
+
+def report(title, rate, latencies):
+    p = percentiles(latencies)
+    print(f"{title:<22}{rate:>12,.0f}/с   p50 {p[50] * 1e6:8.1f} мкс   "
+          f"p95 {p[95] * 1e6:8.1f} мкс   p99 {p[99] * 1e6:8.1f} мкс")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочная симуляция умного дома")
+    parser.add_argument("--devices", type=int, default=20000)
+    parser.add_argument("--commands", type=int, default=200000)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--rules", type=int, default=0)
+    parser.add_argument("--bus", action="store_true", help="выполнять команды через CommandBus")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    simulation = SmartHomeSimulation()
+    simulation.populate(args.devices)
+    print(f"Устройств: {args.devices}, память на устройство: {simulation.bytes_per_device:.0f} байт")
+    if args.rules:
+        simulation.add_rules(args.rules)
+        print(f"Правил: {args.rules}")
+
+    report("команды (синхронно)", *simulation.run_commands(args.commands))
+    if args.bus:
+        report(f"команды (шина x{args.workers})",
+               *simulation.run_commands_on_bus(args.commands, args.workers, args.max_pending))
+    report("события состояния", *simulation.run_events(args.events))
+
+
+if __name__ == "__main__":
+    main()
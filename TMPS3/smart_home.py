@@ -0,0 +1,380 @@
+from event_dispatcher import Event, EventDispatcher, EXECUTED, UNDONE, REDONE, ERROR, STATE, INFO
+from rule_engine import Condition, Rule
+
+# Предметная область умного дома: медиатор, команды, стратегии, состояния,
+# устройства и правила по умолчанию. Модуль не зависит от PyQt5, поэтому
+# его загружают симуляция, бенчмарки и воркеры без графического интерфейса;
+# интерфейс и запуск приложения - в lab3.3.py.
+
+# Паттерн Mediator: Центральный контроллер для координации устройств
+class SmartHomeMediator:
+    def __init__(self, command_history=None):
+        self.devices = {}
+        self.device_names = {}  # id(устройства) -> имя, под которым оно зарегистрировано
+        self.events = EventDispatcher()
+        # История для отмены и повтора команд (ограниченная, при желании на диске)
+        if command_history is None:
+            from command_history import CommandHistory
+            command_history = CommandHistory()
+        self.command_history = command_history
+        self.command_bus = None  # Асинхронная шина команд (если подключена)
+
+    def register_device(self, device_name, device):
+        self.devices[device_name] = device
+        self.device_names[id(device)] = device_name
+
+    def add_observer(self, observer, kind=None, device=None):
+        # Без kind и device наблюдатель получает все события
+        self.events.subscribe(observer, kind, device)
+
+    def remove_observer(self, observer, kind=None, device=None):
+        self.events.unsubscribe(observer, kind, device)
+
+    def notify_observers(self, message, kind=INFO, device=None, data=None):
+        self.events.publish(Event(kind, device, message, data))
+
+    def device_name(self, device):
+        return self.device_names.get(id(device))
+
+    def set_thermostat_strategy(self, strategy, device_name="thermostat"):
+        thermostat = self.devices[device_name]
+        thermostat.set_strategy(strategy)
+        message = thermostat.adjust_temperature()
+        # Изменение в обход команд тоже попадает в журнал истории
+        self.command_history.record_state(device_name, thermostat.get_state())
+        self.notify_observers(message, STATE, device_name)
+
+    def set_security_state(self, state, device_name="security"):
+        security = self.devices[device_name]
+        message = security.change_state(state)
+        self.command_history.record_state(device_name, security.get_state())
+        self.notify_observers(message, STATE, device_name)
+
+    def set_command_bus(self, command_bus):
+        self.command_bus = command_bus
+
+    def execute_command(self, command):
+        command.execute()
+        self.command_finished(command, "execute")
+
+    def submit_command(self, command):
+        # Без шины команда выполняется сразу, с шиной - в потоке воркера устройства
+        if self.command_bus is None:
+            self.execute_command(command)
+        elif not self.command_bus.submit(command, block=False):
+            self.notify_observers(f"Очередь команд переполнена: {command.__class__.__name__}",
+                                  ERROR, self.device_name(command.device), command)
+
+    def command_finished(self, command, action, error=None):
+        # Вызывается в UI-потоке после выполнения команды
+        name = command.__class__.__name__
+        device = self.device_name(command.device)
+        if error is not None:
+            # Неудавшиеся отмена и повтор возвращают команду на ее стек
+            if action == "undo":
+                self.command_history.unpop_undo(command)
+            elif action == "redo":
+                self.command_history.unpop_redo(command)
+            self.notify_observers(f"Ошибка команды {name}: {error}", ERROR, device, command)
+        elif action == "execute":
+            self.command_history.record(command)  # Сохраняем команду в историю
+            self.notify_observers(f"Команда выполнена: {name}", EXECUTED, device, command)
+        elif action == "undo":
+            self.command_history.undone(command)
+            self.notify_observers(f"Команда отменена: {name}", UNDONE, device, command)
+        else:
+            self.command_history.redone(command)
+            self.notify_observers(f"Команда повторена: {name}", REDONE, device, command)
+
+    def undo_last_command(self, steps=1):
+        for _ in range(steps):
+            command = self.command_history.pop_undo()  # Удаляем последнюю команду
+            if command is None:
+                self.notify_observers("Нет команд для отмены")
+                return
+            if not self._run_history_action(command, "undo"):
+                self.command_history.unpop_undo(command)
+                return
+
+    def redo_last_command(self, steps=1):
+        for _ in range(steps):
+            command = self.command_history.pop_redo()
+            if command is None:
+                self.notify_observers("Нет команд для повтора")
+                return
+            if not self._run_history_action(command, "redo"):
+                self.command_history.unpop_redo(command)
+                return
+
+    def _run_history_action(self, command, action):
+        # False - очередь отклонила команду, и ее надо вернуть в историю
+        if self.command_bus is None:
+            getattr(command, action)()
+            self.command_finished(command, action)
+            return True
+        # Отмена и повтор идут в ту же очередь устройства, что и выполнение
+        if not self.command_bus.submit(command, action, block=False):
+            self.notify_observers("Очередь команд переполнена", ERROR, self.device_name(command.device), command)
+            return False
+        return True
+
+# Паттерн Observer: Интерфейс для наблюдения за изменениями
+class Observer:
+    def update(self, event):
+        # event - Event; str(event) дает текст сообщения
+        pass
+
+# Паттерн Command: Абстрактный класс команды
+class Command:
+    device = None  # Устройство команды: определяет очередь в CommandBus
+
+    def execute(self):
+        pass
+
+    def undo(self):
+        pass
+
+    def redo(self):
+        self.execute()
+
+    def coalesce_key(self):
+        # Команды с одинаковым ключом сливаются в CommandCoalescer (None - не сливать)
+        return None
+
+    def target_state(self):
+        # Состояние, которое команда задает по своему coalesce_key (None - неизвестно)
+        return None
+
+    def is_noop(self):
+        # True, если устройство уже в том состоянии, которое задает команда
+        return False
+
+# Конкретные команды для устройств
+class LightOnCommand(Command):
+    def __init__(self, light):
+        self.light = self.device = light
+
+    def execute(self):
+        self.light.turn_on()
+
+    def undo(self):
+        self.light.turn_off()
+
+    def coalesce_key(self):
+        return (self.light, "power")
+
+    def target_state(self):
+        return True
+
+    def is_noop(self):
+        return self.light.is_on
+
+class LightOffCommand(Command):
+    def __init__(self, light):
+        self.light = self.device = light
+
+    def execute(self):
+        self.light.turn_off()
+
+    def undo(self):
+        self.light.turn_on()
+
+    def coalesce_key(self):
+        return (self.light, "power")
+
+    def target_state(self):
+        return False
+
+    def is_noop(self):
+        return not self.light.is_on
+
+class MusicPlayCommand(Command):
+    def __init__(self, music_player):
+        self.music_player = self.device = music_player
+
+    def execute(self):
+        self.music_player.play()
+
+    def undo(self):
+        self.music_player.pause()
+
+    def coalesce_key(self):
+        return (self.music_player, "playback")
+
+    def target_state(self):
+        return True
+
+    def is_noop(self):
+        return self.music_player.is_playing
+
+class MusicPauseCommand(Command):
+    def __init__(self, music_player):
+        self.music_player = self.device = music_player
+
+    def execute(self):
+        self.music_player.pause()
+
+    def undo(self):
+        self.music_player.play()
+
+    def coalesce_key(self):
+        return (self.music_player, "playback")
+
+    def target_state(self):
+        return False
+
+    def is_noop(self):
+        return not self.music_player.is_playing
+
+# Паттерн Composite + Command: пакет команд как одна команда (одна запись в истории)
+class MacroCommand(Command):
+    def __init__(self, commands):
+        self.commands = list(commands)
+        devices = {id(command.device) for command in self.commands}
+        self.device = self.commands[0].device if len(devices) == 1 else None
+
+    def execute(self):
+        for command in self.commands:
+            command.execute()
+
+    def undo(self):
+        for command in reversed(self.commands):
+            command.undo()
+
+# Типы команд по имени класса: по ним история восстанавливает журнал
+COMMAND_TYPES = {cls.__name__: cls for cls in (
+    LightOnCommand, LightOffCommand, MusicPlayCommand, MusicPauseCommand, MacroCommand)}
+
+# Паттерн Strategy: Стратегии управления температурой
+class TemperatureStrategy:
+    def adjust_temperature(self, current_temp):
+        pass
+
+class EcoTemperatureStrategy(TemperatureStrategy):
+    def adjust_temperature(self, current_temp):
+        return max(18, current_temp - 1)  # Экономичный режим: минимальная температура 18°C
+
+class ComfortTemperatureStrategy(TemperatureStrategy):
+    def adjust_temperature(self, current_temp):
+        return 22  # Комфортный режим: всегда 22°C
+
+class NightTemperatureStrategy(TemperatureStrategy):
+    def adjust_temperature(self, current_temp):
+        return 16  # Ночной режим: температура 16°C для экономии энергии
+
+TEMPERATURE_STRATEGIES = {cls.__name__: cls for cls in (
+    EcoTemperatureStrategy, ComfortTemperatureStrategy, NightTemperatureStrategy)}
+
+# Паттерн State: Состояния охранной системы
+class SecurityState:
+    def handle(self, security_system):
+        pass
+
+class ArmedState(SecurityState):
+    def handle(self, security_system):
+        return "Охранная система включена"
+
+class DisarmedState(SecurityState):
+    def handle(self, security_system):
+        return "Охранная система выключена"
+
+SECURITY_STATES = {cls.__name__: cls for cls in (ArmedState, DisarmedState)}
+
+# Устройства умного дома (__slots__: десятки тысяч устройств без __dict__ у каждого)
+class Light:
+    __slots__ = ("name", "is_on")
+
+    def __init__(self, name):
+        self.name = name
+        self.is_on = False
+
+    def get_state(self):
+        return {"is_on": self.is_on}
+
+    def set_state(self, state):
+        self.is_on = state["is_on"]
+
+    def turn_on(self):
+        self.is_on = True
+        return f"{self.name} включен"
+
+    def turn_off(self):
+        self.is_on = False
+        return f"{self.name} выключен"
+
+class Thermostat:
+    __slots__ = ("name", "temperature", "strategy")
+
+    def __init__(self, name):
+        self.name = name
+        self.temperature = 20
+        self.strategy = EcoTemperatureStrategy()
+
+    def set_strategy(self, strategy):
+        self.strategy = strategy
+
+    def get_state(self):
+        return {"temperature": self.temperature, "strategy": self.strategy.__class__.__name__}
+
+    def set_state(self, state):
+        self.temperature = state["temperature"]
+        self.strategy = TEMPERATURE_STRATEGIES[state["strategy"]]()
+
+    def adjust_temperature(self):
+        self.temperature = self.strategy.adjust_temperature(self.temperature)
+        return f"{self.name}: Температура установлена на {self.temperature}°C"
+
+class SecuritySystem:
+    __slots__ = ("name", "state")
+
+    def __init__(self, name):
+        self.name = name
+        self.state = DisarmedState()
+
+    def change_state(self, state):
+        self.state = state
+        return self.state.handle(self)
+
+    def get_state(self):
+        return {"state": self.state.__class__.__name__}
+
+    def set_state(self, state):
+        self.state = SECURITY_STATES[state["state"]]()
+
+class MusicPlayer:
+    __slots__ = ("name", "is_playing")
+
+    def __init__(self, name):
+        self.name = name
+        self.is_playing = False
+
+    def get_state(self):
+        return {"is_playing": self.is_playing}
+
+    def set_state(self, state):
+        self.is_playing = state["is_playing"]
+
+    def play(self):
+        self.is_playing = True
+        return f"{self.name} воспроизводит музыку"
+
+    def pause(self):
+        self.is_playing = False
+        return f"{self.name} на паузе"
+
+# Правила автоматизации по умолчанию
+def default_rules():
+    return [
+        Rule("Ночной режим после 23:00", [Condition("time.hour", ">=", 23)],
+             lambda mediator: mediator.set_thermostat_strategy(NightTemperatureStrategy())),
+        Rule("Комфорт утром", [Condition("time.hour", "==", 7),
+                               Condition("security.state", "==", "DisarmedState")],
+             lambda mediator: mediator.set_thermostat_strategy(ComfortTemperatureStrategy())),
+        Rule("Уход из дома", [Condition("security.state", "==", "ArmedState")],
+             lambda mediator: mediator.submit_command(MacroCommand([
+                 LightOffCommand(mediator.devices["light"]),
+                 MusicPauseCommand(mediator.devices["music"])]))),
+        Rule("Экономия под охраной", [Condition("security.state", "==", "ArmedState"),
+                                      Condition("thermostat.temperature", ">", 18)],
+             lambda mediator: mediator.set_thermostat_strategy(EcoTemperatureStrategy())),
+    ]
@@ -0,0 +1,223 @@
+import sqlite3
+import time
+from array import array
+from datetime import datetime
+
+from event_dispatcher import EXECUTED, UNDONE, REDONE, STATE
+
+# Телеметрия состояния устройств
+#
+# Каждое изменение числового (или логического) поля состояния устройства -
+# отсчет (ряд, время, значение). Ряд - пара (устройство, поле), ей выдается
+# целый номер. Отсчеты копятся в кольцевом буфере из array (три плоских
+# массива без объектов Python на отсчет) и пачками сбрасываются в SQLite.
+# При сбросе в памяти же считаются часовые и суточные агрегаты (count, sum,
+# min, max) и одним upsert добавляются в таблицы агрегатов, поэтому запросы
+# вида «средняя температура по часам за месяц» читают сотни строк агрегатов,
+# а не миллионы отсчетов.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    device TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    UNIQUE (device, metric)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    series INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_series_ts ON samples (series, ts);
+CREATE TABLE IF NOT EXISTS rollup_hour (
+    series INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (series, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_day (
+    series INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (series, bucket)
+) WITHOUT ROWID;
+"""
+
+ROLLUPS = {"hour": ("rollup_hour", 3600), "day": ("rollup_day", 86400)}
+
+UPSERT = """
+INSERT INTO {table} (series, bucket, count, sum, min, max) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (series, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+def _epoch(value):
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class Telemetry:
+    def __init__(self, path=None, mediator=None, capacity=65536, flush_size=8192):
+        # Без path хранится только кольцевой буфер последних capacity отсчетов
+        self.capacity = capacity
+        self.flush_size = min(flush_size, capacity)
+        self._series = array("I", bytes(4 * capacity))
+        self._ts = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._head = 0      # Куда пишется следующий отсчет
+        self._size = 0      # Сколько отсчетов в буфере
+        self._unflushed = 0
+        self.dropped = 0
+        self._series_ids = {}
+        self._series_names = {}
+        self.conn = None
+        if path is not None:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            for series_id, device, metric in self.conn.execute("SELECT id, device, metric FROM series"):
+                self._series_ids[(device, metric)] = series_id
+                self._series_names[series_id] = (device, metric)
+        self.mediator = mediator
+        if mediator is not None:
+            for kind in (EXECUTED, UNDONE, REDONE, STATE):
+                mediator.add_observer(self, kind)
+
+    # Запись
+
+    def record(self, device, metric, value, ts=None):
+        series = self._series_id(device, metric)
+        head = self._head
+        self._series[head] = series
+        self._ts[head] = time.time() if ts is None else ts
+        self._values[head] = value
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        if self.conn is None:
+            return
+        if self._unflushed == self.capacity:
+            self.dropped += 1  # Старейший несохраненный отсчет затерт
+        else:
+            self._unflushed += 1
+        if self._unflushed >= self.flush_size:
+            self.flush()
+
+    def record_state(self, device, state, ts=None):
+        for metric, value in state.items():
+            if isinstance(value, (bool, int, float)):
+                self.record(device, metric, float(value), ts)
+
+    def update(self, event):
+        # Наблюдатель медиатора: снимает состояние устройств после событий
+        commands = getattr(event.data, "commands", None)
+        names = ([self.mediator.device_name(command.device) for command in commands]
+                 if commands is not None else [event.device])
+        for name in names:
+            device = self.mediator.devices.get(name)
+            if device is not None and hasattr(device, "get_state"):
+                self.record_state(name, device.get_state())
+
+    def flush(self):
+        if self.conn is None or not self._unflushed:
+            return 0
+        count = self._unflushed
+        start = (self._head - count) % self.capacity
+        rows = []
+        rollups = {name: {} for name in ROLLUPS}
+        for i in range(count):
+            pos = (start + i) % self.capacity
+            series, ts, value = self._series[pos], self._ts[pos], self._values[pos]
+            rows.append((series, ts, value))
+            for name, (_, width) in ROLLUPS.items():
+                key = (series, int(ts // width))
+                agg = rollups[name].get(key)
+                if agg is None:
+                    rollups[name][key] = [1, value, value, value]
+                else:
+                    agg[0] += 1
+                    agg[1] += value
+                    if value < agg[2]:
+                        agg[2] = value
+                    if value > agg[3]:
+                        agg[3] = value
+        with self.conn:
+            self.conn.executemany("INSERT INTO samples (series, ts, value) VALUES (?, ?, ?)", rows)
+            for name, (table, _) in ROLLUPS.items():
+                self.conn.executemany(UPSERT.format(table=table),
+                                      [key + tuple(agg) for key, agg in rollups[name].items()])
+        self._unflushed = 0
+        return count
+
+    def prune_samples(self, before):
+        # Удаляет сырые отсчеты старше before; агрегаты остаются
+        with self.conn:
+            self.conn.execute("DELETE FROM samples WHERE ts < ?", (_epoch(before),))
+
+    def close(self):
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+    # Запросы
+
+    def rollup(self, device, metric, start, end, resolution="hour"):
+        # [(начало интервала, среднее, минимум, максимум, число отсчетов)]
+        self.flush()
+        series = self._series_ids.get((device, metric))
+        if series is None:
+            return []
+        table, width = ROLLUPS[resolution]
+        rows = self.conn.execute(
+            f"SELECT bucket, sum / count, min, max, count FROM {table} "
+            "WHERE series = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+            (series, int(_epoch(start) // width), int(_epoch(end) // width)))
+        return [(datetime.fromtimestamp(bucket * width), avg, low, high, count)
+                for bucket, avg, low, high, count in rows]
+
+    def samples(self, device, metric, start, end):
+        self.flush()
+        series = self._series_ids.get((device, metric))
+        if series is None:
+            return []
+        return self.conn.execute(
+            "SELECT ts, value FROM samples WHERE series = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (series, _epoch(start), _epoch(end))).fetchall()
+
+    def recent(self, device, metric, limit=100):
+        # Последние отсчеты ряда прямо из кольцевого буфера
+        series = self._series_ids.get((device, metric))
+        result = []
+        for i in range(1, self._size + 1):
+            pos = (self._head - i) % self.capacity
+            if self._series[pos] == series:
+                result.append((self._ts[pos], self._values[pos]))
+                if len(result) == limit:
+                    break
+        result.reverse()
+        return result
+
+    def _series_id(self, device, metric):
+        key = (device, metric)
+        series = self._series_ids.get(key)
+        if series is None:
+            if self.conn is not None:
+                with self.conn:
+                    series = self.conn.execute("INSERT INTO series (device, metric) VALUES (?, ?)",
+                                               key).lastrowid
+            else:
+                series = len(self._series_ids) + 1
+            self._series_ids[key] = series
+            self._series_names[series] = key
+        return series
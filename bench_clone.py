@@ -0,0 +1,42 @@
+import sys
+import time
+import tracemalloc
+
+from task_models import TaskBuilder, TaskFactory, ProjectFactory, TaskPrototype
+
+# Скорость клонирования задач и память на задачу
+# Запуск: python bench_clone.py [число_клонов]
+
+
+def make_task():
+    task = TaskFactory().create_task("urgent", "Prepare quarterly report")
+    project_task = ProjectFactory().create_task("work", "Prepare quarterly report")
+    task_data = (TaskBuilder().set_description("Prepare quarterly report")
+                 .set_deadline("2026-12-31").set_tags(["work", "report", "q4"]).build())
+    return (task, project_task, task_data)
+
+
+def measure(name, make_clones, count):
+    start = time.perf_counter()
+    make_clones(count)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clones = make_clones(count)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del clones
+    print(f"{name:<28}{count / elapsed:>14,.0f} клонов/с{size / count:>10.0f} байт/задачу")
+
+
+def main(count=100000):
+    prototype = TaskPrototype(make_task())
+    print(f"{count} клонов")
+    measure("deepcopy (было)", lambda n: [prototype.clone(deep=True) for _ in range(n)], count)
+    measure("clone() с общими полями", lambda n: [prototype.clone() for _ in range(n)], count)
+    measure("clone_many()", prototype.clone_many, count)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+from harness import Skip, add_project_path, benchmark
+
+add_project_path("booking_hotel")
+
+FORM = {"room_type": "Standard", "tariff": "Flexible", "currency": "USD", "group_size": "2",
+        "minibar": "on", "breakfast": "on"}
+
+
+@benchmark("booking.core_pipeline", unit="бронирование")
+def core_pipeline():
+    # Путь book() без Flask и базы: фабрики, сборщик, тариф, клоны, декораторы, оплата
+    from booking_core import (BookingBuilder, BookingPrototype, FlexibleTariff,
+                              HotelComplexFactory, MiniBarDecorator, PaymentAdapter,
+                              RoomFactory, USDProcessor)
+
+    def book():
+        room = RoomFactory.create_room("Luxury")
+        hotel = HotelComplexFactory.create_hotel("Resort")
+        package = BookingBuilder().set_room(room).set_hotel_services(hotel).add_breakfast().build()
+        price = FlexibleTariff().calculate_price(room.get_base_price(), 5)
+        bookings = [MiniBarDecorator(booking)
+                    for booking in (BookingPrototype(package, "2026-07-01", "2026-07-06", price).clone()
+                                    for _ in range(2))]
+        PaymentAdapter(USDProcessor()).process_payment(sum(b.price for b in bookings), "USD")
+        return bookings
+    return book
+
+
+@benchmark("booking.book_http", unit="запрос")
+def book_http():
+    # POST /book через тестовый клиент Flask с базой во временном каталоге
+    try:
+        import hotel_booking_system as web
+    except ImportError as e:
+        raise Skip(f"нет зависимости: {e.name}")
+    from admission import RateLimiter
+
+    web.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_booking_"), "bookings.db")
+    web.init_db()
+    web.rate_table.capacity["Standard"] = 10 ** 9
+    # Все запросы идут от одного клиента и без ключа идемпотентности
+    web.rate_limiter = RateLimiter(rate=10 ** 9, burst=10 ** 9)
+    # Без cookie: иначе flash-сообщения копятся в сессии и каждый запрос тяжелее предыдущего
+    client = web.app.test_client(use_cookies=False)
+    url = "/book/City/Bench?check_in=2026-07-01&check_out=2026-07-06"
+
+    def book():
+        response = client.post(url, data=FORM)
+        assert response.status_code == 302, response.status_code
+    return book
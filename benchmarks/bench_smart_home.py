@@ -0,0 +1,62 @@
+import itertools
+
+from harness import add_project_path, benchmark
+
+add_project_path("TMPS3")
+
+
+def _home(devices=4):
+    import smart_home as home
+    mediator = home.SmartHomeMediator()
+    lights = []
+    for i in range(devices):
+        light = home.Light(f"light-{i}")
+        mediator.register_device(f"light-{i}", light)
+        lights.append(light)
+    return home, mediator, lights
+
+
+@benchmark("smart_home.execute_command", unit="команда")
+def execute_command():
+    home, mediator, lights = _home()
+    light = lights[0]
+
+    def toggle():
+        command = home.LightOffCommand(light) if light.is_on else home.LightOnCommand(light)
+        mediator.execute_command(command)
+    return toggle
+
+
+@benchmark("smart_home.execute_command_20k_devices", unit="команда")
+def execute_command_many_devices():
+    # Та же команда, но в доме 20 000 устройств и 1 000 наблюдателей на чужих устройствах
+    home, mediator, lights = _home(20000)
+
+    class Counter:
+        def __init__(self):
+            self.events = 0
+
+        def update(self, event):
+            self.events += 1
+
+    for i in range(1000):
+        mediator.add_observer(Counter(), device=f"light-{i + 1}")
+    cycle = itertools.cycle(lights[1000:])
+
+    def toggle():
+        light = next(cycle)
+        command = home.LightOffCommand(light) if light.is_on else home.LightOnCommand(light)
+        mediator.execute_command(command)
+    return toggle
+
+
+@benchmark("smart_home.undo_redo", unit="пара")
+def undo_redo():
+    home, mediator, lights = _home()
+    for light in lights:
+        mediator.execute_command(home.LightOnCommand(light))
+
+    def undo_redo():
+        mediator.undo_last_command()
+        mediator.redo_last_command()
+    return undo_redo
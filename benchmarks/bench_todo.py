@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+from harness import add_project_path, benchmark
+
+add_project_path()
+
+
+def _task():
+    from task_models import ProjectFactory, TaskBuilder, TaskFactory
+    description = "Prepare quarterly report"
+    return (TaskFactory().create_task("urgent", description),
+            ProjectFactory().create_task("work", description),
+            TaskBuilder().set_description(description).set_deadline("2026-12-31")
+            .set_tags(["work", "report", "q4"]).build())
+
+
+@benchmark("todo.clone", unit="клон")
+def clone():
+    from task_models import TaskPrototype
+    return TaskPrototype(_task()).clone
+
+
+@benchmark("todo.clone_many_10k", unit="10k клонов")
+def clone_many():
+    from task_models import TaskPrototype
+    prototype = TaskPrototype(_task())
+    return lambda: prototype.clone_many(10000)
+
+
+@benchmark("todo.store_add_delete_1k", unit="1k задач")
+def store_add_delete():
+    # 1 000 задач одной пачкой в хранилище на 100 000 задач, затем удаление по одной
+    from task_store import TaskStore
+    store = TaskStore(os.path.join(tempfile.mkdtemp(prefix="bench_todo_"), "tasks.db"))
+    task, project_task, task_data = _task()
+    row = (task.task_type, project_task.project_type, task_data)
+    store.add_many([row] * 100000)
+
+    def add_delete():
+        for task_id in store.add_many([row] * 1000):
+            store.delete(task_id)
+    return add_delete
+
+
+@benchmark("todo.search_typing_100k", unit="10 нажатий")
+def search_keystroke():
+    # Набор запроса по буквам в индексе на 100 000 задач
+    from task_search import TaskSearchIndex
+    words = ["report", "review", "call", "buy", "fix", "plan", "budget", "release"]
+    index = TaskSearchIndex()
+    index.add_many((i, f"{words[i % 8]} {words[i * 7 % 8]} item {i}", ["q%d" % (i % 4)])
+                   for i in range(100000))
+    query = "review bud"
+    prefixes = [query[:n] for n in range(1, len(query) + 1)]
+
+    def type_query():
+        for prefix in prefixes:
+            index.search(prefix)
+        index.search("")
+    return type_query
@@ -0,0 +1,99 @@
+import itertools
+from datetime import datetime
+
+from harness import add_project_path, benchmark
+
+add_project_path("TMPS2")
+
+
+@benchmark("travel.plan_trip_7d", unit="поездка")
+def plan_trip():
+    from travel_planner import TravelPlannerFacade
+    facade = TravelPlannerFacade()
+    seeds = itertools.count()
+    start = datetime(2026, 7, 1)
+    return lambda: facade.plan_trip("Париж", start, 7, seed=next(seeds))
+
+
+@benchmark("travel.plan_trip_90d", unit="поездка")
+def plan_trip_long():
+    from travel_planner import TravelPlannerFacade
+    facade = TravelPlannerFacade()
+    seeds = itertools.count()
+    start = datetime(2026, 7, 1)
+    return lambda: facade.plan_trip("Рим", start, 90, seed=next(seeds))
+
+
+@benchmark("travel.activity_cost_update", unit="изменение")
+def activity_cost_update():
+    # Изменение стоимости активности в большом плане (дельта идет вверх по дереву)
+    from travel_planner import Activity, DayPlan, TripPlan
+    trip = TripPlan("Париж")
+    activities = []
+    for day in range(365):
+        plan = DayPlan(f"День {day + 1}", "")
+        for i in range(20):
+            activity = Activity(f"Активность {i}", i, "10:00-11:00")
+            plan.add(activity)
+            activities.append(activity)
+        trip.add_day(plan)
+    counter = itertools.count()
+
+    def update():
+        n = next(counter)
+        activities[n % len(activities)].cost = n % 100
+        return trip.get_cost()
+    return update
+
+
+@benchmark("travel.route_2k_airports_200k_legs", unit="маршрут")
+def route_query():
+    # Поиск маршрута без кэша по синтетическому набору из 2000 городов и 200 тыс. рейсов
+    import random
+    import tempfile
+    from flight_graph import FlightGraph, generate_dataset
+    directory = generate_dataset(tempfile.mkdtemp(prefix="bench_flights_"), 2000, 200000)
+    graph = FlightGraph.from_dataset(directory, cache_size=0)
+    rng = random.Random(1)
+    cities = sorted(graph.cities)
+    pairs = itertools.cycle([rng.sample(cities, 2) for _ in range(1000)])
+
+    def route():
+        origin, destination = next(pairs)
+        return graph.route(origin, destination)
+    return route
+
+
+class _FareProvider:
+    """Адаптеры перелетов и отелей с ценами, меняющимися по датам"""
+
+    def __init__(self, destinations, days, start, seed=1):
+        import random
+        rng = random.Random(seed)
+        self.start = start
+        self.flights = {(city, day): rng.randrange(80, 600) for city in destinations for day in range(days)}
+        self.hotels = {(city, day): rng.randrange(40, 300) for city in destinations for day in range(days)}
+
+    def search_flights(self, origin, destination, date):
+        city = destination if (destination, 0) in self.flights else origin
+        return [{"price": self.flights[city, (date - self.start).days]}]
+
+    def search_hotels(self, destination, dates):
+        return [{"price": self.hotels[destination, (dates[0] - self.start).days]}]
+
+
+@benchmark("travel.fare_calendar_90d_200_cities", unit="запрос")
+def fare_calendar_query():
+    # Самое дешевое 7-дневное окно за 90 дней по 200 направлениям после изменения одной цены
+    from fare_calendar import FareCalendar
+    start = datetime(2026, 7, 1)
+    destinations = [f"Город {i}" for i in range(200)]
+    provider = _FareProvider(destinations, 90, start)
+    calendar = FareCalendar(provider, provider, "Москва", destinations, start, 90)
+    counter = itertools.count()
+
+    def query():
+        n = next(counter)
+        calendar.update(calendar.date_at(n % 90), destinations[n % 200], hotel=40 + n % 260)
+        return calendar.cheapest(7, limit=5)
+    return query
@@ -0,0 +1,137 @@
+import importlib.metadata
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+# Общая обвязка набора бенчмарков
+#
+# Бенчмарк - функция, которая готовит данные и возвращает операцию без
+# аргументов; обвязка сама подбирает число вызовов операции на прогон
+# (timeit.autorange) и берет минимум и медиану по нескольким прогонам.
+# Результаты пишутся в JSON и сравниваются с сохраненной базой: бенчмарк
+# считается регрессией, если медиана времени на операцию выросла больше
+# чем на threshold плюс разброс прогонов (шум самой машины). С базой
+# сравниваются только результаты из того же окружения: та же версия
+# Python, процессор и тот же набор необязательных зависимостей.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = {}
+# Необязательные зависимости, от которых зависят пути кода в бенчмарках
+OPTIONAL_DEPENDENCIES = ("flask", "numpy")
+# Поля окружения, которые должны совпадать с базой для сравнения
+COMPARABLE_FIELDS = ("python", "implementation", "machine", "cpu_count", "dependencies")
+
+
+class Skip(Exception):
+    """Бенчмарк нельзя запустить в этом окружении (например, нет Flask)"""
+
+
+def add_project_path(*parts):
+    # Каталог проекта в sys.path: модули проектов импортируются по имени
+    path = os.path.join(ROOT, *parts)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def benchmark(name, unit="op"):
+    def register(setup):
+        BENCHMARKS[name] = (setup, unit)
+        return setup
+    return register
+
+
+def measure(operation, repeat=7):
+    # Число вызовов на прогон подбирается так, чтобы прогон шел не меньше 0.2 с
+    timer = timeit.Timer(operation)
+    number, _ = timer.autorange()
+    per_op = [t / number for t in timer.repeat(repeat, number)]
+    best = min(per_op)
+    median = statistics.median(per_op)
+    return {
+        "best_s": best,
+        "median_s": median,
+        # Разброс прогонов относительно медианы - запас на шум при сравнении
+        "spread": (max(per_op) - best) / median if median > 0 else 0.0,
+        "ops_per_s": 1 / best if best > 0 else None,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(names, repeat=7, log=print):
+    results = {}
+    for name in names:
+        setup, unit = BENCHMARKS[name]
+        try:
+            operation = setup()
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+            log(f"{name:<40}пропущен: {e}")
+            continue
+        result = measure(operation, repeat)
+        result["unit"] = unit
+        results[name] = result
+        log(f"{name:<40}{_format_time(result['best_s']):>12} / {unit:<14}"
+            f"медиана {_format_time(result['median_s'])}")
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "dependencies": {name: _version(name) for name in OPTIONAL_DEPENDENCIES},
+    }
+
+
+def differences(baseline_env, current_env):
+    # [(поле, в базе, сейчас)] для полей, из-за которых сравнение теряет смысл
+    return [(field, baseline_env.get(field), current_env.get(field))
+            for field in COMPARABLE_FIELDS if baseline_env.get(field) != current_env.get(field)]
+
+
+def save(path, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "results": results}, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.2):
+    # [(имя, база, сейчас, изменение)] и список регрессий; сравнивается median_s,
+    # допуск - threshold плюс больший из разбросов базы и текущего замера
+    rows, regressions = [], []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or "median_s" not in base or "median_s" not in result:
+            continue
+        change = result["median_s"] / base["median_s"] - 1
+        rows.append((name, base["median_s"], result["median_s"], change))
+        if change > threshold + max(base.get("spread", 0.0), result.get("spread", 0.0)):
+            regressions.append(name)
+    return rows, regressions
+
+
+def _version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _format_time(seconds):
+    for unit, scale in (("с", 1), ("мс", 1e-3), ("мкс", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} нс"
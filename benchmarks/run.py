@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+
+import harness
+import bench_booking  # noqa: F401 - модули бенчмарков регистрируют себя при импорте
+import bench_smart_home  # noqa: F401
+import bench_todo  # noqa: F401
+import bench_travel  # noqa: F401
+
+# Набор бенчмарков бронирования, путешествий, умного дома и списка задач
+#
+# Запуск:
+#   python benchmarks/run.py                         все бенчмарки, сравнение с baseline.json
+#   python benchmarks/run.py -k todo -o results.json только todo.*, результаты в файл
+#   python benchmarks/run.py --save-baseline         записать текущие результаты как базу
+# Код выхода 1, если какой-то бенчмарк медленнее базы больше чем на --threshold
+# (плюс разброс прогонов) и при повторном замере. База записывается в окружении
+# со всеми зависимостями (Flask, NumPy); в другом окружении сравнение не делается.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки компонентов")
+    parser.add_argument("-k", "--filter", default="", help="только бенчмарки, чье имя содержит строку")
+    parser.add_argument("-o", "--output", help="JSON-файл для результатов")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = sorted(name for name in harness.BENCHMARKS if args.filter in name)
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    results = harness.run(names, repeat=args.repeat)
+    if args.output:
+        harness.save(args.output, results)
+    if args.save_baseline:
+        # Бенчмарки, не вошедшие в фильтр, сохраняют прежние значения базы,
+        # если она записана в том же окружении
+        previous = {}
+        if os.path.exists(args.baseline):
+            old = harness.load(args.baseline)
+            if not harness.differences(old["environment"], harness.environment()):
+                previous = old["results"]
+        previous.update(results)
+        harness.save(args.baseline, previous)
+        print(f"База сохранена: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+
+    baseline = harness.load(args.baseline)
+    mismatch = harness.differences(baseline["environment"], harness.environment())
+    if mismatch:
+        print(f"\nОкружение отличается от базы {baseline.get('created', '?')}, сравнение пропущено:")
+        for field, base, current in mismatch:
+            print(f"  {field}: {base} -> {current}")
+        return 0
+    rows, regressions = harness.compare(results, baseline["results"], args.threshold)
+    if regressions:
+        # Подозрительные бенчмарки замеряются еще раз: регрессия - только если повторилась
+        retry = harness.run(regressions, repeat=args.repeat, log=lambda line: None)
+        for name, result in retry.items():
+            if result.get("median_s", float("inf")) < results[name].get("median_s", float("inf")):
+                results[name] = result
+        rows, regressions = harness.compare(results, baseline["results"], args.threshold)
+    print(f"\nСравнение с базой от {baseline.get('created', '?')} ({baseline['environment']['platform']}):")
+    for name, base, current, change in rows:
+        mark = "  РЕГРЕССИЯ" if name in regressions else ""
+        print(f"{name:<40}{base * 1e6:>12.1f} -> {current * 1e6:>10.1f} мкс {change:>+8.1%}{mark}")
+    if regressions:
+        print(f"\nМедленнее базы больше чем на {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
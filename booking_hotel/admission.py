@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Допуск запросов на бронирование
+#
+# IdempotencyCache помнит результат запроса по ключу идемпотентности
+# ограниченное время. Повторная отправка формы или повтор клиента после
+# таймаута получают тот же результат без новой записи в базу, а пока
+# первый запрос еще выполняется, повтор получает PENDING.
+# RateLimiter - корзина токенов на клиента: rate токенов в секунду и не
+# больше burst в запасе. LoadShedder ограничивает число одновременно
+# выполняемых бронирований. Сверх лимита запрос сразу получает отказ, а не
+# встает в очередь к базе, так что при перегрузке очередь не растет без
+# предела. Все три структуры ограничены по памяти и работают за O(1) на
+# запрос.
+
+PENDING = object()
+
+
+class IdempotencyCache:
+    def __init__(self, ttl=600.0, max_size=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._items = OrderedDict()  # ключ -> (истекает, результат или PENDING)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        # Сохраненный результат, PENDING или None
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= self.clock():
+                del self._items[key]
+                return None
+            return item[1]
+
+    def claim(self, key):
+        # True - ключ занят этим запросом; False - результат уже есть или запрос выполняется
+        with self._lock:
+            now = self.clock()
+            item = self._items.get(key)
+            if item is not None and item[0] > now:
+                return False
+            self._store(key, PENDING, now)
+            return True
+
+    def finish(self, key, result):
+        with self._lock:
+            self._store(key, result, self.clock())
+
+    def abandon(self, key):
+        # Запрос не удался: повтор с тем же ключом выполнится заново
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[1] is PENDING:
+                del self._items[key]
+
+    def _store(self, key, result, now):
+        self._items[key] = (now + self.ttl, result)
+        self._items.move_to_end(key)
+        # Ключи добавляются по времени, поэтому истекшие - в начале словаря
+        while self._items:
+            oldest = next(iter(self._items.values()))
+            if oldest[0] > now and len(self._items) <= self.max_size:
+                break
+            self._items.popitem(last=False)
+
+
+class RateLimiter:
+    def __init__(self, rate=2.0, burst=10, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = OrderedDict()  # клиент -> [токенов, время последнего пополнения]
+        self._lock = threading.Lock()
+
+    def allow(self, client, cost=1):
+        # (разрешено, через сколько секунд появится токен)
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                # Давно не приходившие клиенты вытесняются первыми
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(client)
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0.0
+            return False, (cost - bucket[0]) / self.rate
+
+
+class LoadShedder:
+    def __init__(self, max_inflight=16):
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.inflight >= self.max_inflight:
+                self.shed += 1
+                return False
+            self.inflight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
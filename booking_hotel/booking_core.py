@@ -0,0 +1,246 @@
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from typing import List
+
+# Предметная область бронирования отелей: номера, гостиничные комплексы,
+# сборка пакета, тарифы, оплата и дополнительные услуги. Модуль не зависит
+# от Flask и не трогает базу данных, поэтому его можно загружать в скриптах,
+# бенчмарках и воркерах без веб-приложения.
+
+# Число номеров каждого типа в отеле
+ROOM_CAPACITY = {'Standard': 10, 'Luxury': 5, 'Apartment': 3}
+
+# Паттерн Singleton: Менеджер бронирований
+class BookingManager:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(BookingManager, cls).__new__(cls)
+            cls._instance.available_rooms = dict(ROOM_CAPACITY)
+        return cls._instance
+
+    def check_availability(self, room_type: str, quantity: int) -> bool:
+        return self.available_rooms.get(room_type, 0) >= quantity
+
+    def reserve_room(self, room_type: str, quantity: int) -> bool:
+        if self.check_availability(room_type, quantity):
+            self.available_rooms[room_type] -= quantity
+            return True
+        return False
+
+    def release_room(self, room_type: str, quantity: int):
+        self.available_rooms[room_type] = self.available_rooms.get(room_type, 0) + quantity
+
+# Паттерн Factory Method: Создание номеров
+class Room(ABC):
+    @abstractmethod
+    def get_description(self) -> str:
+        pass
+
+    @abstractmethod
+    def get_base_price(self) -> float:
+        pass
+
+class StandardRoom(Room):
+    def get_description(self) -> str:
+        return "Стандартный номер: Уютный одноместный номер с базовыми удобствами"
+    
+    def get_base_price(self) -> float:
+        return 100.0
+
+class LuxuryRoom(Room):
+    def get_description(self) -> str:
+        return "Люкс: Просторный номер с премиум-удобствами"
+    
+    def get_base_price(self) -> float:
+        return 250.0
+
+class ApartmentRoom(Room):
+    def get_description(self) -> str:
+        return "Апартаменты: Полноценный номер с кухней и гостиной"
+    
+    def get_base_price(self) -> float:
+        return 400.0
+
+class RoomFactory:
+    @staticmethod
+    def create_room(room_type: str) -> Room:
+        if room_type == "Standard":
+            return StandardRoom()
+        elif room_type == "Luxury":
+            return LuxuryRoom()
+        elif room_type == "Apartment":
+            return ApartmentRoom()
+        raise ValueError("Неизвестный тип номера")
+
+# Паттерн Abstract Factory: Создание гостиничных комплексов
+class HotelComplex(ABC):
+    @abstractmethod
+    def get_services(self) -> List[str]:
+        pass
+
+class CityHotel(HotelComplex):
+    def get_services(self) -> List[str]:
+        return ["Wi-Fi", "Тренажёрный зал"]
+
+class ResortHotel(HotelComplex):
+    def get_services(self) -> List[str]:
+        return ["Wi-Fi", "Бассейн", "Спа"]
+
+class HotelComplexFactory:
+    @staticmethod
+    def create_hotel(hotel_type: str) -> HotelComplex:
+        if hotel_type == "City":
+            return CityHotel()
+        elif hotel_type == "Resort":
+            return ResortHotel()
+        raise ValueError("Неизвестный тип отеля")
+
+# Паттерн Builder: Сборка пакета бронирования
+class BookingPackage:
+    def __init__(self):
+        self.room = None
+        self.services = []
+        self.breakfast = False
+        self.transfer = False
+
+    def __str__(self) -> str:
+        services = ", ".join(self.services)
+        extras = []
+        if self.breakfast:
+            extras.append("Завтрак")
+        if self.transfer:
+            extras.append("Трансфер")
+        extras_str = ", ".join(extras) if extras else "Отсутствуют"
+        return f"Номер: {self.room.get_description()}, Услуги: {services}, Дополнительно: {extras_str}"
+
+class BookingBuilder:
+    def __init__(self):
+        self.package = BookingPackage()
+
+    def set_room(self, room: Room):
+        self.package.room = room
+        return self
+
+    def set_hotel_services(self, hotel: HotelComplex):
+        self.package.services = hotel.get_services()
+        return self
+
+    def add_breakfast(self):
+        self.package.breakfast = True
+        return self
+
+    def add_transfer(self):
+        self.package.transfer = True
+        return self
+
+    def build(self) -> BookingPackage:
+        return self.package
+
+# Паттерн Prototype: Клонирование бронирований
+class BookingPrototype:
+    def __init__(self, package: BookingPackage, check_in: str, check_out: str, price: float):
+        self.package = package
+        self.check_in = check_in
+        self.check_out = check_out
+        self.price = price
+        self.id = _new_booking_id()
+
+    def clone(self) -> 'BookingPrototype':
+        # Копия - отдельное бронирование, поэтому у нее свой id
+        booking = deepcopy(self)
+        booking.id = _new_booking_id()
+        return booking
+
+def _new_booking_id() -> str:
+    import uuid  # uuid тянет platform; загружается при первом бронировании
+    return str(uuid.uuid4())
+
+# Паттерн Adapter: Обработка платежей
+class PaymentProcessor(ABC):
+    @abstractmethod
+    def process_payment(self, amount: float, currency: str) -> bool:
+        pass
+
+class USDProcessor:
+    def pay(self, amount: float) -> bool:
+        return True  # Имитация платежа
+
+class EURProcessor:
+    def execute_payment(self, amount: float) -> bool:
+        return True  # Имитация платежа
+
+class PaymentAdapter(PaymentProcessor):
+    def __init__(self, processor):
+        self.processor = processor
+
+    def process_payment(self, amount: float, currency: str) -> bool:
+        if currency == "USD":
+            return self.processor.pay(amount)
+        elif currency == "EUR":
+            return self.processor.execute_payment(amount * 0.85)  # Простая конверсия
+        return False
+
+# Паттерн Observer: Уведомления о бронировании
+class BookingObserver(ABC):
+    @abstractmethod
+    def update(self, booking_id: str, status: str):
+        pass
+
+class BookingSubject:
+    def __init__(self):
+        self._observers: List[BookingObserver] = []
+
+    def attach(self, observer: BookingObserver):
+        self._observers.append(observer)
+
+    def notify(self, booking_id: str, status: str):
+        for observer in self._observers:
+            observer.update(booking_id, status)
+
+# Паттерн Strategy: Тарифные планы
+class PricingStrategy(ABC):
+    @abstractmethod
+    def calculate_price(self, base_price: float, days: int) -> float:
+        pass
+
+class FlexibleTariff(PricingStrategy):
+    def calculate_price(self, base_price: float, days: int) -> float:
+        return base_price * days * 1.2  # 20% наценка за гибкость
+
+class NonRefundableTariff(PricingStrategy):
+    def calculate_price(self, base_price: float, days: int) -> float:
+        return base_price * days * 0.9  # 10% скидка за невозвратность
+
+# Паттерн Decorator: Дополнительные услуги
+class BookingDecorator(ABC):
+    def __init__(self, booking: BookingPrototype):
+        self._booking = booking
+
+    @property
+    def package(self) -> BookingPackage:
+        return self._booking.package
+
+    @property
+    def price(self) -> float:
+        return self._booking.price
+
+    # Добавляем setter для свойства price
+    @price.setter
+    def price(self, value: float):
+        self._booking.price = value
+
+    @property
+    def id(self) -> str:
+        return self._booking.id
+
+class MiniBarDecorator(BookingDecorator):
+    def __init__(self, booking: BookingPrototype):
+        super().__init__(booking)
+        self._booking.price += 50.0
+
+class LateCheckoutDecorator(BookingDecorator):
+    def __init__(self, booking: BookingPrototype):
+        super().__init__(booking)
+        self._booking.price += 30.0
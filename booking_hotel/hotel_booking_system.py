@@ -1,199 +1,141 @@
+import math
+import os
 import sqlite3
+import sys
 import uuid
-from abc import ABC, abstractmethod
 from datetime import datetime
-from copy import deepcopy
 from flask import Flask, render_template, request, redirect, url_for, flash
-from typing import List, Dict
-import json
+
+from booking_core import (
+    RoomFactory, HotelComplexFactory, BookingBuilder, BookingPrototype,
+    USDProcessor, EURProcessor, PaymentAdapter, BookingObserver, BookingSubject,
+    FlexibleTariff, NonRefundableTariff, MiniBarDecorator, LateCheckoutDecorator,
+)
+from rate_table import RateTable, DynamicTariff, as_date
+from waitlist import Waitlist
+from admission import PENDING, IdempotencyCache, RateLimiter, LoadShedder
+
+try:
+    import instrumentation
+except ImportError:
+    # Общий модуль инструментирования лежит в корне репозитория
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import instrumentation
 
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'
 
-# Инициализация базы данных SQLite
+DB_PATH = 'hotel_bookings.db'
+_db_ready = False
+ROOM_TYPES = ["Standard", "Luxury", "Apartment"]
+TARIFFS = ["Flexible", "NonRefundable", "Dynamic"]
+STATUS_CONFIRMED = "Подтверждено"
+STATUS_WAITLISTED = "Лист ожидания"
+STATUS_CANCELLED = "Отменено"
+
+# Таблица цен по загрузке и лист ожидания: строятся из базы в init_db,
+# дальше обновляются при каждом бронировании и отмене. Счетчики занятых
+# номеров в таблице цен - это и учет свободных номеров по отелю и ночам.
+# Заявка из листа ожидания оплачивается только когда получает номер.
+rate_table = RateTable()
+waitlist = Waitlist()
+
+# Допуск POST /book: ключи идемпотентности живут 10 минут, на клиента -
+# 2 бронирования в секунду с запасом 10, одновременно не больше 16
+idempotency = IdempotencyCache(ttl=600.0)
+rate_limiter = RateLimiter(rate=2.0, burst=10)
+load_shedder = LoadShedder(max_inflight=16)
+
+# Инициализация базы данных SQLite: не при импорте, а при первом подключении
 def init_db():
-    conn = sqlite3.connect('hotel_bookings.db')
+    global _db_ready
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS bookings
-                 (id TEXT PRIMARY KEY, hotel_name TEXT, room_type TEXT, check_in TEXT, check_out TEXT, services TEXT, total_price REAL, status TEXT)''')
+                 (id TEXT PRIMARY KEY, hotel_name TEXT, room_type TEXT, check_in TEXT, check_out TEXT, services TEXT, total_price REAL, status TEXT, currency TEXT)''')
+    # Валюта нужна, чтобы оплатить заявку из листа ожидания при подтверждении
+    if 'currency' not in {row[1] for row in c.execute("PRAGMA table_info(bookings)")}:
+        c.execute("ALTER TABLE bookings ADD COLUMN currency TEXT")
+    conn.commit()
+    # Единственный агрегирующий запрос по bookings - при построении таблицы цен
+    c.execute('''SELECT hotel_name, room_type, check_in, check_out, COUNT(*) FROM bookings
+                 WHERE status = ? GROUP BY hotel_name, room_type, check_in, check_out''', (STATUS_CONFIRMED,))
+    rate_table.load(c.fetchall())
+    c.execute('''SELECT hotel_name, room_type, check_in, check_out, id FROM bookings
+                 WHERE status = ? ORDER BY rowid''', (STATUS_WAITLISTED,))
+    waitlist.load(((hotel_name, room_type, check_in, check_out), booking_id)
+                  for hotel_name, room_type, check_in, check_out, booking_id in c.fetchall())
+    # Номера, освободившиеся, пока приложение не работало, достаются листу ожидания
+    promote_waitlisted(c, waitlist.keys())
     conn.commit()
     conn.close()
-
-init_db()
-
-# Паттерн Singleton: Менеджер бронирований
-class BookingManager:
-    _instance = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(BookingManager, cls).__new__(cls)
-            cls._instance.available_rooms = {
-                'Standard': 10, 'Luxury': 5, 'Apartment': 3
-            }
-        return cls._instance
-
-    def check_availability(self, room_type: str, quantity: int) -> bool:
-        return self.available_rooms.get(room_type, 0) >= quantity
-
-    def reserve_room(self, room_type: str, quantity: int) -> bool:
-        if self.check_availability(room_type, quantity):
-            self.available_rooms[room_type] -= quantity
-            return True
-        return False
-
-    def release_room(self, room_type: str, quantity: int):
-        self.available_rooms[room_type] = self.available_rooms.get(room_type, 0) + quantity
-
-# Паттерн Factory Method: Создание номеров
-class Room(ABC):
-    @abstractmethod
-    def get_description(self) -> str:
-        pass
-
-    @abstractmethod
-    def get_base_price(self) -> float:
-        pass
-
-class StandardRoom(Room):
-    def get_description(self) -> str:
-        return "Стандартный номер: Уютный одноместный номер с базовыми удобствами"
-    
-    def get_base_price(self) -> float:
-        return 100.0
-
-class LuxuryRoom(Room):
-    def get_description(self) -> str:
-        return "Люкс: Просторный номер с премиум-удобствами"
-    
-    def get_base_price(self) -> float:
-        return 250.0
-
-class ApartmentRoom(Room):
-    def get_description(self) -> str:
-        return "Апартаменты: Полноценный номер с кухней и гостиной"
-    
-    def get_base_price(self) -> float:
-        return 400.0
-
-class RoomFactory:
-    @staticmethod
-    def create_room(room_type: str) -> Room:
-        if room_type == "Standard":
-            return StandardRoom()
-        elif room_type == "Luxury":
-            return LuxuryRoom()
-        elif room_type == "Apartment":
-            return ApartmentRoom()
-        raise ValueError("Неизвестный тип номера")
-
-# Паттерн Abstract Factory: Создание гостиничных комплексов
-class HotelComplex(ABC):
-    @abstractmethod
-    def get_services(self) -> List[str]:
-        pass
-
-class CityHotel(HotelComplex):
-    def get_services(self) -> List[str]:
-        return ["Wi-Fi", "Тренажёрный зал"]
-
-class ResortHotel(HotelComplex):
-    def get_services(self) -> List[str]:
-        return ["Wi-Fi", "Бассейн", "Спа"]
-
-class HotelComplexFactory:
-    @staticmethod
-    def create_hotel(hotel_type: str) -> HotelComplex:
-        if hotel_type == "City":
-            return CityHotel()
-        elif hotel_type == "Resort":
-            return ResortHotel()
-        raise ValueError("Неизвестный тип отеля")
-
-# Паттерн Builder: Сборка пакета бронирования
-class BookingPackage:
-    def __init__(self):
-        self.room = None
-        self.services = []
-        self.breakfast = False
-        self.transfer = False
-
-    def __str__(self) -> str:
-        services = ", ".join(self.services)
-        extras = []
-        if self.breakfast:
-            extras.append("Завтрак")
-        if self.transfer:
-            extras.append("Трансфер")
-        extras_str = ", ".join(extras) if extras else "Отсутствуют"
-        return f"Номер: {self.room.get_description()}, Услуги: {services}, Дополнительно: {extras_str}"
-
-class BookingBuilder:
-    def __init__(self):
-        self.package = BookingPackage()
-
-    def set_room(self, room: Room):
-        self.package.room = room
-        return self
-
-    def set_hotel_services(self, hotel: HotelComplex):
-        self.package.services = hotel.get_services()
-        return self
-
-    def add_breakfast(self):
-        self.package.breakfast = True
-        return self
-
-    def add_transfer(self):
-        self.package.transfer = True
-        return self
-
-    def build(self) -> BookingPackage:
-        return self.package
-
-# Паттерн Prototype: Клонирование бронирований
-class BookingPrototype:
-    def __init__(self, package: BookingPackage, check_in: str, check_out: str, price: float):
-        self.package = package
-        self.check_in = check_in
-        self.check_out = check_out
-        self.price = price
-        self.id = str(uuid.uuid4())
-
-    def clone(self) -> 'BookingPrototype':
-        return deepcopy(self)
-
-# Паттерн Adapter: Обработка платежей
-class PaymentProcessor(ABC):
-    @abstractmethod
-    def process_payment(self, amount: float, currency: str) -> bool:
-        pass
-
-class USDProcessor:
-    def pay(self, amount: float) -> bool:
-        return True  # Имитация платежа
-
-class EURProcessor:
-    def execute_payment(self, amount: float) -> bool:
-        return True  # Имитация платежа
-
-class PaymentAdapter(PaymentProcessor):
-    def __init__(self, processor):
-        self.processor = processor
-
-    def process_payment(self, amount: float, currency: str) -> bool:
-        if currency == "USD":
-            return self.processor.pay(amount)
-        elif currency == "EUR":
-            return self.processor.execute_payment(amount * 0.85)  # Простая конверсия
-        return False
-
-# Паттерн Observer: Уведомления о бронировании
-class BookingObserver(ABC):
-    @abstractmethod
-    def update(self, booking_id: str, status: str):
-        pass
-
+    _db_ready = True
+
+def get_db():
+    if not _db_ready:
+        init_db()
+    return sqlite3.connect(DB_PATH)
+
+def get_rate_table():
+    if not _db_ready:
+        init_db()
+    return rate_table
+
+def get_waitlist():
+    if not _db_ready:
+        init_db()
+    return waitlist
+
+def charge(amount, currency):
+    # Adapter: оплата через процессор выбранной валюты
+    processor = USDProcessor() if currency == "USD" else EURProcessor()
+    return PaymentAdapter(processor).process_payment(amount, currency)
+
+def waiting_keys(hotel_name, room_type, check_in, check_out):
+    # Очереди листа ожидания этого отеля и типа номера, чьи ночи пересекаются с данными
+    start, end = as_date(check_in), as_date(check_out)
+    return [key for key in waitlist.keys((hotel_name, room_type))
+            if as_date(key[2]) < end and as_date(key[3]) > start]
+
+def promote_waitlisted(c, keys):
+    # Заявки из очередей keys получают номер, если он свободен во все их ночи,
+    # и только тогда оплачиваются; не прошедшая оплату заявка отменяется, а ее
+    # номер предлагается дальше. Возвращает id подтвержденных бронирований
+    confirmed = []
+    while keys:
+        freed = []
+        for key, booking_id in waitlist.offer(keys, lambda key: rate_table.reserve(*key)):
+            c.execute("SELECT total_price, currency FROM bookings WHERE id = ?", (booking_id,))
+            price, currency = c.fetchone()
+            if charge(price, currency or "USD"):
+                status = STATUS_CONFIRMED
+                confirmed.append(booking_id)
+            else:
+                status = STATUS_CANCELLED
+                rate_table.apply(*key, -1)
+                freed.append(key)
+            c.execute("UPDATE bookings SET status = ? WHERE id = ?", (status, booking_id))
+        keys = sorted({waiting for key in freed for waiting in waiting_keys(*key)})
+    return confirmed
+
+def release_rooms(c, hotel_name, room_type, check_in, check_out, rooms):
+    # Освобожденные номера сразу предлагаются листу ожидания на пересекающиеся
+    # даты; возвращает id бронирований, переведенных из листа в подтвержденные
+    get_rate_table().apply(hotel_name, room_type, check_in, check_out, -rooms)
+    get_waitlist()
+    return promote_waitlisted(c, waiting_keys(hotel_name, room_type, check_in, check_out))
+
+def quote_prices(hotel_name, check_in, check_out):
+    # {тип номера: цена за весь срок по динамическому тарифу} или {} при неверных датах
+    table = get_rate_table()
+    try:
+        return {room_type: table.quote(hotel_name, room_type, RoomFactory.create_room(room_type).get_base_price(),
+                                       check_in, check_out)
+                for room_type in ROOM_TYPES}
+    except ValueError:
+        return {}
+
+# Паттерн Observer: уведомления через flash-сообщения Flask
 class EmailNotifier(BookingObserver):
     def update(self, booking_id: str, status: str):
         flash(f"Email отправлен: Бронирование {booking_id} {status}")
@@ -202,63 +144,6 @@ class SMSNotifier(BookingObserver):
     def update(self, booking_id: str, status: str):
         flash(f"SMS отправлен: Бронирование {booking_id} {status}")
 
-class BookingSubject:
-    def __init__(self):
-        self._observers: List[BookingObserver] = []
-
-    def attach(self, observer: BookingObserver):
-        self._observers.append(observer)
-
-    def notify(self, booking_id: str, status: str):
-        for observer in self._observers:
-            observer.update(booking_id, status)
-
-# Паттерн Strategy: Тарифные планы
-class PricingStrategy(ABC):
-    @abstractmethod
-    def calculate_price(self, base_price: float, days: int) -> float:
-        pass
-
-class FlexibleTariff(PricingStrategy):
-    def calculate_price(self, base_price: float, days: int) -> float:
-        return base_price * days * 1.2  # 20% наценка за гибкость
-
-class NonRefundableTariff(PricingStrategy):
-    def calculate_price(self, base_price: float, days: int) -> float:
-        return base_price * days * 0.9  # 10% скидка за невозвратность
-
-# Паттерн Decorator: Дополнительные услуги
-class BookingDecorator(ABC):
-    def __init__(self, booking: BookingPrototype):
-        self._booking = booking
-
-    @property
-    def package(self) -> BookingPackage:
-        return self._booking.package
-
-    @property
-    def price(self) -> float:
-        return self._booking.price
-
-    # Добавляем setter для свойства price
-    @price.setter
-    def price(self, value: float):
-        self._booking.price = value
-
-    @property
-    def id(self) -> str:
-        return self._booking.id
-
-class MiniBarDecorator(BookingDecorator):
-    def __init__(self, booking: BookingPrototype):
-        super().__init__(booking)
-        self._booking.price += 50.0
-
-class LateCheckoutDecorator(BookingDecorator):
-    def __init__(self, booking: BookingPrototype):
-        super().__init__(booking)
-        self._booking.price += 30.0
-        
 # Маршруты Flask
 @app.route('/')
 def index():
@@ -274,102 +159,187 @@ def search():
         {"name": f"Отель {city} Городской", "type": "City"},
         {"name": f"Отель {city} Курортный", "type": "Resort"}
     ]
+    for hotel in hotels:
+        hotel["prices"] = quote_prices(hotel["name"], check_in, check_out)
     return render_template('hotels.html', hotels=hotels, check_in=check_in, check_out=check_out)
 
 @app.route('/book/<hotel_type>/<hotel_name>', methods=['GET', 'POST'])
 def book(hotel_type: str, hotel_name: str):
     check_in = request.args.get('check_in')
     check_out = request.args.get('check_out')
-    room_types = ["Standard", "Luxury", "Apartment"]
-    tariffs = ["Flexible", "NonRefundable"]
+    room_types = ROOM_TYPES
+    tariffs = TARIFFS
 
     if request.method == 'POST':
-        room_type = request.form['room_type']
-        tariff = request.form['tariff']
-        currency = request.form['currency']
-        add_minibar = 'minibar' in request.form
-        add_late_checkout = 'late_checkout' in request.form
-        add_breakfast = 'breakfast' in request.form
-        add_transfer = 'transfer' in request.form
-        group_size = int(request.form.get('group_size', 1))
-
-        # Singleton: Проверка доступности
-        booking_manager = BookingManager()
-        if not booking_manager.reserve_room(room_type, group_size):
-            flash("Выбранные номера недоступны!")
-            return redirect(url_for('book', hotel_type=hotel_type, hotel_name=hotel_name, check_in=check_in, check_out=check_out))
-
-        # Factory Method: Создание номера
-        room = RoomFactory.create_room(room_type)
-
-        # Abstract Factory: Создание услуг отеля
-        hotel = HotelComplexFactory.create_hotel(hotel_type)
-
-        # Builder: Сборка пакета бронирования
-        builder = BookingBuilder()
-        builder.set_room(room).set_hotel_services(hotel)
-        if add_breakfast:
-            builder.add_breakfast()
-        if add_transfer:
-            builder.add_transfer()
-        package = builder.build()
-
-        # Strategy: Расчёт стоимости
-        days = (datetime.strptime(check_out, '%Y-%m-%d') - datetime.strptime(check_in, '%Y-%m-%d')).days
-        strategy = FlexibleTariff() if tariff == "Flexible" else NonRefundableTariff()
-        price = strategy.calculate_price(room.get_base_price(), days)
-
-        # Prototype: Создание и клонирование бронирований
-        base_booking = BookingPrototype(package, check_in, check_out, price)
-        bookings = [base_booking.clone() for _ in range(group_size)]
-
-        # Decorator: Добавление дополнительных услуг
-        for i, booking in enumerate(bookings):
-            if add_minibar:
-                booking = MiniBarDecorator(booking)
-            if add_late_checkout:
-                booking = LateCheckoutDecorator(booking)
-            bookings[i] = booking
-
-        # Adapter: Обработка платежа
-        processor = USDProcessor() if currency == "USD" else EURProcessor()
-        payment_adapter = PaymentAdapter(processor)
-        total_price = sum(b.price for b in bookings)
-        if not payment_adapter.process_payment(total_price, currency):
-            booking_manager.release_room(room_type, group_size)
-            flash("Оплата не прошла!")
-            return redirect(url_for('book', hotel_type=hotel_type, hotel_name=hotel_name, check_in=check_in, check_out=check_out))
-
-        # Observer: Уведомление о подтверждении
-        subject = BookingSubject()
-        subject.attach(EmailNotifier())
-        subject.attach(SMSNotifier())
-
-        # Сохранение бронирований в базу данных
-        conn = sqlite3.connect('hotel_bookings.db')
-        c = conn.cursor()
+        return submit_booking(hotel_type, hotel_name, check_in, check_out)
+    return render_template('book.html', hotel_name=hotel_name, hotel_type=hotel_type, check_in=check_in, check_out=check_out, room_types=room_types, tariffs=tariffs,
+                           idempotency_key=str(uuid.uuid4()))
+
+def submit_booking(hotel_type: str, hotel_name: str, check_in: str, check_out: str):
+    # Ключ идемпотентности - скрытое поле формы или заголовок Idempotency-Key.
+    # Повтор с уже выполненным ключом получает прежние бронирования
+    key = request.form.get('idempotency_key') or request.headers.get('Idempotency-Key')
+    if key:
+        done = idempotency.get(key)
+        if done is PENDING:
+            return "Бронирование с этим ключом уже выполняется", 409
+        if done is not None:
+            return redirect(url_for('confirmation', booking_ids=done))
+
+    allowed, retry_after = rate_limiter.allow(request.remote_addr)
+    if not allowed:
+        return ("Слишком много запросов на бронирование, повторите позже", 429,
+                {"Retry-After": str(max(1, math.ceil(retry_after)))})
+    if key and not idempotency.claim(key):
+        return "Бронирование с этим ключом уже выполняется", 409
+    # Сверх лимита одновременных бронирований запрос получает отказ сразу,
+    # а не ждет в очереди к базе
+    if not load_shedder.acquire():
+        if key:
+            idempotency.abandon(key)
+        return "Сервис перегружен, повторите позже", 503, {"Retry-After": "1"}
+
+    booking_ids = None
+    try:
+        response, booking_ids = place_booking(hotel_type, hotel_name, check_in, check_out)
+    finally:
+        load_shedder.release()
+        if key:
+            if booking_ids:
+                idempotency.finish(key, booking_ids)
+            else:
+                idempotency.abandon(key)
+    return response
+
+def place_booking(hotel_type: str, hotel_name: str, check_in: str, check_out: str):
+    # (ответ, id созданных бронирований или None, если бронирование не состоялось)
+    room_type = request.form['room_type']
+    tariff = request.form['tariff']
+    currency = request.form['currency']
+    add_minibar = 'minibar' in request.form
+    add_late_checkout = 'late_checkout' in request.form
+    add_breakfast = 'breakfast' in request.form
+    add_transfer = 'transfer' in request.form
+    group_size = int(request.form.get('group_size', 1))
+
+    # Factory Method: Создание номера
+    room = RoomFactory.create_room(room_type)
+
+    # Abstract Factory: Создание услуг отеля
+    hotel = HotelComplexFactory.create_hotel(hotel_type)
+
+    # Builder: Сборка пакета бронирования
+    builder = BookingBuilder()
+    builder.set_room(room).set_hotel_services(hotel)
+    if add_breakfast:
+        builder.add_breakfast()
+    if add_transfer:
+        builder.add_transfer()
+    package = builder.build()
+
+    # Strategy: Расчёт стоимости
+    days = (datetime.strptime(check_out, '%Y-%m-%d') - datetime.strptime(check_in, '%Y-%m-%d')).days
+    if tariff == "Dynamic":
+        strategy = DynamicTariff(get_rate_table(), hotel_name, room_type, check_in)
+    elif tariff == "Flexible":
+        strategy = FlexibleTariff()
+    else:
+        strategy = NonRefundableTariff()
+    price = strategy.calculate_price(room.get_base_price(), days)
+
+    # Проверка доступности по занятым номерам отеля в каждую ночь (после
+    # расчета цены, чтобы динамический тариф не учитывал саму эту бронь);
+    # при распроданных номерах заявку можно поставить в лист ожидания
+    table = get_rate_table()
+    waitlisted = not table.reserve(hotel_name, room_type, check_in, check_out, group_size)
+    if waitlisted and 'waitlist' not in request.form:
+        flash("Выбранные номера недоступны!")
+        return redirect(url_for('book', hotel_type=hotel_type, hotel_name=hotel_name, check_in=check_in, check_out=check_out)), None
+
+    # Prototype: Создание и клонирование бронирований
+    base_booking = BookingPrototype(package, check_in, check_out, price)
+    bookings = [base_booking.clone() for _ in range(group_size)]
+
+    # Decorator: Добавление дополнительных услуг
+    for i, booking in enumerate(bookings):
+        if add_minibar:
+            booking = MiniBarDecorator(booking)
+        if add_late_checkout:
+            booking = LateCheckoutDecorator(booking)
+        bookings[i] = booking
+
+    # Adapter: Обработка платежа; заявка в листе ожидания оплачивается при подтверждении
+    total_price = sum(b.price for b in bookings)
+    if not waitlisted and not charge(total_price, currency):
+        table.apply(hotel_name, room_type, check_in, check_out, -group_size)
+        flash("Оплата не прошла!")
+        return redirect(url_for('book', hotel_type=hotel_type, hotel_name=hotel_name, check_in=check_in, check_out=check_out)), None
+
+    # Observer: Уведомление о подтверждении
+    subject = BookingSubject()
+    subject.attach(EmailNotifier())
+    subject.attach(SMSNotifier())
+
+    # Сохранение бронирований в базу данных
+    status = STATUS_WAITLISTED if waitlisted else STATUS_CONFIRMED
+    conn = get_db()
+    c = conn.cursor()
+    for booking in bookings:
+        c.execute("INSERT INTO bookings (id, hotel_name, room_type, check_in, check_out, services, total_price, status, currency) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                  (booking.id, hotel_name, room_type, check_in, check_out, str(booking.package), booking.price, status, currency))
+        subject.notify(booking.id, status)
+    conn.commit()
+    conn.close()
+    if waitlisted:
+        flash("Оплата будет списана, когда заявка получит номер")
+        queue = get_waitlist()
         for booking in bookings:
-            c.execute("INSERT INTO bookings (id, hotel_name, room_type, check_in, check_out, services, total_price, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                      (booking.id, hotel_name, room_type, check_in, check_out, str(booking.package), booking.price, "Подтверждено"))
-            subject.notify(booking.id, "Подтверждено")
-        conn.commit()
-        conn.close()
-
-        return redirect(url_for('confirmation', booking_ids=[b.id for b in bookings]))
+            queue.add((hotel_name, room_type, check_in, check_out), booking.id)
 
-    return render_template('book.html', hotel_name=hotel_name, hotel_type=hotel_type, check_in=check_in, check_out=check_out, room_types=room_types, tariffs=tariffs)
+    booking_ids = [b.id for b in bookings]
+    return redirect(url_for('confirmation', booking_ids=booking_ids)), booking_ids
 
 @app.route('/confirmation')
 def confirmation():
     booking_ids = request.args.getlist('booking_ids')
-    conn = sqlite3.connect('hotel_bookings.db')
+    conn = get_db()
     c = conn.cursor()
     bookings = []
     for bid in booking_ids:
         c.execute("SELECT * FROM bookings WHERE id = ?", (bid,))
         bookings.append(c.fetchone())
     conn.close()
-    return render_template('confirmation.html', bookings=bookings)
+    return render_template('confirmation.html', bookings=bookings, booking_ids=booking_ids,
+                           cancelled=STATUS_CANCELLED)
+
+@app.route('/cancel/<booking_id>', methods=['POST'])
+def cancel(booking_id: str):
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT hotel_name, room_type, check_in, check_out, status FROM bookings WHERE id = ?", (booking_id,))
+    row = c.fetchone()
+    if row is None or row[4] == STATUS_CANCELLED:
+        flash(f"Бронирование {booking_id} не найдено или уже отменено")
+    else:
+        hotel_name, room_type, check_in, check_out, status = row
+        # Условие на статус не дает отменить одну бронь дважды при повторном запросе
+        c.execute("UPDATE bookings SET status = ? WHERE id = ? AND status = ?", (STATUS_CANCELLED, booking_id, status))
+        if c.rowcount:
+            if status == STATUS_WAITLISTED:
+                get_waitlist().remove(booking_id)
+                promoted = []
+            else:
+                promoted = release_rooms(c, hotel_name, room_type, check_in, check_out, 1)
+            conn.commit()
+            flash(f"Бронирование {booking_id} {STATUS_CANCELLED.lower()}")
+            if promoted:
+                flash(f"Освободившийся номер передан заявке из листа ожидания: {', '.join(promoted)}")
+    conn.close()
+    return redirect(url_for('confirmation', booking_ids=request.form.getlist('booking_ids') or [booking_id]))
+
+# Замер всех маршрутов (включается через instrumentation.enable() или INSTRUMENT=1)
+instrumentation.instrument_flask(app, "hotel.")
 
 if __name__ == '__main__':
+    instrumentation.configure_from_env()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,117 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from booking_core import ROOM_CAPACITY, PricingStrategy
+
+# Динамические цены по загрузке отеля
+#
+# Для каждой пары (отель, тип номера) хранится число занятых номеров по
+# датам и уже посчитанный множитель цены на эту ночь. Множитель зависит от
+# доли занятых номеров (OCCUPANCY_BANDS). Бронирование или отмена меняют
+# только свои ночи: apply() пересчитывает множители этих дат, поэтому
+# котировка в book() и search() - это чтение словаря по датам, а не
+# агрегирующий запрос к таблице bookings. Ночи без бронирований в таблице
+# не хранятся, для них берется множитель пустого отеля. Те же счетчики -
+# учет свободных номеров: reserve() занимает номера, только если их хватает
+# (ROOM_CAPACITY) в каждую ночь проживания в этом отеле.
+
+# (верхняя граница доли занятых номеров, множитель); None - без границы
+OCCUPANCY_BANDS = ((0.3, 0.85), (0.6, 1.0), (0.85, 1.25), (None, 1.6))
+
+
+def as_date(value):
+    # Дата из формы или из базы: date, datetime или строка YYYY-MM-DD
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+
+
+def nights(check_in, check_out):
+    # Даты ночей проживания: от заезда включительно до выезда не включая
+    day, end = as_date(check_in), as_date(check_out)
+    while day < end:
+        yield day
+        day += timedelta(days=1)
+
+
+class RateTable:
+    def __init__(self, capacity=None, bands=OCCUPANCY_BANDS):
+        self.capacity = dict(capacity or ROOM_CAPACITY)
+        self.bands = bands
+        self._booked = {}   # (отель, тип номера) -> {дата: занято номеров}
+        self._factors = {}  # (отель, тип номера) -> {дата: множитель}
+        self._empty = {room_type: self.factor_for(0, rooms)
+                       for room_type, rooms in self.capacity.items()}
+        self._lock = threading.Lock()
+
+    def factor_for(self, booked, capacity):
+        ratio = booked / capacity if capacity else 1.0
+        for limit, factor in self.bands:
+            if limit is None or ratio < limit:
+                return factor
+        return self.bands[-1][1]
+
+    def apply(self, hotel, room_type, check_in, check_out, rooms=1):
+        # rooms > 0 - бронирование, rooms < 0 - отмена; пересчитываются только эти ночи
+        with self._lock:
+            self._apply(hotel, room_type, list(nights(check_in, check_out)), rooms)
+
+    def reserve(self, hotel, room_type, check_in, check_out, rooms=1):
+        # Занимает rooms номеров на все ночи, если их хватает в каждую; иначе ничего не меняет
+        days = list(nights(check_in, check_out))
+        capacity = self.capacity.get(room_type, 0)
+        with self._lock:
+            booked = self._booked.get((hotel, room_type), {})
+            if any(booked.get(day, 0) + rooms > capacity for day in days):
+                return False
+            self._apply(hotel, room_type, days, rooms)
+            return True
+
+    def _apply(self, hotel, room_type, days, rooms):
+        key = (hotel, room_type)
+        capacity = self.capacity.get(room_type, 0)
+        booked = self._booked.setdefault(key, {})
+        factors = self._factors.setdefault(key, {})
+        for day in days:
+            count = booked.get(day, 0) + rooms
+            if count > 0:
+                booked[day] = count
+                factors[day] = self.factor_for(count, capacity)
+            else:
+                booked.pop(day, None)
+                factors.pop(day, None)
+
+    def load(self, rows):
+        # Полное построение из строк (отель, тип номера, заезд, выезд, номеров)
+        with self._lock:
+            self._booked.clear()
+            self._factors.clear()
+        for hotel, room_type, check_in, check_out, rooms in rows:
+            self.apply(hotel, room_type, check_in, check_out, rooms)
+
+    def booked(self, hotel, room_type, day):
+        return self._booked.get((hotel, room_type), {}).get(as_date(day), 0)
+
+    def factors(self, hotel, room_type, check_in, check_out):
+        # Множители по ночам проживания
+        factors = self._factors.get((hotel, room_type), {})
+        default = self._empty.get(room_type, self.bands[-1][1])
+        return [factors.get(day, default) for day in nights(check_in, check_out)]
+
+    def quote(self, hotel, room_type, base_price, check_in, check_out):
+        return base_price * sum(self.factors(hotel, room_type, check_in, check_out))
+
+
+class DynamicTariff(PricingStrategy):
+    # Цена за каждую ночь - базовая цена номера, умноженная на множитель загрузки
+    def __init__(self, table: RateTable, hotel: str, room_type: str, check_in):
+        self.table = table
+        self.hotel = hotel
+        self.room_type = room_type
+        self.check_in = as_date(check_in)
+
+    def calculate_price(self, base_price: float, days: int) -> float:
+        check_out = self.check_in + timedelta(days=days)
+        return self.table.quote(self.hotel, self.room_type, base_price, self.check_in, check_out)
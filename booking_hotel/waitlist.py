@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import threading
+
+# Лист ожидания на распроданные номера
+#
+# Очередь ведется отдельно для каждого ключа (отель, тип номера, заезд,
+# выезд) и представляет собой двоичную кучу (приоритет, порядковый номер,
+# id бронирования). При равном приоритете очередь работает по FIFO. Когда
+# номер освобождается, offer() обходит очереди всех затронутых ключей в
+# общем порядке заявок и снимает с вершин столько, сколько удалось
+# зарезервировать; каждая заявка стоит O(log n). Ключи сгруппированы по
+# (отель, тип номера), чтобы найти очереди, которым помогает освободившийся
+# номер, не перебирая весь лист. Отмена заявки из листа
+# только помечает запись удаленной, как в планировщике задач. Первый же
+# просмотр вершины выбросит такую запись, а при избытке помеченных записей
+# куча перестраивается.
+
+_REMOVED = object()
+
+
+class Waitlist:
+    def __init__(self):
+        self._queues = {}   # ключ -> куча записей [приоритет, номер, id]
+        self._entries = {}  # id бронирования -> (ключ, запись)
+        self._live = {}     # ключ -> число живых записей
+        self._groups = {}   # (отель, тип номера) -> ключи с непустой очередью
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, booking_id):
+        return booking_id in self._entries
+
+    def add(self, key, booking_id, priority=0):
+        # Меньший приоритет обслуживается раньше
+        with self._lock:
+            self._discard(booking_id)
+            entry = [priority, next(self._counter), booking_id]
+            self._entries[booking_id] = (key, entry)
+            self._live[key] = self._live.get(key, 0) + 1
+            if key not in self._queues:
+                self._groups.setdefault(key[:2], set()).add(key)
+            heapq.heappush(self._queues.setdefault(key, []), entry)
+
+    def remove(self, booking_id):
+        with self._lock:
+            return self._discard(booking_id)
+
+    def waiting(self, key):
+        return self._live.get(key, 0)
+
+    def keys(self, group=None):
+        # Ключи с непустой очередью; group - (отель, тип номера)
+        if group is None:
+            return list(self._queues)
+        return list(self._groups.get(group, ()))
+
+    def offer(self, keys, reserve):
+        # Освободившиеся номера уходят заявкам очередей keys в общем порядке
+        # (приоритет, время постановки), пока reserve(ключ) удается; ключ,
+        # для которого reserve не удался, дальше не рассматривается.
+        # Возвращает [(ключ, id заявки)] получивших номер
+        promoted = []
+        with self._lock:
+            active = {key for key in keys if key in self._queues}
+            while active:
+                key = min(active, key=self._head)
+                if not reserve(key):
+                    active.discard(key)
+                    continue
+                booking_id = heapq.heappop(self._queues[key])[2]
+                del self._entries[booking_id]
+                self._live[key] -= 1
+                promoted.append((key, booking_id))
+                if not self._live[key]:
+                    self._drop(key)
+                    active.discard(key)
+        return promoted
+
+    def load(self, rows):
+        # Полное построение из строк (ключ, id бронирования) в порядке очереди
+        with self._lock:
+            self._queues.clear()
+            self._entries.clear()
+            self._live.clear()
+            self._groups.clear()
+            for key, booking_id in rows:
+                entry = [0, next(self._counter), booking_id]
+                self._entries[booking_id] = (key, entry)
+                self._live[key] = self._live.get(key, 0) + 1
+                self._queues.setdefault(key, []).append(entry)
+            for key, heap in self._queues.items():
+                heapq.heapify(heap)
+                self._groups.setdefault(key[:2], set()).add(key)
+
+    def _head(self, key):
+        # (приоритет, номер) первой живой записи очереди; удаленные снимаются
+        heap = self._queues[key]
+        while heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+        return heap[0][:2]
+
+    def _drop(self, key):
+        del self._queues[key]
+        del self._live[key]
+        group = self._groups[key[:2]]
+        group.discard(key)
+        if not group:
+            del self._groups[key[:2]]
+
+    def _discard(self, booking_id):
+        found = self._entries.pop(booking_id, None)
+        if found is None:
+            return False
+        key, entry = found
+        entry[2] = _REMOVED
+        self._live[key] -= 1
+        heap = self._queues[key]
+        if not self._live[key]:
+            self._drop(key)
+        elif len(heap) > 2 * self._live[key] + 64:
+            heap[:] = [item for item in heap if item[2] is not _REMOVED]
+            heapq.heapify(heap)
+        return True
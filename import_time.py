@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Время импорта модулей предметной области и модулей интерфейса
+#
+# Каждый вариант запускается в отдельном интерпретаторе с -X importtime;
+# складывается cumulative всех импортов верхнего уровня, кроме тех, что
+# интерпретатор делает при старте и без нашего кода. Из нескольких запусков
+# берется минимум. Пакеты, которых нет в окружении (PyQt5, Flask), отмечаются.
+# Запуск: python import_time.py [--repeat 5]
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (проект, каталог, что загружается, код загрузки)
+TARGETS = [
+    ("to-do", ".", "task_models", "import task_models"),
+    ("to-do", ".", "tmps_todolist (Tk)", "import tmps_todolist"),
+    ("travel", "TMPS2", "travel_planner", "import travel_planner"),
+    ("travel", "TMPS2", "tmps2 (Tk)", "import tmps2"),
+    ("smart home", "TMPS3", "smart_home", "import smart_home"),
+    ("smart home", "TMPS3", "lab3.3 (PyQt5)",
+     "import importlib.util as u; s = u.spec_from_file_location('lab', 'lab3.3.py'); "
+     "s.loader.exec_module(u.module_from_spec(s))"),
+    ("hotel", "booking_hotel", "booking_core", "import booking_core"),
+    ("hotel", "booking_hotel", "hotel_booking_system (Flask)", "import hotel_booking_system"),
+]
+
+
+def parse_importtime(stderr):
+    # {модуль верхнего уровня: cumulative в микросекундах}
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            try:
+                result[name.strip()] = int(cumulative)
+            except ValueError:
+                pass  # Строка заголовка
+    return result
+
+
+def measure(directory, code):
+    # (микросекунды, ошибка или None)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=os.path.join(ROOT, directory), capture_output=True, text=True)
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "error"
+        return None, error
+    return sum(parse_importtime(proc.stderr).values()), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отчет о времени импорта")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    baseline = min(measure(".", "pass")[0] for _ in range(args.repeat))
+    print(f"{'проект':<12}{'модуль':<32}{'импорт, мс':>12}")
+    for project, directory, label, code in TARGETS:
+        runs = [measure(directory, code) for _ in range(args.repeat)]
+        errors = [error for _, error in runs if error is not None]
+        if errors:
+            print(f"{project:<12}{label:<32}{'—':>12}   {errors[0]}")
+            continue
+        elapsed = min(us for us, _ in runs) - baseline
+        print(f"{project:<12}{label:<32}{elapsed / 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
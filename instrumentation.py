@@ -0,0 +1,232 @@
+import atexit
+import functools
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+# Инструментирование обработчиков интерфейса и маршрутов Flask
+#
+# timed(name, fn) оборачивает обработчик: пока замер выключен, обертка
+# только проверяет один глобальный флаг и вызывает fn. Во включенном режиме
+# для каждого имени копятся число вызовов, суммарное и максимальное время,
+# а вызовы дольше порога пишутся в лог. Отдельно по запросу запускается
+# семплирующий профилировщик: фоновый поток раз в interval снимает стеки
+# всех потоков (Flask обрабатывает запросы в рабочих потоках), корнем стека
+# служит имя потока. Результат сохраняется в «свернутом» формате
+# (frame;frame;frame count), который читают flamegraph.pl и speedscope.
+#
+# Переключение во время работы: enable()/disable(), toggle_sampling()
+# (в приложениях - клавиша F12 и сигнал SIGUSR1). При запуске:
+#   INSTRUMENT=1            включить замер обработчиков
+#   INSTRUMENT_SLOW_MS=50   порог медленного обработчика (по умолчанию 100 мс)
+#   INSTRUMENT_SAMPLE=1     сразу запустить семплирование (файл пишется при выходе)
+# SIGUSR1 и отчет при выходе ставятся, только если задана одна из переменных.
+
+log = logging.getLogger("instrumentation")
+
+_enabled = False
+slow_threshold = 0.1
+_stats = {}  # имя -> [вызовов, суммарное время, максимум]
+_stats_lock = threading.Lock()
+_sampler = None
+
+
+def enable(slow_ms=None):
+    global _enabled, slow_threshold
+    if slow_ms is not None:
+        slow_threshold = slow_ms / 1000
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def timed(name, fn=None):
+    # timed("имя", fn) или @timed("имя")
+    if fn is None:
+        return functools.partial(timed, name)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(name, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument_flask(app, prefix=""):
+    # Оборачивает все зарегистрированные view-функции приложения Flask
+    for endpoint, view in list(app.view_functions.items()):
+        app.view_functions[endpoint] = timed(prefix + endpoint, view)
+
+
+def stats():
+    # [(имя, вызовов, всего с, среднее с, максимум с)] по убыванию общего времени
+    with _stats_lock:
+        items = [(name, count, total, total / count, worst)
+                 for name, (count, total, worst) in _stats.items()]
+    return sorted(items, key=lambda item: item[2], reverse=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def log_stats():
+    for name, count, total, mean, worst in stats():
+        log.info("%-32s %6d вызовов  всего %8.1f мс  среднее %7.2f мс  максимум %7.2f мс",
+                 name, count, total * 1000, mean * 1000, worst * 1000)
+
+
+def _record(name, elapsed):
+    with _stats_lock:
+        entry = _stats.get(name)
+        if entry is None:
+            _stats[name] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+    if elapsed >= slow_threshold:
+        log.warning("Медленный обработчик %s: %.1f мс", name, elapsed * 1000)
+
+
+class SamplingProfiler:
+    """Фоновый поток, который снимает стеки потоков раз в interval секунд
+
+    По умолчанию семплируются все потоки, кроме самого профилировщика;
+    thread_id ограничивает семплирование одним потоком.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.samples
+
+    def _run(self):
+        # Имена кадров кэшируются по объекту кода: строка собирается один раз
+        names = {}
+        thread_names = {}
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames.get(self.thread_id)}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = names.get(code)
+                    if name is None:
+                        name = names[code] = (f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                                              f":{code.co_firstlineno})")
+                    stack.append(name)
+                    frame = frame.f_back
+                thread_name = thread_names.get(thread_id)
+                if thread_name is None:
+                    # Рабочие потоки появляются по ходу работы: имена перечитываются
+                    # только при встрече нового потока
+                    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    thread_name = thread_names.get(thread_id, f"thread-{thread_id}")
+                stack.append(thread_name)
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+            # Кадры не держатся между семплами
+            frames = frame = None
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def start_sampling(interval=0.005):
+    global _sampler
+    if _sampler is None:
+        _sampler = SamplingProfiler(interval)
+        _sampler.start()
+        log.info("Семплирование запущено (интервал %.1f мс)", interval * 1000)
+    return _sampler
+
+
+def stop_sampling(path=None):
+    # Останавливает семплирование и пишет свернутые стеки; возвращает путь
+    global _sampler
+    if _sampler is None:
+        return None
+    sampler, _sampler = _sampler, None
+    sampler.stop()
+    path = path or time.strftime(f"profile-%Y%m%d-%H%M%S-{os.getpid()}.folded")
+    sampler.write_folded(path)
+    log.info("Профиль записан: %s (%d семплов)", path, sum(sampler.samples.values()))
+    return path
+
+
+def toggle_sampling():
+    if _sampler is None:
+        start_sampling()
+        return None
+    return stop_sampling()
+
+
+def configure_from_env(environ=os.environ):
+    # Читает INSTRUMENT*; если инструментирование включено, ставит SIGUSR1
+    # на toggle_sampling и отчет при выходе
+    instrument = environ.get("INSTRUMENT") == "1"
+    sample = environ.get("INSTRUMENT_SAMPLE") == "1"
+    if not (instrument or sample):
+        return
+    if instrument:
+        slow_ms = environ.get("INSTRUMENT_SLOW_MS")
+        enable(float(slow_ms) if slow_ms else None)
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO)
+    if sample:
+        start_sampling()
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: toggle_sampling())
+    atexit.register(_at_exit)
+
+
+def _at_exit():
+    stop_sampling()
+    if _stats:
+        log_stats()
@@ -0,0 +1,168 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+
+from task_models import ProjectFactory, TaskBuilder, TaskFactory
+from task_scheduler import as_datetime
+from task_store import TaskStore
+
+# Потоковый импорт и экспорт задач в CSV и JSON Lines
+#
+# Строки читаются и пишутся генераторами по одной, задачи собираются через
+# фабрики и TaskBuilder и сохраняются пачками по batch_size одной транзакцией,
+# поэтому память не зависит от размера файла. После каждой пачки вызывается
+# on_batch - через него интерфейс обновляется один раз на пачку.
+# Запуск без интерфейса:
+#   python task_io.py import backlog.csv --db tasks/tasks.db
+#   python task_io.py export backup.jsonl --db tasks/tasks.db
+
+CSV_FIELDS = ("description", "task_type", "project_type", "deadline", "repeat", "tags")
+TAG_SEPARATOR = ";"
+BATCH_SIZE = 10000
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file format: {path}")
+
+
+def iter_rows(path, fmt=None):
+    # Словари строк файла по одной
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def write_rows(path, rows, fmt=None):
+    fmt = fmt or detect_format(path)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                tags = row.get("tags")
+                if isinstance(tags, list):
+                    row = dict(row, tags=TAG_SEPARATOR.join(tags))
+                writer.writerow(row)
+                count += 1
+        else:
+            encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+            for row in rows:
+                f.write(encode(row))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def task_from_row(row, task_factory, project_factory, builder_class):
+    # (task, project_task, task_data) из строки файла; ValueError - строка неверна
+    description = (row.get("description") or "").strip()
+    if not description:
+        raise ValueError("Empty description")
+    task = task_factory.create_task((row.get("task_type") or "simple").strip(), description)
+    project_task = project_factory.create_task((row.get("project_type") or "work").strip(), description)
+
+    builder = builder_class().set_description(description)
+    if row.get("deadline"):
+        builder.set_deadline(as_datetime(row["deadline"]))
+    repeat = row.get("repeat")
+    if repeat not in (None, ""):
+        if task.task_type != "recurring":
+            raise ValueError(f"Repeat is only allowed for recurring tasks, not {task.task_type}")
+        # int() молча превратил бы 1.5 в 1, а true - в 1
+        if isinstance(repeat, bool) or isinstance(repeat, float) and not repeat.is_integer():
+            raise ValueError(f"Repeat period must be a whole number of days: {repeat!r}")
+        repeat = int(repeat)
+        if repeat <= 0:
+            raise ValueError(f"Repeat period must be positive: {repeat}")
+        builder.set_repeat(repeat)
+    tags = row.get("tags")
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(TAG_SEPARATOR) if tag.strip()]
+    if tags:
+        builder.set_tags(list(tags))
+    return task, project_task, builder.build()
+
+
+def import_tasks(path, store, task_factory, project_factory, builder_class,
+                 batch_size=BATCH_SIZE, on_batch=None, fmt=None):
+    # Возвращает (импортировано, пропущено, первые ошибки [(номер записи, текст)])
+    imported = skipped = 0
+    errors = []
+
+    def tasks():
+        nonlocal skipped
+        for number, row in enumerate(iter_rows(path, fmt), 1):
+            try:
+                yield task_from_row(row, task_factory, project_factory, builder_class)
+            except (ValueError, TypeError, AttributeError) as e:
+                skipped += 1
+                if len(errors) < 20:
+                    errors.append((number, str(e)))
+
+    for batch in batched(tasks(), batch_size):
+        task_ids = store.add_many((task.task_type, project_task.project_type, task_data)
+                                  for task, project_task, task_data in batch)
+        imported += len(task_ids)
+        if on_batch is not None:
+            on_batch(list(zip(task_ids, batch)))
+    return imported, skipped, errors
+
+
+def export_rows(store):
+    # Строки для файла прямо из курсора хранилища
+    for _, task_type, project_type, task_data in store.load():
+        row = {"task_type": task_type, "project_type": project_type}
+        row.update(task_data)
+        yield row
+
+
+def export_tasks(path, store, fmt=None):
+    return write_rows(path, export_rows(store), fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт и экспорт задач To-Do List Manager")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("path")
+    parser.add_argument("--db", default=os.path.join("tasks", "tasks.db"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    store = TaskStore(args.db)
+    try:
+        if args.action == "import":
+            imported, skipped, errors = import_tasks(args.path, store, TaskFactory(), ProjectFactory(),
+                                                     TaskBuilder, batch_size=args.batch_size)
+            print(f"Imported: {imported}, skipped: {skipped}")
+            for number, message in errors:
+                print(f"  record {number}: {message}")
+        else:
+            print(f"Exported: {export_tasks(args.path, store)}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
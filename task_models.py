@@ -0,0 +1,173 @@
+import copy
+from abc import ABC, abstractmethod
+
+# Предметная область To-Do List Manager: настройки, задачи и порождающие
+# паттерны. Модуль не зависит от tkinter, поэтому его загружают импорт и
+# экспорт задач, бенчмарки и скрипты без графического интерфейса.
+
+# 1. Singleton — AppSettings
+class AppSettings:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AppSettings, cls).__new__(cls)
+            cls._instance.save_path = "./tasks"
+        return cls._instance
+
+    def set_save_path(self, path):
+        self.save_path = path
+
+    def get_save_path(self):
+        return self.save_path
+
+
+# 2. Factory Method — TaskFactory
+# Задачи неизменяемы после создания и хранят только описание (__slots__),
+# поэтому клоны могут разделять их с оригиналом
+class Task(ABC):
+    __slots__ = ("description",)
+
+    @abstractmethod
+    def display(self):
+        pass
+
+class SimpleTask(Task):
+    __slots__ = ()
+    task_type = "simple"
+
+    def __init__(self, description):
+        self.description = description
+
+    def display(self):
+        return f"Simple Task: {self.description}"
+
+class UrgentTask(Task):
+    __slots__ = ()
+    task_type = "urgent"
+
+    def __init__(self, description):
+        self.description = description
+
+    def display(self):
+        return f"Urgent Task: {self.description}"
+
+class RecurringTask(Task):
+    __slots__ = ()
+    task_type = "recurring"
+
+    def __init__(self, description):
+        self.description = description
+
+    def display(self):
+        return f"Recurring Task: {self.description}"
+
+class TaskFactory:
+    def create_task(self, task_type, description):
+        if task_type == "simple":
+            return SimpleTask(description)
+        elif task_type == "urgent":
+            return UrgentTask(description)
+        elif task_type == "recurring":
+            return RecurringTask(description)
+        else:
+            raise ValueError("Unknown task type")
+
+
+# 3. Abstract Factory — ProjectFactory
+class ProjectTask(ABC):
+    __slots__ = ("description",)
+
+    @abstractmethod
+    def display(self):
+        pass
+
+class WorkTask(ProjectTask):
+    __slots__ = ()
+    project_type = "work"
+
+    def __init__(self, description):
+        self.description = description
+
+    def display(self):
+        return f"Work Task: {self.description}"
+
+class HomeTask(ProjectTask):
+    __slots__ = ()
+    project_type = "home"
+
+    def __init__(self, description):
+        self.description = description
+
+    def display(self):
+        return f"Home Task: {self.description}"
+
+class HobbyTask(ProjectTask):
+    __slots__ = ()
+    project_type = "hobby"
+
+    def __init__(self, description):
+        self.description = description
+
+    def display(self):
+        return f"Hobby Task: {self.description}"
+
+class ProjectFactory:
+    def create_task(self, project_type, description):
+        if project_type == "work":
+            return WorkTask(description)
+        elif project_type == "home":
+            return HomeTask(description)
+        elif project_type == "hobby":
+            return HobbyTask(description)
+        else:
+            raise ValueError("Unknown project type")
+
+
+# 4. Builder — TaskBuilder
+class TaskBuilder:
+    def __init__(self):
+        self.task = {}
+
+    def set_description(self, description):
+        self.task['description'] = description
+        return self
+
+    def set_deadline(self, deadline):
+        self.task['deadline'] = deadline
+        return self
+
+    def set_repeat(self, days):
+        # Период повторения RecurringTask в днях, отсчитывается от дедлайна
+        self.task['repeat'] = days
+        return self
+
+    def set_tags(self, tags):
+        self.task['tags'] = tags
+        return self
+
+    def build(self):
+        return self.task
+
+
+# 5. Prototype — TaskPrototype
+class TaskPrototype:
+    def __init__(self, task):
+        self.task = task
+
+    def clone(self, deep=False):
+        # По умолчанию объекты задачи и проекта общие с оригиналом,
+        # а копируются только изменяемые данные (словарь и списки в нем)
+        if deep:
+            return copy.deepcopy(self.task)
+        task, project_task, task_data = self.task
+        return (task, project_task, _copy_task_data(task_data))
+
+    def clone_many(self, count):
+        task, project_task, task_data = self.task
+        return [(task, project_task, _copy_task_data(task_data)) for _ in range(count)]
+
+
+def _copy_task_data(task_data):
+    return {key: list(value) if isinstance(value, list) else value
+            for key, value in task_data.items()}
@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import logging
+from datetime import date, datetime, timedelta
+
+# Планировщик напоминаний по дедлайнам задач
+#
+# Очередь - двоичная куча (срок, порядковый номер, запись). Для каждой задачи
+# в куче лежит не больше одной живой записи: для повторяющейся задачи это
+# только ее ближайшее вхождение, следующее считается в момент срабатывания,
+# так что вхождения никогда не создаются заранее. Снятие задачи лишь помечает
+# запись удаленной (ее выбросит первый же просмотр вершины), поэтому
+# schedule, unschedule и next_due стоят O(log n) без обхода списка задач.
+
+log = logging.getLogger("task_scheduler")
+
+_REMOVED = object()
+# Следующее вхождение повторяющейся задачи ищется строго после момента срабатывания
+_TICK = timedelta(microseconds=1)
+
+
+def as_datetime(value):
+    # Дедлайн из TaskBuilder или из хранилища: datetime, date или строка ISO
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(str(value).strip())
+
+
+def as_period(value):
+    # Период повторения: timedelta или число дней
+    if value is None or isinstance(value, timedelta):
+        return value
+    return timedelta(days=float(value))
+
+
+def next_occurrence(anchor, period, after):
+    # Первое вхождение anchor + k * period, не раньше after (без перебора)
+    if period is None or after <= anchor:
+        return anchor
+    return anchor + -((anchor - after) // period) * period
+
+
+class TaskScheduler:
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task_id):
+        return task_id in self._entries
+
+    def schedule(self, task_id, deadline, repeat=None, now=None):
+        # Повторяющаяся задача ставится на ближайшее вхождение не раньше now
+        deadline = as_datetime(deadline)
+        if deadline is None:
+            self.unschedule(task_id)
+            return None
+        period = as_period(repeat)
+        if period is not None and period <= timedelta(0):
+            raise ValueError("Repeat period must be positive")
+        if period is not None and now is not None:
+            due = next_occurrence(deadline, period, now)
+        else:
+            due = deadline
+        self._push(task_id, due, deadline, period)
+        return due
+
+    def schedule_many(self, items, now=None, reminded=None):
+        # items - итерируемое (task_id, deadline, repeat); куча строится один раз.
+        # reminded - {task_id: срок уже показанного напоминания}: эти сроки не
+        # ставятся снова, разовая задача с показанным напоминанием пропускается.
+        # Записи с неверным сроком или периодом пропускаются, а не обрывают загрузку:
+        # возвращается список их task_id
+        reminded = reminded or {}
+        skipped = []
+        for task_id, deadline, repeat in items:
+            try:
+                deadline = as_datetime(deadline)
+                period = as_period(repeat)
+            except (TypeError, ValueError) as e:
+                log.warning("Задача %s не запланирована: %s", task_id, e)
+                skipped.append(task_id)
+                continue
+            if deadline is None:
+                continue
+            if period is not None and period <= timedelta(0):
+                log.warning("Задача %s не запланирована: период повторения %s", task_id, period)
+                skipped.append(task_id)
+                continue
+            due = next_occurrence(deadline, period, now) if now is not None else deadline
+            last = reminded.get(task_id)
+            if last is not None and due <= last:
+                if period is None:
+                    continue
+                due = next_occurrence(deadline, period, last + _TICK)
+            entry = [due, next(self._counter), task_id, deadline, period]
+            old = self._entries.get(task_id)
+            if old is not None:
+                old[2] = _REMOVED
+            self._entries[task_id] = entry
+            self._heap.append(entry)
+        heapq.heapify(self._heap)
+        return skipped
+
+    def unschedule(self, task_id):
+        entry = self._entries.pop(task_id, None)
+        if entry is not None:
+            entry[2] = _REMOVED
+            self._compact()
+
+    def due_at(self, task_id):
+        entry = self._entries.get(task_id)
+        return None if entry is None else entry[0]
+
+    def next_due(self):
+        # (срок, task_id) ближайшей задачи или None
+        heap = self._heap
+        while heap and heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return heap[0][0], heap[0][2]
+
+    def pop_due(self, now):
+        # Все задачи со сроком не позже now: [(срок, task_id)]. Повторяющаяся
+        # задача сразу переставляется на следующее вхождение после now, даже
+        # если за это время было пропущено несколько
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, _, task_id, deadline, period = heapq.heappop(heap)
+            if task_id is _REMOVED:
+                continue
+            due.append((when, task_id))
+            if period is None:
+                del self._entries[task_id]
+            else:
+                self._push(task_id, next_occurrence(deadline, period, now + _TICK), deadline, period)
+        return due
+
+    def upcoming(self, limit=10):
+        # Ближайшие limit сроков по возрастанию, куча при этом не меняется
+        return [(entry[0], entry[2]) for entry in heapq.nsmallest(
+            limit, (entry for entry in self._heap if entry[2] is not _REMOVED))]
+
+    def occurrences(self, task_id, start, end):
+        # Лениво перечисляет вхождения задачи в интервале [start, end]
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return
+        deadline, period = entry[3], entry[4]
+        start, end = as_datetime(start), as_datetime(end)
+        when = next_occurrence(deadline, period, start)
+        if period is None:
+            if start <= when <= end:
+                yield when
+            return
+        while when <= end:
+            yield when
+            when += period
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+    def _push(self, task_id, due, deadline, period):
+        old = self._entries.get(task_id)
+        if old is not None:
+            old[2] = _REMOVED
+        entry = [due, next(self._counter), task_id, deadline, period]
+        self._entries[task_id] = entry
+        heapq.heappush(self._heap, entry)
+        self._compact()
+
+    def _compact(self):
+        # Помеченные записи копятся в куче; когда их больше половины, куча
+        # перестраивается на месте, чтобы память не росла от перестановок
+        heap = self._heap
+        if len(heap) > 2 * len(self._entries) + 64:
+            heap[:] = [entry for entry in heap if entry[2] is not _REMOVED]
+            heapq.heapify(heap)
+
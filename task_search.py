@@ -0,0 +1,173 @@
+import re
+from bisect import bisect_left, insort
+
+from task_scheduler import as_datetime
+
+# Поисковый индекс задач по описанию и тегам
+#
+# Обратный индекс: слово -> множество id задач. Словарь слов хранится
+# отсортированным, поэтому все слова с заданным префиксом находятся двумя
+# бинарными поисками. Каждое слово запроса считается префиксом: "rep q"
+# найдет "Prepare quarterly report". Если новый запрос лишь удлиняет
+# предыдущий (набор очередной буквы) и прошлых результатов немного,
+# проверяются только они. Результат - множество id в SearchResult: по
+# порядку добавления он сортируется только при первом обращении по позиции,
+# то есть когда список на экране действительно перерисовывается.
+# Слова вида поле:значение (type:urgent, project:work, tag:report,
+# from:2026-01-01, to:2026-12-31) в поисковой строке не ищутся по тексту,
+# а становятся условиями TaskStore.filter по индексированным колонкам.
+
+_WORD = re.compile(r"\w+")
+_FILTER = re.compile(r"\b(type|project|tag|from|to):(\S*)")
+_FILTER_FIELDS = {"type": "task_type", "project": "project_type", "tag": "tag",
+                  "from": "deadline_from", "to": "deadline_to"}
+
+
+def tokenize(text):
+    return _WORD.findall(str(text).lower())
+
+
+def parse_query(query):
+    # (текст для поиска по словам, условия для TaskStore.filter)
+    filters = {}
+    for field, value in _FILTER.findall(query):
+        if not value:
+            continue
+        if field in ("from", "to"):
+            # Дата, которую еще не допечатали, пока не ограничивает список
+            try:
+                parsed = as_datetime(value)
+            except ValueError:
+                continue
+            if field == "to" and len(value) <= 10:
+                # to: с одной датой включает весь этот день
+                parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+            value = parsed
+        filters[_FILTER_FIELDS[field]] = value
+    return _FILTER.sub(" ", query), filters
+
+
+class SearchResult:
+    # Найденные id задач: len и in без сортировки, индексы и срезы - по
+    # возрастанию id (порядок добавления), сортировка при первом обращении
+    def __init__(self, ids):
+        self.ids = ids
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, task_id):
+        return task_id in self.ids
+
+    def __iter__(self):
+        return iter(self._ordered())
+
+    def __getitem__(self, index):
+        return self._ordered()[index]
+
+    def _ordered(self):
+        if self._sorted is None:
+            self._sorted = sorted(self.ids)
+        return self._sorted
+
+
+class TaskSearchIndex:
+    # До какого размера прошлый результат дешевле отфильтровать, чем искать заново
+    REFINE_LIMIT = 5000
+
+    def __init__(self):
+        self._postings = {}
+        self._words = []
+        self._docs = {}
+        self._last_query = None
+        self._last_result = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, task_id, description, tags=()):
+        if isinstance(tags, str):
+            tags = [tags]
+        words = set(tokenize(description))
+        for tag in tags or ():
+            words.update(tokenize(tag))
+        self._docs[task_id] = tuple(words)
+        for word in words:
+            ids = self._postings.get(word)
+            if ids is None:
+                self._postings[word] = {task_id}
+                insort(self._words, word)
+            else:
+                ids.add(task_id)
+        self._last_query = None
+
+    def add_many(self, items):
+        # items - итерируемое (task_id, description, tags); новые слова
+        # сортируются один раз и сливаются с уже отсортированным словарем
+        postings = self._postings
+        new_words = []
+        for task_id, description, tags in items:
+            if isinstance(tags, str):
+                tags = [tags]
+            words = set(tokenize(description))
+            for tag in tags or ():
+                words.update(tokenize(tag))
+            self._docs[task_id] = tuple(words)
+            for word in words:
+                ids = postings.get(word)
+                if ids is None:
+                    postings[word] = {task_id}
+                    new_words.append(word)
+                else:
+                    ids.add(task_id)
+        if new_words:
+            new_words.sort()
+            self._words = sorted(self._words + new_words) if self._words else new_words
+        self._last_query = None
+
+    def remove(self, task_id):
+        for word in self._docs.pop(task_id, ()):
+            ids = self._postings[word]
+            ids.discard(task_id)
+            if not ids:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+        self._last_query = None
+
+    def search(self, query):
+        # SearchResult с id найденных задач; None - пустой запрос
+        terms = tokenize(query)
+        if not terms:
+            return None
+        last = self._last_query
+        if (last is not None and query.startswith(last)
+                and len(self._last_result) <= self.REFINE_LIMIT):
+            result = {task_id for task_id in self._last_result.ids if self._matches(task_id, terms)}
+        else:
+            matched = None
+            for term in sorted(terms, key=len, reverse=True):
+                ids = self._prefix_ids(term)
+                matched = ids if matched is None else matched & ids
+                if not matched:
+                    break
+            result = matched
+        result = SearchResult(result)
+        self._last_query = query
+        self._last_result = result
+        return result
+
+    def _prefix_ids(self, prefix):
+        words = self._words
+        start = bisect_left(words, prefix)
+        end = bisect_left(words, prefix + "\uffff", start)
+        if end - start == 1:
+            return set(self._postings[words[start]])
+        ids = set()
+        for word in words[start:end]:
+            ids.update(self._postings[word])
+        return ids
+
+    def _matches(self, task_id, terms):
+        words = self._docs.get(task_id, ())
+        return all(any(word.startswith(term) for word in words) for term in terms)
@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+
+from task_scheduler import as_datetime
+
+# Хранилище задач To-Do List Manager в SQLite
+#
+# Каждая задача - строка с постоянным id; тип задачи, тип проекта и дедлайн
+# вынесены в индексированные колонки, теги - в отдельную таблицу с индексом
+# по тегу. Любое изменение пишется сразу одной короткой транзакцией, так что
+# файл не перезаписывается целиком, а удаление по id не зависит от числа задач.
+# Дедлайн и в колонке, и в JSON задачи хранится в одном виде - isoformat()
+# (YYYY-MM-DDTHH:MM:SS), иначе строки в колонке нельзя сравнивать между собой.
+# reminded_at - срок последнего показанного напоминания, чтобы после перезапуска
+# оно не показывалось снова.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    task_type TEXT NOT NULL,
+    project_type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    deadline TEXT,
+    data TEXT NOT NULL,
+    reminded_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_task_type ON tasks (task_type);
+CREATE INDEX IF NOT EXISTS idx_tasks_project_type ON tasks (project_type);
+CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks (deadline);
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags (task_id);
+"""
+
+# Один кодировщик на модуль: json.dumps с параметрами создает новый на каждый вызов
+_encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+_dumps = _encoder.encode
+
+
+class TaskStore:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        # Базы, созданные до появления колонки reminded_at
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "reminded_at" not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN reminded_at TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, task_type, project_type, task_data):
+        with self.conn:
+            return self._insert(task_type, project_type, task_data)
+
+    def add_many(self, rows):
+        # rows - итерируемое (task_type, project_type, task_data); одна транзакция.
+        # id выдаются подряд после максимального, поэтому строки задач и тегов
+        # вставляются двумя executemany без запроса lastrowid на каждую задачу
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            start = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0]
+            task_rows, tag_rows = [], []
+            for task_id, (task_type, project_type, task_data) in enumerate(rows, start):
+                deadline, data = _encode(task_data)
+                task_rows.append((task_id, task_type, project_type, task_data.get("description", ""),
+                                  deadline, data))
+                tag_rows.extend((task_id, tag) for tag in _tags(task_data))
+            self.conn.executemany(
+                "INSERT INTO tasks (id, task_type, project_type, description, deadline, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", task_rows)
+            if tag_rows:
+                self.conn.executemany("INSERT OR IGNORE INTO task_tags (task_id, tag) VALUES (?, ?)",
+                                      tag_rows)
+            return list(range(start, start + len(task_rows)))
+
+    def update(self, task_id, task_data):
+        deadline, data = _encode(task_data)
+        with self.conn:
+            # Дедлайн мог измениться: прежняя отметка о напоминании сбрасывается
+            self.conn.execute("UPDATE tasks SET description = ?, deadline = ?, data = ?, reminded_at = NULL "
+                              "WHERE id = ?", (task_data.get("description", ""), deadline, data, task_id))
+            self.conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task_id,))
+            self._insert_tags(task_id, task_data)
+
+    def delete(self, task_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def load(self):
+        # Все задачи в порядке добавления: (id, task_type, project_type, task_data)
+        for task_id, task_type, project_type, data in self.conn.execute(
+                "SELECT id, task_type, project_type, data FROM tasks ORDER BY id"):
+            yield task_id, task_type, project_type, json.loads(data)
+
+    def mark_reminded(self, reminders):
+        # reminders - [(срок напоминания, task_id)] из TaskScheduler.pop_due
+        with self.conn:
+            self.conn.executemany("UPDATE tasks SET reminded_at = ? WHERE id = ?",
+                                  [(_iso(when), task_id) for when, task_id in reminders])
+
+    def reminded(self):
+        # {task_id: срок последнего показанного напоминания}
+        return {task_id: as_datetime(when) for task_id, when in self.conn.execute(
+            "SELECT id, reminded_at FROM tasks WHERE reminded_at IS NOT NULL")}
+
+    def filter(self, task_type=None, project_type=None, tag=None,
+               deadline_from=None, deadline_to=None):
+        # id задач, подходящих под все заданные условия
+        clauses, params = [], []
+        for clause, value in (("task_type = ?", task_type),
+                              ("project_type = ?", project_type),
+                              ("deadline >= ?", _iso(deadline_from)),
+                              ("deadline <= ?", _iso(deadline_to))):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        query = "SELECT id FROM tasks"
+        if tag is not None:
+            query = "SELECT tasks.id FROM task_tags JOIN tasks ON tasks.id = task_tags.task_id"
+            clauses.insert(0, "task_tags.tag = ?")
+            params.insert(0, tag)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return [row[0] for row in self.conn.execute(query + " ORDER BY 1", params)]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def _insert(self, task_type, project_type, task_data):
+        deadline, data = _encode(task_data)
+        task_id = self.conn.execute(
+            "INSERT INTO tasks (task_type, project_type, description, deadline, data) VALUES (?, ?, ?, ?, ?)",
+            (task_type, project_type, task_data.get("description", ""), deadline, data)).lastrowid
+        self._insert_tags(task_id, task_data)
+        return task_id
+
+    def _insert_tags(self, task_id, task_data):
+        tags = _tags(task_data)
+        if tags:
+            self.conn.executemany("INSERT OR IGNORE INTO task_tags (task_id, tag) VALUES (?, ?)",
+                                  [(task_id, tag) for tag in tags])
+
+
+def _iso(value):
+    # Дедлайн или граница фильтра в едином виде: datetime, date или строка ISO
+    value = as_datetime(value)
+    return None if value is None else value.isoformat()
+
+
+def _tags(task_data):
+    tags = task_data.get("tags") or ()
+    return [tags] if isinstance(tags, str) else tags
+
+
+def _encode(task_data):
+    # (дедлайн для колонки, JSON задачи) с одинаково записанным дедлайном
+    deadline = _iso(task_data.get("deadline"))
+    if deadline is not None:
+        task_data = dict(task_data, deadline=deadline)
+    return deadline, _dumps(task_data)
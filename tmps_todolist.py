@@ -1,135 +1,160 @@
-from abc import ABC, abstractmethod
+import os
 import tkinter as tk
-from tkinter import messagebox, simpledialog
-import copy
+import tkinter.font as tkfont
+from tkinter import filedialog, messagebox, simpledialog
+from datetime import datetime
+
+import instrumentation
+from instrumentation import timed
+import task_io
+from task_models import AppSettings, TaskFactory, ProjectFactory, TaskBuilder, TaskPrototype
+from task_scheduler import TaskScheduler, as_datetime
+from task_search import TaskSearchIndex, parse_query
+from task_store import TaskStore
 
-# 1. Singleton — AppSettings
-class AppSettings:
-    _instance = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(AppSettings, cls).__new__(cls)
-            cls._instance.save_path = "./tasks"
-        return cls._instance
-
-    def set_save_path(self, path):
-        self.save_path = path
-
-    def get_save_path(self):
-        return self.save_path
-
-
-# 2. Factory Method — TaskFactory
-class Task(ABC):
-    @abstractmethod
-    def display(self):
-        pass
-
-class SimpleTask(Task):
-    def __init__(self, description):
-        self.description = description
-
-    def display(self):
-        return f"Simple Task: {self.description}"
-
-class UrgentTask(Task):
-    def __init__(self, description):
-        self.description = description
-
-    def display(self):
-        return f"Urgent Task: {self.description}"
-
-class RecurringTask(Task):
-    def __init__(self, description):
-        self.description = description
-
-    def display(self):
-        return f"Recurring Task: {self.description}"
-
-class TaskFactory:
-    def create_task(self, task_type, description):
-        if task_type == "simple":
-            return SimpleTask(description)
-        elif task_type == "urgent":
-            return UrgentTask(description)
-        elif task_type == "recurring":
-            return RecurringTask(description)
+# Графический интерфейс
+class VirtualListView:
+    # Список, который держит в Listbox только видимые строки: сами id задач
+    # лежат в Python-списке (или в SearchResult поиска), а при прокрутке
+    # перерисовывается одно окно строк. Новый набор строк рисуется, когда Tk
+    # освободится: при быстром наборе запроса упорядочивается и выводится
+    # только последний результат
+    def __init__(self, master, label):
+        self.label = label
+        self.items = []
+        self.top = 0
+        self.rows = 1
+        self.selected = None  # Абсолютный номер выбранной строки в items
+        self._keep_selected = None  # id, выбор которого восстанавливается при отрисовке
+        self._render_job = None
+
+        self.frame = tk.Frame(master)
+        self.listbox = tk.Listbox(self.frame, exportselection=False)
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.row_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(3))
+        self.listbox.bind("<Up>", lambda event: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self._move_selection(1))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_items(self, items):
+        if self._render_job is None:
+            self._keep_selected = self.selected_id()
+            self._render_job = self.listbox.after_idle(self._show_items)
+        self.items = items
+        self.selected = None
+
+    def _show_items(self):
+        self._render_job = None
+        selected_id, self._keep_selected = self._keep_selected, None
+        self.top = self._clamp(self.top)
+        if selected_id is not None:
+            # Выбор сохраняется, если задача осталась на экране
+            for pos in range(self.top, min(self.top + self.rows, len(self.items))):
+                if self.items[pos] == selected_id:
+                    self.selected = pos
+                    break
+        self.render()
+
+    def append(self, ids):
+        visible = len(self.items) < self.top + self.rows
+        self.items.extend(ids)
+        if visible:
+            self.render()
         else:
-            raise ValueError("Unknown task type")
-
-
-# 3. Abstract Factory — ProjectFactory
-class ProjectTask(ABC):
-    @abstractmethod
-    def display(self):
-        pass
-
-class WorkTask(ProjectTask):
-    def __init__(self, description):
-        self.description = description
-
-    def display(self):
-        return f"Work Task: {self.description}"
-
-class HomeTask(ProjectTask):
-    def __init__(self, description):
-        self.description = description
-
-    def display(self):
-        return f"Home Task: {self.description}"
-
-class HobbyTask(ProjectTask):
-    def __init__(self, description):
-        self.description = description
-
-    def display(self):
-        return f"Hobby Task: {self.description}"
-
-class ProjectFactory:
-    def create_task(self, project_type, description):
-        if project_type == "work":
-            return WorkTask(description)
-        elif project_type == "home":
-            return HomeTask(description)
-        elif project_type == "hobby":
-            return HobbyTask(description)
+            self._update_scrollbar()
+
+    def remove_selected(self):
+        task_id = self.selected_id()
+        if task_id is None:
+            return None
+        self.remove({task_id})
+        return task_id
+
+    def remove(self, ids):
+        # Один проход по списку вместо pop на каждый id
+        self.items = [task_id for task_id in self.items if task_id not in ids]
+        self.selected = None
+        self.top = self._clamp(self.top)
+        self.render()
+
+    def selected_id(self):
+        if self.selected is None or self.selected >= len(self.items):
+            return None
+        return self.items[self.selected]
+
+    def scroll(self, delta):
+        top = self._clamp(self.top + delta)
+        if top != self.top:
+            self.top = top
+            self.render()
+        return "break"
+
+    def render(self):
+        visible = self.items[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *[self.label(task_id) for task_id in visible])
+        if self.selected is not None and self.top <= self.selected < self.top + self.rows:
+            self.listbox.selection_set(self.selected - self.top)
+        self._update_scrollbar()
+
+    def _clamp(self, top):
+        return max(0, min(top, len(self.items) - self.rows))
+
+    def _update_scrollbar(self):
+        count = len(self.items)
+        if count <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
         else:
-            raise ValueError("Unknown project type")
-
+            self.scrollbar.set(self.top / count, (self.top + self.rows) / count)
 
-# 4. Builder — TaskBuilder
-class TaskBuilder:
-    def __init__(self):
-        self.task = {}
-
-    def set_description(self, description):
-        self.task['description'] = description
-        return self
-
-    def set_deadline(self, deadline):
-        self.task['deadline'] = deadline
-        return self
-
-    def set_tags(self, tags):
-        self.task['tags'] = tags
-        return self
-
-    def build(self):
-        return self.task
-
-
-# 5. Prototype — TaskPrototype
-class TaskPrototype:
-    def __init__(self, task):
-        self.task = task
-
-    def clone(self):
-        return copy.deepcopy(self.task)
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = self._clamp(int(float(amount) * len(self.items)))
+            self.render()
+        else:
+            step = self.rows if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_resize(self, event):
+        rows = max(1, event.height // self.row_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.top = self._clamp(self.top)
+            self.render()
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def _move_selection(self, step):
+        if not self.items:
+            return "break"
+        pos = 0 if self.selected is None else max(0, min(self.selected + step, len(self.items) - 1))
+        self.selected = pos
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + self.rows:
+            self.top = pos - self.rows + 1
+        self.render()
+        return "break"
 
 
-# Графический интерфейс
 class ToDoApp:
+    # Как часто перепроверять очередь, даже если ближайший срок еще далеко
+    REMINDER_MAX_DELAY_MS = 60000
+
     def __init__(self, root):
         self.root = root
         self.root.title("To-Do List Manager")
@@ -142,29 +167,144 @@ class ToDoApp:
         self.label = tk.Label(root, text="To-Do List Manager")
         self.label.pack(pady=10)
 
-        self.task_listbox = tk.Listbox(root)
-        self.task_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # Поиск по описанию и тегам обновляет список на каждое нажатие клавиши
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(root, textvariable=self.search_var)
+        self.search_entry.pack(fill=tk.X, padx=10)
+        self.search_var.trace_add("write", timed("todo.search", lambda *args: self.apply_filter()))
+
+        self.task_list = VirtualListView(root, self.task_label)
+        self.task_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # F12 - запуск и остановка семплирующего профилировщика
+        root.bind_all("<F12>", lambda event: instrumentation.toggle_sampling())
 
         # Кнопки
-        self.add_button = tk.Button(root, text="Add Task", command=self.add_task)
+        self.add_button = tk.Button(root, text="Add Task", command=timed("todo.add_task", self.add_task))
         self.add_button.pack(side=tk.LEFT, padx=10, pady=10)
 
-        self.clone_button = tk.Button(root, text="Clone Task", command=self.clone_task)
+        self.clone_button = tk.Button(root, text="Clone Task", command=timed("todo.clone_task", self.clone_task))
         self.clone_button.pack(side=tk.LEFT, padx=10, pady=10)
 
-        self.view_button = tk.Button(root, text="View Task", command=self.view_task)
+        self.view_button = tk.Button(root, text="View Task", command=timed("todo.view_task", self.view_task))
         self.view_button.pack(side=tk.LEFT, padx=10, pady=10)
 
-        self.delete_button = tk.Button(root, text="Delete Task", command=self.delete_task)
+        self.edit_button = tk.Button(root, text="Edit Task", command=timed("todo.edit_task", self.edit_task))
+        self.edit_button.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.clone_many_button = tk.Button(root, text="Clone N", command=timed("todo.clone_task_many", self.clone_task_many))
+        self.clone_many_button.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.delete_button = tk.Button(root, text="Delete Task", command=timed("todo.delete_task", self.delete_task))
         self.delete_button.pack(side=tk.LEFT, padx=10, pady=10)
 
-        self.tasks = []
+        self.import_button = tk.Button(root, text="Import", command=timed("todo.import_tasks", self.import_tasks))
+        self.import_button.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.export_button = tk.Button(root, text="Export", command=timed("todo.export_tasks", self.export_tasks))
+        self.export_button.pack(side=tk.LEFT, padx=10, pady=10)
+
+        # Задачи по постоянному id в порядке добавления и поисковый индекс по ним
+        self.tasks = {}
+        self.search_index = TaskSearchIndex()
+        # Очередь напоминаний по дедлайнам; таймер Tk ставится на ближайший срок
+        self.scheduler = TaskScheduler()
+        self._reminder_job = None
+
+        # Хранилище в каталоге из настроек: задачи загружаются при запуске,
+        # а каждое изменение сохраняется сразу
+        self.store = TaskStore(os.path.join(self.settings.get_save_path(), "tasks.db"))
+        self.load_tasks()
+        self.check_reminders()
+
+    def task_label(self, task_id):
+        return self.tasks[task_id][2].get("description", "")
+
+    def load_tasks(self):
+        task_factory = TaskFactory()
+        project_factory = ProjectFactory()
+        for task_id, task_type, project_type, task_data in self.store.load():
+            description = task_data.get("description", "")
+            task = task_factory.create_task(task_type, description)
+            project_task = project_factory.create_task(project_type, description)
+            self.tasks[task_id] = (task, project_task, task_data)
+        self.search_index.add_many((task_id, task_data.get("description", ""), task_data.get("tags"))
+                                   for task_id, (_, _, task_data) in self.tasks.items())
+        self.scheduler.schedule_many(((task_id, task_data.get("deadline"), task_data.get("repeat"))
+                                      for task_id, (_, _, task_data) in self.tasks.items()),
+                                     now=datetime.now(), reminded=self.store.reminded())
+        self.task_list.set_items(list(self.tasks))
+
+    def check_reminders(self):
+        due = self.scheduler.pop_due(datetime.now())
+        if due:
+            # Показанные напоминания запоминаются, чтобы не повторяться при запуске
+            self.store.mark_reminded([(when, task_id) for when, task_id in due if task_id in self.tasks])
+            lines = [f"{when:%Y-%m-%d %H:%M}  {self.task_label(task_id)}"
+                     for when, task_id in due[:20] if task_id in self.tasks]
+            if len(due) > 20:
+                lines.append(f"... and {len(due) - 20} more")
+            messagebox.showinfo("Reminders", "\n".join(lines))
+        self._schedule_reminder_check()
+
+    def _schedule_reminder_check(self):
+        if self._reminder_job is not None:
+            self.root.after_cancel(self._reminder_job)
+        delay = self.REMINDER_MAX_DELAY_MS
+        next_due = self.scheduler.next_due()
+        if next_due is not None:
+            seconds = (next_due[0] - datetime.now()).total_seconds()
+            delay = max(0, min(delay, int(seconds * 1000) + 1))
+        self._reminder_job = self.root.after(delay, self.check_reminders)
+
+    def _schedule_task(self, task_id, task_data):
+        if task_data.get("deadline") is not None:
+            self.scheduler.schedule(task_id, task_data["deadline"], task_data.get("repeat"),
+                                    now=datetime.now())
+            self._schedule_reminder_check()
+
+    def apply_filter(self):
+        # Текст ищется по индексу слов, условия поле:значение - запросом к
+        # индексам хранилища; None - пустой запрос, показываются все задачи
+        text, filters = parse_query(self.search_var.get())
+        result = self.search_index.search(text)
+        if filters:
+            filtered = self.store.filter(**filters)
+            if result is not None:
+                filtered = [task_id for task_id in filtered if task_id in result]
+            result = filtered
+        self.task_list.set_items(list(self.tasks) if result is None else result)
+
+    def _show_added(self, task_ids):
+        if self.search_var.get().strip():
+            self.apply_filter()
+        else:
+            self.task_list.append(task_ids)
+
+    def _append_task(self, task_tuple):
+        task, project_task, task_data = task_tuple
+        task_id = self.store.add(task.task_type, project_task.project_type, task_data)
+        self.tasks[task_id] = task_tuple
+        self.search_index.add(task_id, task_data.get("description", ""), task_data.get("tags"))
+        self._schedule_task(task_id, task_data)
+        self._show_added([task_id])
+        return task_id
 
     def add_task(self):
         description = simpledialog.askstring("Add Task", "Enter task description:")
         if description:
             task_type = simpledialog.askstring("Add Task", "Enter task type (simple/urgent/recurring):")
             project_type = simpledialog.askstring("Add Task", "Enter project type (work/home/hobby):")
+            deadline = simpledialog.askstring("Add Task", "Enter deadline (YYYY-MM-DD HH:MM, optional):")
+            repeat = None
+            if deadline:
+                try:
+                    deadline = as_datetime(deadline)
+                except ValueError:
+                    messagebox.showerror("Add Task", "Invalid deadline")
+                    return
+                if task_type == "recurring":
+                    repeat = simpledialog.askinteger("Add Task", "Repeat every N days:", minvalue=1)
 
             # Factory Method
             task_factory = TaskFactory()
@@ -176,39 +316,147 @@ class ToDoApp:
 
             # Builder
             task_builder = TaskBuilder()
-            task_data = task_builder.set_description(description).build()
+            task_builder.set_description(description)
+            if deadline:
+                task_builder.set_deadline(deadline)
+            if repeat:
+                task_builder.set_repeat(repeat)
+            task_data = task_builder.build()
 
-            self.tasks.append((task, project_task, task_data))
-            self.task_listbox.insert(tk.END, description)
+            self._append_task((task, project_task, task_data))
 
     def clone_task(self):
-        selected_index = self.task_listbox.curselection()
-        if selected_index:
-            selected_task = self.tasks[selected_index[0]]
-            cloned_task = TaskPrototype(selected_task).clone()
-            self.tasks.append(cloned_task)
-            self.task_listbox.insert(tk.END, cloned_task[0].display())
+        task_id = self.task_list.selected_id()
+        if task_id is not None:
+            cloned_task = TaskPrototype(self.tasks[task_id]).clone()
+            self._append_task(cloned_task)
+
+    def clone_task_many(self):
+        task_id = self.task_list.selected_id()
+        if task_id is None:
+            return
+        count = simpledialog.askinteger("Clone Task", "Number of copies:", minvalue=1, initialvalue=10)
+        if not count:
+            return
+        selected_task = self.tasks[task_id]
+        clones = TaskPrototype(selected_task).clone_many(count)
+        task, project_task, task_data = selected_task
+        # Все копии сохраняются одной транзакцией и попадают в индекс одним проходом
+        task_ids = self.store.add_many((task.task_type, project_task.project_type, data)
+                                       for _, _, data in clones)
+        self.tasks.update(zip(task_ids, clones))
+        description, tags = task_data.get("description", ""), task_data.get("tags")
+        self.search_index.add_many((clone_id, description, tags) for clone_id in task_ids)
+        if task_data.get("deadline") is not None:
+            self.scheduler.schedule_many(((clone_id, task_data["deadline"], task_data.get("repeat"))
+                                          for clone_id in task_ids), now=datetime.now())
+            self._schedule_reminder_check()
+        self._show_added(task_ids)
+
+    def import_tasks(self):
+        path = filedialog.askopenfilename(filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        try:
+            imported, skipped, errors = task_io.import_tasks(
+                path, self.store, TaskFactory(), ProjectFactory(), TaskBuilder, on_batch=self._add_batch)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Import", str(e))
+            return
+        message = f"Imported: {imported}\nSkipped: {skipped}"
+        if errors:
+            message += "\n" + "\n".join(f"Record {number}: {text}" for number, text in errors[:5])
+        messagebox.showinfo("Import", message)
+
+    def _add_batch(self, batch):
+        # batch - [(task_id, (task, project_task, task_data))] уже сохраненной пачки
+        task_ids = [task_id for task_id, _ in batch]
+        self.tasks.update(batch)
+        self.search_index.add_many((task_id, task_data.get("description", ""), task_data.get("tags"))
+                                   for task_id, (_, _, task_data) in batch)
+        self.scheduler.schedule_many(((task_id, task_data.get("deadline"), task_data.get("repeat"))
+                                      for task_id, (_, _, task_data) in batch), now=datetime.now())
+        self._show_added(task_ids)
+        self._schedule_reminder_check()
+        self.root.update_idletasks()
+
+    def export_tasks(self):
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        try:
+            count = task_io.export_tasks(path, self.store)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Export", str(e))
+            return
+        messagebox.showinfo("Export", f"Exported: {count}")
 
     def view_task(self):
-        selected_index = self.task_listbox.curselection()
-        if selected_index:
-            selected_task = self.tasks[selected_index[0]]
+        task_id = self.task_list.selected_id()
+        if task_id is not None:
+            selected_task = self.tasks[task_id]
             task_info = (
                 f"Task: {selected_task[0].display()}\n"
                 f"Project: {selected_task[1].display()}\n"
                 f"Details: {selected_task[2]}"
             )
+            due = self.scheduler.due_at(task_id)
+            if due is not None:
+                task_info += f"\nNext reminder: {due:%Y-%m-%d %H:%M}"
+
             messagebox.showinfo("Task Details", task_info)
 
+    def edit_task(self):
+        # Изменение описания и дедлайна; в хранилище переписывается одна строка
+        task_id = self.task_list.selected_id()
+        if task_id is None:
+            return
+        task, project_task, task_data = self.tasks[task_id]
+        description = simpledialog.askstring("Edit Task", "Enter task description:",
+                                             initialvalue=task_data.get("description", ""))
+        if not description:
+            return
+        current = as_datetime(task_data.get("deadline"))
+        deadline = simpledialog.askstring("Edit Task", "Enter deadline (YYYY-MM-DD HH:MM, optional):",
+                                          initialvalue=f"{current:%Y-%m-%d %H:%M}" if current else "")
+        if deadline is None:
+            return
+        task_data = dict(task_data, description=description)
+        if deadline.strip():
+            try:
+                task_data["deadline"] = as_datetime(deadline)
+            except ValueError:
+                messagebox.showerror("Edit Task", "Invalid deadline")
+                return
+        else:
+            task_data.pop("deadline", None)
+
+        self.store.update(task_id, task_data)
+        self.tasks[task_id] = (TaskFactory().create_task(task.task_type, description),
+                               ProjectFactory().create_task(project_task.project_type, description),
+                               task_data)
+        self.search_index.remove(task_id)
+        self.search_index.add(task_id, description, task_data.get("tags"))
+        self.scheduler.unschedule(task_id)
+        self._schedule_task(task_id, task_data)
+        if self.search_var.get().strip():
+            self.apply_filter()
+        else:
+            self.task_list.render()
+
     def delete_task(self):
-        selected_index = self.task_listbox.curselection()
-        if selected_index:
-            self.task_listbox.delete(selected_index)
-            self.tasks.pop(selected_index[0])
+        task_id = self.task_list.remove_selected()
+        if task_id is not None:
+            del self.tasks[task_id]
+            self.search_index.remove(task_id)
+            self.scheduler.unschedule(task_id)
+            self.store.delete(task_id)
 
 
 # Запуск приложения
 if __name__ == "__main__":
+    instrumentation.configure_from_env()
     root = tk.Tk()
     app = ToDoApp(root)
     root.mainloop()
\ No newline at end of file